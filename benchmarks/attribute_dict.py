@@ -0,0 +1,81 @@
+""" Microbenchmark of AttributeDict's most frequent operations.
+
+Run from the repository root, e.g.:
+python -m benchmarks.attribute_dict
+"""
+
+from collections import OrderedDict
+import logging
+import timeit
+
+
+__author__ = "Vince Reuter"
+__email__ = "vreuter@virginia.edu"
+
+
+_LOGGER = logging.getLogger(__name__)
+
+NUM_KEYS = 50
+REPEATS = 5
+NUMBER = 20000
+
+SETUP = """
+from pep.models import AttributeDict, Sample
+data = {{"attr{{}}".format(i): "value{{}}".format(i) for i in range({n})}}
+ad = AttributeDict(data)
+flagged = AttributeDict(data, _attribute_identity=True)
+other = AttributeDict(data)
+plain = dict(data)
+s = Sample(dict(data, sample_name="s1"))
+""".format(n=NUM_KEYS)
+
+STATEMENTS = [
+    ("len", "len(ad)"),
+    ("len (flagged)", "len(flagged)"),
+    ("iter", "for _ in ad: pass"),
+    ("iter (flagged)", "for _ in flagged: pass"),
+    ("in (present)", "'attr7' in ad"),
+    ("in (absent)", "'missing' in ad"),
+    ("getitem", "ad['attr7']"),
+    ("getattr", "ad.attr7"),
+    ("getattr (default)", "getattr(ad, 'missing', None)"),
+    ("setitem", "ad['attr7'] = 'value7'"),
+    ("== AttributeDict", "ad == other"),
+    ("== dict", "ad == plain"),
+    ("Sample getitem", "s['sample_name']"),
+    ("build AttributeDict", "AttributeDict(data)"),
+]
+
+
+
+def benchmark(statements=None, number=NUMBER, repeats=REPEATS):
+    """
+    Time AttributeDict operations, each on an instance of NUM_KEYS keys.
+
+    :param Iterable[(str, str)] statements: name and code of each operation
+        to time; by default, all of STATEMENTS
+    :param int number: number of times to run an operation per timing
+    :param int repeats: number of timings of which to take the best
+    :return Mapping[str, float]: best time, in microseconds per operation,
+        by operation name
+    """
+    timings = OrderedDict()
+    for name, statement in statements or STATEMENTS:
+        best = min(timeit.repeat(
+                statement, setup=SETUP, repeat=repeats, number=number))
+        timings[name] = 1e6 * best / number
+    return timings
+
+
+
+def main():
+    """ Log the time that each operation takes. """
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    _LOGGER.info("{:<22}{:>12}".format("operation", "usec/op"))
+    for name, usec in benchmark().items():
+        _LOGGER.info("{:<22}{:>12.3f}".format(name, usec))
+
+
+
+if __name__ == "__main__":
+    main()
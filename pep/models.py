@@ -48,43 +48,88 @@ Explore:
 # TODO: perhaps update examples based on removal of guarantee of some attrs.
 # TODO: the examples changes would involve library and output_dir.
 
+from bisect import bisect_right
 from collections import \
     Counter, defaultdict, Iterable, Mapping, MutableMapping, namedtuple, \
-    OrderedDict as _OrderedDict
+    OrderedDict as _OrderedDict, Sequence
 from functools import partial
 import glob
+import hashlib
 import inspect
 import itertools
+import json
 import logging
+from multiprocessing.pool import ThreadPool
 from operator import itemgetter
 import os as _os
+import pickle
+import re
+import string
 import sys
 if sys.version_info < (3, 0):
     from urlparse import urlparse
+    _intern = intern
+    _STRING_TYPES = (basestring, )
 else:
     from urllib.parse import urlparse
+    _intern = sys.intern
+    _STRING_TYPES = (str, )
 import warnings
 
+import numpy as _np
 import pandas as _pd
 import yaml
+try:
+    import msgpack
+except ImportError:
+    # msgpack is needed only for Sample files in its format.
+    msgpack = None
 
+from ._version import __version__
 from .const import *
 from .utils import \
     add_project_sample_constants, alpha_cased, check_bam, check_fastq, \
-    expandpath, get_file_size, grab_project_data, import_from_source, \
+    declared_subclasses, expandpath, fingerprint_files, get_file_size, \
+    grab_project_data, \
+    import_from_source, infer_delimiter, \
     is_command_callable, parse_ftype, partition, sample_folder, \
-    standard_stream_redirector
+    standard_stream_redirector, update_file, GlobCache, StatCache, \
+    SubmissionTemplate
 
 
 # TODO: decide if we want to denote functions for export.
-__functions__ = []
+__functions__ = ["load_sample"]
 __classes__ = ["AttributeDict", "PipelineInterface", "Project",
                "ProtocolInterface", "ProtocolMapper", "Sample"]
 __all__ = __functions__ + __classes__
 
 
+# pandas reader by extension of files of columnar data
+COLUMNAR_READERS = {".feather": "read_feather", ".ftr": "read_feather",
+                    ".parquet": "read_parquet", ".pq": "read_parquet"}
 MAX_PROJECT_SAMPLES_REPR = 12
+# Pipeline modules of which to remember the Sample subtypes
+MAX_PIPELINE_MODULES = 64
+# Formats in which a Sample may be written, by name, with file extensions;
+# the project or a pipeline may name one with the key given here.
+SAMPLE_FILE_FORMATS = _OrderedDict(
+    [("yaml", ".yaml"), ("json", ".json"), ("msgpack", ".msgpack")])
+SAMPLE_FILE_FORMAT_KEY = "sample_file_format"
+# YAML emitter and parser for Sample files; libyaml's, if available, are
+# much faster.
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# Stand-in for a Sample's Project data, rendered as YAML separately
+_PROJECT_PLACEHOLDER = "PEP_PROJECT_DATA_PLACEHOLDER"
+# Placeholder for a Sample's lack of a value, as null is a legitimate value.
+_MISSING = object()
 ATTRDICT_METADATA = {"_force_nulls": False, "_attribute_identity": False}
+# Attributes that a Sample establishes for itself, rather than from its data.
+SAMPLE_INTERNAL_ATTRS = frozenset(ATTRDICT_METADATA) | {
+    "prj", "merged_cols", "derived_cols_done", "sheet_attributes",
+    "required_paths", "yaml_file", "merged", "paths"}
+# Version of the layout of a Project snapshot
+SNAPSHOT_FORMAT = 2
 
 _LOGGER = logging.getLogger(__name__)
 if not logging.getLogger().handlers:
@@ -92,12 +137,14 @@ if not logging.getLogger().handlers:
 
 
 
-def check_sheet(sample_file, dtype=str):
+def check_sheet(sample_file, dtype=str, sep=None):
     """
     Check if csv file exists and has all required columns.
 
     :param str sample_file: path to sample annotations file.
     :param type dtype: data type for CSV read.
+    :param str sep: delimiter of annotations file, optional; if unspecified,
+        it's inferred (see read_table_data)
     :raises IOError: if given annotations file can't be read.
     :raises ValueError: if required column(s) is/are missing.
     """
@@ -109,8 +156,8 @@ def check_sheet(sample_file, dtype=str):
     # See https://github.com/pepkit/pep/issues/159 for the original issue
     # and https://github.com/pepkit/pep/pull/160 for the pull request
     # that resolved it.
-    df = _pd.read_table(sample_file, sep=None, dtype=dtype,
-                        index_col=False, engine="python", keep_default_na=False)
+    df = read_table_data(sample_file, sep=sep, dtype=dtype,
+                         keep_default_na=False)
     req = [SAMPLE_NAME_COLNAME]
     missing = set(req) - set(df.columns)
     if len(missing) != 0:
@@ -121,6 +168,61 @@ def check_sheet(sample_file, dtype=str):
 
 
 
+def read_table_data(filepath, sep=None, dtype=None, keep_default_na=True):
+    """
+    Read tabular data, e.g. sample annotations or a merge table, from file.
+
+    Delimited text, perhaps gzipped, is parsed with pandas's C engine,
+    with the given delimiter or one inferred from the file's header or
+    extension. Parquet and Feather files are read as such (this requires
+    pyarrow) and then treated as text would be with respect to data type
+    and null values.
+
+    :param str filepath: path to the file to read
+    :param str sep: delimiter for text data, optional
+    :param type dtype: data type for all columns, optional; by default,
+        each column's type is inferred
+    :param bool keep_default_na: whether to regard pandas's default
+        markers of missing text data (e.g., empty, 'NA', 'nan') as null
+    :return pandas.core.frame.DataFrame: the file's data
+    :raises IOError: if the file can't be read
+    """
+    extension = _os.path.splitext(filepath)[1].lower()
+    if extension not in COLUMNAR_READERS:
+        return _pd.read_csv(
+            filepath, sep=sep or infer_delimiter(filepath), dtype=dtype,
+            index_col=False, engine="c", keep_default_na=keep_default_na)
+    if not _os.path.isfile(filepath):
+        raise IOError("No such file: '{}'".format(filepath))
+    df = getattr(_pd, COLUMNAR_READERS[extension])(filepath)
+    if dtype is not None:
+        nulls = df.isnull()
+        df = df.astype(dtype).mask(
+            nulls, float("nan") if keep_default_na else "")
+    elif not keep_default_na:
+        df = df.fillna("")
+    return df
+
+
+
+def check_reads(filepath, rlen_sample_size):
+    """
+    Sample the reads of a sequencing data file to determine their features.
+
+    :param str filepath: path to BAM or FASTQ file
+    :param int rlen_sample_size: number of reads to examine
+    :return (Mapping[int, int], int): count of examined reads by length,
+        and number of examined reads that are paired
+    :raises TypeError: if the file is neither BAM nor FASTQ
+    :raises NotImplementedError: if checking the file's type is unsupported
+    :raises IOError: if the file can't be read
+    :raises OSError: if a tool needed to read the file is unavailable
+    """
+    check_by_ftype = {"bam": check_bam, "fastq": check_fastq}
+    return check_by_ftype[parse_ftype(filepath)](filepath, rlen_sample_size)
+
+
+
 def copy(obj):
     def copy(self):
         """
@@ -173,6 +275,12 @@ def fetch_samples(proj, inclusion=None, exclusion=None):
             items = [items]
         return {alpha_cased(i) for i in items}
 
+    protocols = make_set(inclusion or exclusion)
+
+    if isinstance(proj, Project):
+        # Look up just the samples of interest, by protocol.
+        return proj.samples_by_protocol(protocols, exclude=not inclusion)
+
     # Use the attr check here rather than exception block in case the
     # hypothetical AttributeError would occur in alpha_cased; we want such
     # an exception to arise, not to catch it as if the Sample lacks "protocol"
@@ -180,12 +288,12 @@ def fetch_samples(proj, inclusion=None, exclusion=None):
         # Loose; keep all samples not in the exclusion.
         def keep(s):
             return not hasattr(s, "protocol") or \
-                   alpha_cased(s.protocol) not in make_set(exclusion)
+                   alpha_cased(s.protocol) not in protocols
     else:
         # Strict; keep only samples in the inclusion.
         def keep(s):
             return hasattr(s, "protocol") and \
-                   alpha_cased(s.protocol) in make_set(inclusion)
+                   alpha_cased(s.protocol) in protocols
 
     return list(filter(keep, proj.samples))
 
@@ -205,7 +313,11 @@ def include_in_repr(attr, klazz):
     ad_metadata = list(ATTRDICT_METADATA.keys())
     exclusions_by_class = {
             AttributeDict.__name__: ad_metadata,
-            Project.__name__: ["_samples", "merge_table", "sheet",
+            Project.__name__: ["_samples", "_sample_indexes", "_read_checks",
+                               "_stat_cache", "_glob_cache",
+                               "_data_source_templates", "_compact_samples",
+                               "_submission_bundles", "_submission_templates",
+                               "merge_table", "sheet",
                                "interfaces_by_protocol"] + ad_metadata,
             Sample.__name__: ["sheet", "prj", "merged_cols"] + ad_metadata}
     classname = klazz.__name__ if isinstance(klazz, type) else klazz
@@ -224,12 +336,92 @@ def is_url(maybe_url):
 
 
 
+def load_sample(path, sample_type=None):
+    """
+    Rebuild a Sample from the file to which it was written.
+
+    The file's format is determined by its extension, and unless it's
+    specified, the Sample's type is determined by the file's name (as
+    generated for the Sample), among the Sample subtypes already imported.
+
+    :param str path: path to a Sample's YAML, JSON, or msgpack file
+    :param type sample_type: Sample class of which to rebuild an instance,
+        optional
+    :return Sample: Sample with the data from the file
+    :raises ValueError: if the file's extension isn't that of a known format
+    """
+    ext = _os.path.splitext(path)[1]
+    formats = {e: name for name, e in SAMPLE_FILE_FORMATS.items()}
+    formats[".yml"] = "yaml"
+    try:
+        file_format = formats[ext]
+    except KeyError:
+        raise ValueError("Unknown Sample file extension: '{}'; known: {}".
+                         format(ext, ", ".join(sorted(formats))))
+    _LOGGER.debug("Loading %s Sample file: '%s'", file_format, path)
+    if file_format == "msgpack":
+        if msgpack is None:
+            raise ImportError("Reading a msgpack Sample requires msgpack")
+        with open(path, 'rb') as sample_file:
+            data = msgpack.unpackb(sample_file.read(), raw=False)
+    else:
+        with open(path, 'r') as sample_file:
+            data = json.load(sample_file) if file_format == "json" \
+                else yaml.load(sample_file, Loader=_YAML_LOADER)
+
+    flags = {k: data.pop(k) for k in ATTRDICT_METADATA if k in data}
+    paths = data.pop("paths", None) or {}
+    if sample_type is None:
+        sample_type = _sample_file_type(path, data.get("name"))
+    sample = _rebuild_sample(sample_type, {}, flags)
+    # As when the Sample was built, mappings become AttributeDict, except
+    # for the paths.
+    sample.add_entries(data)
+    sample.__dict__["paths"] = Paths()
+    for name, value in paths.items():
+        setattr(sample.paths, name, value)
+    # The names of the sheet's columns aren't written.
+    sample.__dict__.setdefault("sheet_attributes", [])
+    return sample
+
+
+
+def group_merge_table(merge_table):
+    """
+    Partition merge table rows by sample name, in a single pass.
+
+    Selecting each sample's rows with a boolean mask over the whole table
+    makes merging quadratic in project size; grouping up front allows each
+    Sample to be merged in time proportional to its own number of rows.
+
+    :param pandas.core.frame.DataFrame merge_table: data with which to
+        alter Samples, one row per merge unit
+    :return Mapping[str, list[dict]]: merge table rows (each a mapping from
+        column name to value) for each sample name, in table order
+    :raises KeyError: if the merge table lacks a sample name column
+    """
+    if SAMPLE_NAME_COLNAME not in merge_table.columns:
+        raise KeyError(
+            "Merge table requires a column named '{}'.".
+                format(SAMPLE_NAME_COLNAME))
+    rows_by_sample = defaultdict(list)
+    for row in merge_table.to_dict("records"):
+        rows_by_sample[row[SAMPLE_NAME_COLNAME]].append(row)
+    _LOGGER.debug("Grouped %d merge table row(s) into %d sample(s)",
+                  len(merge_table), len(rows_by_sample))
+    return dict(rows_by_sample)
+
+
+
 def merge_sample(sample, merge_table, data_sources=None, derived_columns=None):
     """
     Use merge table data to augment/modify Sample.
 
     :param Sample sample: sample to modify via merge table data
-    :param merge_table: data with which to alter Sample
+    :param pandas.core.frame.DataFrame | Mapping[str, list[dict]] merge_table:
+        data with which to alter Sample, either the table itself or its rows
+        already grouped by sample name (see group_merge_table); the latter
+        is much cheaper when merging many samples from the same table
     :param Mapping data_sources: collection of named paths to data locations,
         optional
     :param Iterable[str] derived_columns: names of columns for which
@@ -243,27 +435,38 @@ def merge_sample(sample, merge_table, data_sources=None, derived_columns=None):
         _LOGGER.log(5, "No data for sample merge, skipping")
         return merged_attrs
 
-    if SAMPLE_NAME_COLNAME not in merge_table.columns:
-        raise KeyError(
-            "Merge table requires a column named '{}'.".
-                format(SAMPLE_NAME_COLNAME))
-
-    _LOGGER.debug("Merging Sample with data sources: {}".
-                  format(data_sources))
-    
-    # Hash derived columns for faster lookup in case of many samples/columns.
-    derived_columns = set(derived_columns or [])
-    _LOGGER.debug("Merging Sample with derived columns: {}".
-                  format(derived_columns))
-
     sample_name = getattr(sample, SAMPLE_NAME_COLNAME)
-    sample_indexer = merge_table[SAMPLE_NAME_COLNAME] == sample_name
-    this_sample_rows = merge_table[sample_indexer]
+    if isinstance(merge_table, Mapping):
+        this_sample_rows = merge_table.get(sample_name) or []
+    else:
+        if SAMPLE_NAME_COLNAME not in merge_table.columns:
+            raise KeyError(
+                "Merge table requires a column named '{}'.".
+                    format(SAMPLE_NAME_COLNAME))
+        sample_indexer = merge_table[SAMPLE_NAME_COLNAME] == sample_name
+        this_sample_rows = merge_table[sample_indexer].to_dict("records")
+
     if len(this_sample_rows) == 0:
         _LOGGER.debug("No merge rows for sample '%s', skipping", sample.name)
         return merged_attrs
     _LOGGER.log(5, "%d rows to merge", len(this_sample_rows))
-    _LOGGER.log(5, "Merge rows dict: {}".format(this_sample_rows.to_dict()))
+    _LOGGER.log(5, "Merge rows: %s", this_sample_rows)
+
+    _LOGGER.debug("Merging Sample with data sources: %s", data_sources)
+
+    # Hash derived columns for faster lookup in case of many samples/columns.
+    derived_columns = set(derived_columns or [])
+    _LOGGER.debug("Merging Sample with derived columns: %s", derived_columns)
+
+    # Each of this sample's rows has the same columns, so determine once for
+    # the whole group which of them are derived, and which derived columns
+    # may be populated from the sample's own attributes.
+    columns = list(this_sample_rows[0].keys())
+    table_derived = [attr_name for attr_name in columns
+                     if attr_name != SAMPLE_NAME_COLNAME and
+                     attr_name in derived_columns]
+    sample_derived = [attr for attr in derived_columns
+                      if hasattr(sample, attr)]
 
     # For each row in the merge table of this sample:
     # 1) populate any derived columns
@@ -271,19 +474,13 @@ def merge_sample(sample, merge_table, data_sources=None, derived_columns=None):
     # 3) update the sample values with the merge table
     # Keep track of merged cols,
     # so we don't re-derive them later.
-    merged_attrs = {key: "" for key in this_sample_rows.columns}
-    
-    for _, row in this_sample_rows.iterrows():
-        rowdata = row.to_dict()
-
-        # Iterate over column names to avoid Python3 RuntimeError for
-        # during-iteration change of dictionary size.
-        for attr_name in this_sample_rows.columns:
-            if attr_name == SAMPLE_NAME_COLNAME or \
-                            attr_name not in derived_columns:
-                _LOGGER.log(5, "Skipping merger of attribute '%s'", attr_name)
-                continue
+    merged_attrs = {key: "" for key in columns}
 
+    for row in this_sample_rows:
+        # Copy so that grouped rows may be reused for another merge.
+        rowdata = dict(row)
+
+        for attr_name in table_derived:
             attr_value = rowdata[attr_name]
 
             # Initialize key in parent dict.
@@ -296,15 +493,15 @@ def merge_sample(sample, merge_table, data_sources=None, derived_columns=None):
             rowdata[attr_name] = data_src_path
 
         _LOGGER.log(5, "Adding derived columns")
-        
-        for attr in derived_columns:
-            
-            # Skip over any attributes that the sample lacks or that are
-            # covered by the data from the current (row's) data.
-            if not hasattr(sample, attr) or attr in rowdata:
+
+        for attr in sample_derived:
+
+            # Skip over any attributes that are covered by the data from the
+            # current (row's) data.
+            if attr in rowdata:
                 _LOGGER.log(5, "Skipping column: '%s'", attr)
                 continue
-            
+
             # Map key to sample's value for the attribute given by column name.
             col_key = attr + COL_KEY_SUFFIX
             rowdata[col_key] = getattr(sample, attr)
@@ -327,10 +524,8 @@ def merge_sample(sample, merge_table, data_sources=None, derived_columns=None):
         # string for a pipeline command.
         for attname, attval in rowdata.items():
             if attname == SAMPLE_NAME_COLNAME or not attval:
-                _LOGGER.log(5, "Skipping KV: {}={}".format(attname, attval))
+                _LOGGER.log(5, "Skipping KV: %s=%s", attname, attval)
                 continue
-            _LOGGER.log(5, "merge: sample '%s'; '%s'='%s'",
-                        str(sample.name), str(attname), str(attval))
             if attname not in merged_attrs:
                 new_attval = str(attval).rstrip()
             else:
@@ -342,7 +537,7 @@ def merge_sample(sample, merge_table, data_sources=None, derived_columns=None):
     # If present, remove sample name from the data with which to update sample.
     merged_attrs.pop(SAMPLE_NAME_COLNAME, None)
 
-    _LOGGER.log(5, "Updating Sample {}: {}".format(sample.name, merged_attrs))
+    _LOGGER.log(5, "Updating Sample %s: %s", sample.name, merged_attrs)
     sample.update(merged_attrs)  # 3)
     sample.merged_cols = merged_attrs
     sample.merged = True
@@ -377,6 +572,12 @@ def process_pipeline_interfaces(pipeline_interface_locations):
 
 
 
+# Positions of a Project's samples (in its sheet) by name and by protocol,
+# with a separate collection of positions of samples that lack a protocol.
+SampleIndexes = namedtuple(
+    "SampleIndexes",
+    field_names=["by_name", "by_protocol", "no_protocol"])
+
 # Collect PipelineInterface, Sample type, pipeline path, and script with flags.
 SubmissionBundle = namedtuple(
     "SubmissionBundle",
@@ -458,8 +659,17 @@ class AttributeDict(MutableMapping):
     using object syntax (attr_dict.attribute) instead of getitem syntax 
     (attr_dict["key"]). This class recursively sets mappings to objects, 
     facilitating attribute traversal (e.g., attr_dict.attr.attr).
+
+    The instance's __dict__ holds the key-value pairs, and the metadata flags
+    only if they differ from their defaults (the class's), so that length,
+    iteration, membership, and item access are, as a rule, plain dict
+    operations.
     """
 
+    # Metadata flag defaults
+    _force_nulls = ATTRDICT_METADATA["_force_nulls"]
+    _attribute_identity = ATTRDICT_METADATA["_attribute_identity"]
+
     def __init__(self, entries=None,
                  _force_nulls=False, _attribute_identity=False):
         """
@@ -475,9 +685,11 @@ class AttributeDict(MutableMapping):
             requested rather than exception when unset attribute/key is queried
         """
         # Null value can squash non-null?
-        self.__dict__["_force_nulls"] = _force_nulls
+        if _force_nulls:
+            self.__dict__["_force_nulls"] = _force_nulls
         # Return requested attribute name if not set?
-        self.__dict__["_attribute_identity"] = _attribute_identity
+        if _attribute_identity:
+            self.__dict__["_attribute_identity"] = _attribute_identity
         self.add_entries(entries)
 
 
@@ -512,6 +724,9 @@ class AttributeDict(MutableMapping):
         """
         Fetch the value associated with the provided identifier.
 
+        Ordinary attribute lookup (of the instance's data, and then of its
+        class) precedes this, so this is reached only for a missing item.
+
         :param int | str item: identifier for value to fetch
         :return object: whatever value corresponds to the requested key/item
         :raises AttributeError: if the requested item has not been set,
@@ -522,11 +737,6 @@ class AttributeDict(MutableMapping):
             anyway. More specifically, respect attribute naming that appears
             to be indicative of the intent of protection.
         """
-        try:
-            return super(AttributeDict, self).__getattribute__(item)
-        except (AttributeError, TypeError):
-            # Handle potential property and non-string failures.
-            pass
         try:
             # Fundamentally, this is still a mapping;
             # route object notation access pattern accordingly.
@@ -543,7 +753,7 @@ class AttributeDict(MutableMapping):
                 # For compatibility with ordinary getattr() invocation, allow
                 # caller the ability to provide a default value.
                 return default
-            if self.__dict__.setdefault("_attribute_identity", False):
+            if self._attribute_identity:
                 # Check if we should return the attribute name as the value.
                 return item
             # Throw up our hands in despair and resort to exception behavior.
@@ -565,7 +775,13 @@ class AttributeDict(MutableMapping):
         :raises _MetadataOperationException: if attempt is made
             to set value for privileged metadata key
         """
-        if isinstance(value, Mapping):
+        if key in ATTRDICT_METADATA:
+            # Metadata is stored only if it's not the (class's) default.
+            if value == ATTRDICT_METADATA[key]:
+                self.__dict__.pop(key, None)
+            else:
+                self.__dict__[key] = value
+        elif isinstance(value, Mapping):
             try:
                 # Combine AttributeDict instances.
                 self.__dict__[key].add_entries(value)
@@ -573,15 +789,22 @@ class AttributeDict(MutableMapping):
                 # Create new AttributeDict, replacing previous value.
                 self.__dict__[key] = AttributeDict(value)
         elif value is not None or \
-                key not in self.__dict__ or self.__dict__["_force_nulls"]:
+                key not in self.__dict__ or self._force_nulls:
             self.__dict__[key] = value
 
 
     def __getitem__(self, item):
+        try:
+            # Plain data, unless a property (or other data descriptor)
+            # of the same name takes precedence, as for attribute access.
+            if not _class_attributes(type(self)).get(item):
+                return self.__dict__[item]
+        except (KeyError, TypeError):
+            pass
         try:
             # Ability to return requested item name itself is delegated.
-            return self.__getattr__(item)
-        except AttributeError:
+            return getattr(self, item)
+        except (AttributeError, TypeError):
             # Requested item is unknown, but request was made via
             # __getitem__ syntax, not attribute-access syntax.
             raise KeyError(item)
@@ -595,11 +818,12 @@ class AttributeDict(MutableMapping):
             _LOGGER.debug("No item {} to delete".format(item))
 
     def __eq__(self, other):
-        try:
-            # Ensure target itself and any values are AttributeDict.
-            other = AttributeDict(other)
-        except Exception:
-            return False
+        if not isinstance(other, Mapping):
+            try:
+                # Ensure target itself and any values are AttributeDict.
+                other = AttributeDict(other)
+            except Exception:
+                return False
         if len(self) != len(other):
             # Ensure we don't have to worry about other containing self.
             return False
@@ -614,12 +838,34 @@ class AttributeDict(MutableMapping):
     def __ne__(self, other):
         return not self == other
 
+    def __contains__(self, item):
+        try:
+            if item in self.__dict__:
+                return True
+            # As with item access, an attribute of the class counts...
+            if item in _class_attributes(type(self)):
+                return True
+        except TypeError:
+            return False
+        # ...and if this instance returns the name of an unset item, so
+        # long as it's not protected-looking, any name does.
+        return bool(self._attribute_identity) and \
+            not (item.startswith("__") and item.endswith("__"))
+
     def __iter__(self):
-        return iter([k for k in self.__dict__.keys()
-                     if k not in ATTRDICT_METADATA])
+        data = self.__dict__
+        for name in ATTRDICT_METADATA:
+            if name in data:
+                return (k for k in data if k not in ATTRDICT_METADATA)
+        return iter(data)
 
     def __len__(self):
-        return sum(1 for _ in iter(self))
+        data = self.__dict__
+        size = len(data)
+        for name in ATTRDICT_METADATA:
+            if name in data:
+                size -= 1
+        return size
 
     def __repr__(self):
         return repr({k: v for k, v in self.__dict__.items()
@@ -667,6 +913,18 @@ class Project(AttributeDict):
         Sample objects until they're needed, optional; by default, the basic
         Sample is created during Project construction
     :type defer_sample_construction: bool
+    :param cache_folder: folder in which to keep a snapshot of the Project,
+        optional; if given, and a snapshot of a Project constructed with the
+        same arguments is current with respect to the Project's files
+        (configuration, annotations sheet, merge table, pipeline interfaces,
+        and environment settings), the Project is loaded from the snapshot
+        rather than built anew. Changes to environment variables referenced
+        by the configuration aren't detected.
+    :type cache_folder: str
+    :param compact_samples: whether to keep this Project's sample data by
+        column, each Sample being a lightweight view of its row, optional;
+        this spares much of the memory of a very large Project's Samples
+    :type compact_samples: bool
 
 
     :Example:
@@ -685,12 +943,36 @@ class Project(AttributeDict):
                  default_compute=None, dry=False,
                  permissive=True, file_checks=False, compute_env_file=None,
                  no_environment_exception=None, no_compute_exception=None,
-                 defer_sample_construction=False):
+                 defer_sample_construction=False, cache_folder=None,
+                 compact_samples=False):
 
         _LOGGER.debug("Creating %s from file: '%s'",
                           self.__class__.__name__, config_file)
         super(Project, self).__init__()
 
+        # Outcome of reads check by input file and sample size, file stats
+        # by path, directory listings, compiled data source templates,
+        # submission bundles by protocol, and parsed submission templates by
+        # path; these are set directly, so as not to be converted to
+        # AttributeDict.
+        self.__dict__["_read_checks"] = {}
+        self.__dict__["_stat_cache"] = StatCache()
+        self.__dict__["_glob_cache"] = GlobCache()
+        self.__dict__["_data_source_templates"] = {}
+        self.__dict__["_submission_bundles"] = {}
+        self.__dict__["_submission_templates"] = {}
+        self._compact_samples = compact_samples
+
+        if cache_folder:
+            snapshot_path = self._snapshot_path(
+                cache_folder, config_file, subproject, default_compute,
+                permissive, file_checks, compute_env_file,
+                defer_sample_construction, compact_samples)
+            if self._load_snapshot(snapshot_path):
+                if not dry:
+                    self.make_project_dirs()
+                return
+
         # Initialize local, serial compute as default (no cluster submission)
         # Start with default environment settings.
         _LOGGER.debug("Establishing default environment settings")
@@ -796,6 +1078,7 @@ class Project(AttributeDict):
             raise
 
         self.merge_table = None
+        self.__dict__["_sample_indexes"] = None
 
         # Basic sample maker will handle name uniqueness check.
         if defer_sample_construction:
@@ -803,6 +1086,11 @@ class Project(AttributeDict):
         else:
             self._set_basic_samples()
 
+        if cache_folder:
+            self._save_snapshot(snapshot_path, [
+                default_compute or self.default_compute_envfile,
+                compute_env_file])
+
 
     def __repr__(self):
         """ Representation in interpreter. """
@@ -893,13 +1181,7 @@ class Project(AttributeDict):
 
         :return Set[str]: collection of this Project's unique protocol names
         """
-        protos = set()
-        for s in self.samples:
-            try:
-                protos.add(s.protocol)
-            except AttributeError:
-                _LOGGER.debug("Sample '%s' lacks protocol", s.sample_name)
-        return protos
+        return set(self.sample_indexes.by_protocol.keys())
 
 
     @property
@@ -923,21 +1205,65 @@ class Project(AttributeDict):
         return iter(self.sheet[SAMPLE_NAME_COLNAME])
 
 
+    @property
+    def sample_indexes(self):
+        """
+        Positions of this Project's samples by name and by protocol.
+
+        The indexes are built once, when first needed, and they're rebuilt
+        when this Project's Samples are established anew. A change to a
+        Sample's name or protocol isn't tracked; after such an edit, call
+        invalidate_sample_indexes so that lookups reflect it. Where the
+        annotations sheet alone determines the samples' names and protocols,
+        building the indexes doesn't require building any Sample beyond
+        those already built.
+
+        :return SampleIndexes: positions of samples (as in this Project's
+            sheet and samples) by name and by protocol, and positions of
+            those lacking a protocol
+        """
+        if self._sample_indexes is None:
+            self._sample_indexes = self._index_samples()
+        return self._sample_indexes
+
+
     @property
     def samples(self):
         """
         Generic/base Sample instance for each of this Project's samples.
 
-        :return Iterable[Sample]: Sample instance for each
+        If this Project's Sample construction was deferred, or its samples
+        are compact, this is a lazy sequence, in which each Sample is built
+        (and cached) only when first indexed, sliced, or iterated over.
+
+        :return Sequence[Sample]: Sample instance for each
             of this Project's samples
         """
         if self._samples is None:
-            _LOGGER.debug("Building basic sample object(s) for %s",
+            _LOGGER.debug("Establishing lazy sample sequence for %s",
                           self.__class__.__name__)
-            self._set_basic_samples()
+            self._read_merge_table()
+            self._samples = _SampleSequence(
+                self, compact=self._compact_samples)
+            self.__dict__["_sample_indexes"] = None
+            self._check_unique_samples()
         return self._samples
 
 
+    @property
+    def stat_cache(self):
+        """
+        Filesystem stats of this Project's files, each path stat'd just once.
+
+        Samples consult this for existence and size of their input files,
+        so the cached stats hold until explicitly invalidated (see
+        invalidate_files).
+
+        :return StatCache: cache of this Project's filesystem stats
+        """
+        return self._stat_cache
+
+
     @property
     def templates_folder(self):
         """
@@ -964,6 +1290,76 @@ class Project(AttributeDict):
         return config_folder
 
 
+    def check_reads(self, filepath, rlen_sample_size=10):
+        """
+        Sample the reads of a sequencing data file, just once per file.
+
+        :param str filepath: path to BAM or FASTQ file
+        :param int rlen_sample_size: number of reads to examine
+        :return (Mapping[int, int], int): count of examined reads by length,
+            and number of examined reads that are paired
+        :raises Exception: as check_reads does, for the file
+        """
+        key = (filepath, rlen_sample_size)
+        try:
+            features, error = self._read_checks[key]
+        except KeyError:
+            features, error = _attempt(check_reads, *key)
+            self._read_checks[key] = features, error
+        if error is not None:
+            raise error
+        return features
+
+
+    def compile_data_source(self, template):
+        """
+        Parse a data source path template, just once per template.
+
+        A populated template that's a glob pattern is resolved against this
+        Project's cached directory listings.
+
+        :param str template: data source path template, e.g. from this
+            Project's data_sources section
+        :return DataSourceTemplate: the template, with environment
+            variables expanded and its fields determined
+        """
+        try:
+            return self._data_source_templates[template]
+        except KeyError:
+            compiled = self._data_source_templates[template] = \
+                DataSourceTemplate(template, glob_cache=self._glob_cache)
+            return compiled
+
+
+    def invalidate_sample_indexes(self):
+        """
+        Forget the positions of samples by name and protocol.
+
+        Lookups (get_sample, get_samples, samples_by_protocol) rely on these
+        indexes, which aren't updated when a Sample itself is edited, so
+        call this after changing a Sample's sample_name or protocol.
+        """
+        self.__dict__["_sample_indexes"] = None
+
+
+    def invalidate_files(self, paths=None):
+        """
+        Forget what's known about files, e.g. after they've been rewritten.
+
+        :param str | Iterable[str] paths: path(s) to forget (along with
+            listings of their folders); all by default
+        """
+        self._stat_cache.invalidate(paths)
+        if paths is None:
+            self._glob_cache.invalidate()
+            self._read_checks.clear()
+            return
+        paths = {paths} if isinstance(paths, _STRING_TYPES) else set(paths)
+        self._glob_cache.invalidate({_os.path.dirname(p) for p in paths})
+        for key in [k for k in self._read_checks if k[0] in paths]:
+            del self._read_checks[key]
+
+
     def build_sheet(self, *protocols):
         """
         Create all Sample object for this project for the given protocol(s).
@@ -974,19 +1370,11 @@ class Project(AttributeDict):
         """
         # Use all protocols if none are explicitly specified.
         protocols = {alpha_cased(p) for p in (protocols or self.protocols)}
-        include_samples = []
-        for s in self.samples:
-            try:
-                proto = s.protocol
-            except AttributeError:
-                include_samples.append(s)
-                continue
-            check_proto = alpha_cased(proto)
-            if check_proto in protocols:
-                include_samples.append(s)
-            else:
-                _LOGGER.debug("Sample skipped due to protocol ('%s')", proto)
-        return _pd.DataFrame(include_samples)
+        # Samples without a protocol are included regardless.
+        positions = self.sample_indexes.no_protocol + \
+            self._positions_by_protocol(protocols)
+        samples = self.samples
+        return _pd.DataFrame([samples[i] for i in sorted(positions)])
 
 
     def build_submission_bundles(self, protocol, priority=True):
@@ -998,6 +1386,10 @@ class Project(AttributeDict):
         known pipeline locations with a match for the protocol, or whether to
         submit pipelines created from all locations with a match for the
         protocol.
+
+        A protocol's bundles are built just once, until the protocol's
+        interfaces change or they're invalidated, so that repeated calls
+        (e.g., for each group of samples) are just lookups.
         
         :param str protocol: name of the protocol/library for which to
             create pipeline(s)
@@ -1010,23 +1402,85 @@ class Project(AttributeDict):
             those already mapped and those not yet mapped
         """
 
-        if not priority:
-            raise NotImplementedError(
-                "Currently, only prioritized protocol mapping is supported "
-                "(i.e., pipeline interfaces collection is a prioritized list, "
-                "so only the first interface with a protocol match is used.)")
+        bundles, _ = self._submission_jobs(protocol, priority)
+        return list(bundles)
+
+
+    def build_submission_waves(self, protocol, priority=True):
+        """
+        Group a protocol's submission bundles by when their pipelines may run.
+
+        The protocol mapping orders a protocol's pipelines: those separated
+        by a semicolon run serially, and those separated by a comma are
+        independent. Each wave's pipelines depend only on pipelines of
+        earlier waves, so a wave's pipelines may run concurrently, once the
+        previous wave has finished. A pipeline that depends on a pipeline
+        whose script is missing depends instead on that one's upstream.
+
+        :param str protocol: name of the protocol/library for which to
+            create pipeline(s)
+        :param bool priority: to only submit pipeline(s) from the first of the
+            pipelines location(s) (indicated in the project config file) that
+            has a match for the given protocol; optional, default True
+        :return list[list[SubmissionBundle]]: the protocol's submission
+            bundles, in waves ordered by dependency
+        """
+        _, waves = self._submission_jobs(protocol, priority)
+        return [list(wave) for wave in waves]
+
+
+    def invalidate_submission_bundles(self, protocols=None):
+        """
+        Forget submission bundles, e.g. after a pipeline script is added.
+
+        A protocol's bundles are built just once; this is redone
+        automatically if the protocol's interfaces (as in
+        interfaces_by_protocol) change, but a change to an interface itself
+        or to the pipeline scripts requires this invalidation.
+
+        :param str | Iterable[str] protocols: name(s) of protocol(s) for which
+            to forget submission bundles; all by default
+        """
+        if protocols is None:
+            self._submission_bundles.clear()
+            return
+        for protocol in [protocols] if isinstance(protocols, _STRING_TYPES) \
+                else protocols:
+            self._submission_bundles.pop(alpha_cased(protocol), None)
 
-        # Pull out the collection of interfaces (potentially one from each of
-        # the locations indicated in the project configuration file) as a
-        # sort of pool of information about possible ways in which to submit
-        # pipeline(s) for sample(s) of the indicated protocol.
-        try:
-            protocol_interfaces = \
-                    self.interfaces_by_protocol[protocol]
-        except KeyError:
-            # Messaging can be done by the caller.
-            return []
 
+    def prefetch_submission_bundles(self, protocols=None):
+        """
+        Build the submission bundles of several protocols at once.
+
+        :param Iterable[str] protocols: names of protocols for which to build
+            submission bundles; by default, those of this Project's samples
+        :return Mapping[str, Iterable[SubmissionBundle]]: submission bundles
+            by (normalized) protocol name
+        """
+        protocols = self.protocols if protocols is None else protocols
+        return {alpha_cased(p): self.build_submission_bundles(p)
+                for p in protocols if p is not None}
+
+
+    def _build_submission_bundles(
+            self, protocol, protocol_interfaces, priority=True):
+        """
+        Create pipelines to submit for each sample of a particular protocol.
+
+        :param str protocol: (normalized) name of the protocol/library for
+            which to create pipeline(s)
+        :param Iterable[ProtocolInterface] protocol_interfaces: interfaces
+            that map the protocol, in order of priority
+        :param bool priority: to only submit pipeline(s) from the first of the
+            interfaces that has a match for the given protocol
+        :return (list[SubmissionBundle], list[list[SubmissionBundle]]):
+            bundles for the pipelines to submit, and the same bundles in
+            waves ordered by dependency
+        :raises AssertionError: if there's a failure in the attempt to
+            partition an interface's pipeline scripts into disjoint subsets of
+            those already mapped and those not yet mapped
+        """
         job_submission_bundles = []
         pipeline_keys_used = set()
         _LOGGER.debug("Building pipelines for {} PIs...".
@@ -1042,26 +1496,18 @@ class Project(AttributeDict):
             # searching the pool of pipeline interface information once we've
             # found a match for the protocol.
             if priority and len(job_submission_bundles) > 0:
-                return job_submission_bundles[0]
+                break
 
             this_protocol_pipelines = proto_iface.fetch_pipelines(protocol)
             if not this_protocol_pipelines:
                 continue
             
-            # TODO: update once dependency-encoding logic is in place.
-            # The proposed dependency-encoding format uses a semicolon
-            # between pipelines for which the dependency relationship is
-            # serial. For now, simply treat those as multiple independent
-            # pipelines by replacing the semicolon with a comma, which is the
-            # way in which multiple independent pipelines for a single protocol
-            # are represented in the mapping declaration.
-            pipeline_keys = \
-                    this_protocol_pipelines.replace(";", ",")\
-                                           .strip(" ()\n")\
-                                           .split(",")
-            # These cleaned pipeline keys are what's used to resolve the path
-            # to the pipeline to run.
-            pipeline_keys = [pk.strip() for pk in pipeline_keys]
+            # The mapping's semicolons separate pipelines that run serially,
+            # and its commas separate independent pipelines. The cleaned
+            # pipeline keys, in the order mapped, are what's used to resolve
+            # the path to each pipeline to run.
+            job_graph = proto_iface.protomap.build_pipeline(protocol)
+            pipeline_keys = list(job_graph)
 
             # Skip over pipelines already mapped by another location.
             already_mapped, new_scripts = \
@@ -1094,7 +1540,7 @@ class Project(AttributeDict):
 
             # For each pipeline script to which this protocol will pertain,
             # create the new jobs/submission bundles.
-            new_jobs = []
+            new_jobs = _OrderedDict()
             for pipeline_key in new_scripts:
                 # Determine how to reference the pipeline and where it is.
                 strict_pipe_key, full_pipe_path, full_pipe_path_with_flags = \
@@ -1133,16 +1579,242 @@ class Project(AttributeDict):
 
                 # Add this bundle to the collection of ones relevant for the
                 # current ProtocolInterface.
-                new_jobs.append(submission_bundle)
+                new_jobs[pipeline_key] = submission_bundle
 
-            job_submission_bundles.append(new_jobs)
+            job_submission_bundles.append((job_graph, new_jobs))
 
         # Repeat logic check of short-circuit conditional to account for
         # edge case in which it's satisfied during the final iteration.
         if priority and len(job_submission_bundles) > 1:
-            return job_submission_bundles[0]
+            job_submission_bundles = job_submission_bundles[:1]
+
+        # Pipelines already mapped by an earlier location keep their place
+        # in that location's graph.
+        job_graph, jobs = _OrderedDict(), {}
+        for graph, new_jobs in job_submission_bundles:
+            for pipeline_key, deps in graph.items():
+                job_graph.setdefault(pipeline_key, deps)
+            jobs.update(new_jobs)
+        bundles = [b for _, new_jobs in job_submission_bundles
+                   for b in new_jobs.values()]
+        return bundles, _job_waves(job_graph, jobs)
+
+
+    def _submission_jobs(self, protocol, priority=True):
+        """
+        Fetch, building if needed, a protocol's submission bundles and waves.
+
+        :param str protocol: name of the protocol/library for which to
+            create pipeline(s)
+        :param bool priority: to only submit pipeline(s) from the first of the
+            interfaces that has a match for the given protocol
+        :return (list[SubmissionBundle], list[list[SubmissionBundle]]): the
+            protocol's submission bundles, and the same bundles in waves
+        """
+        if not priority:
+            raise NotImplementedError(
+                "Currently, only prioritized protocol mapping is supported "
+                "(i.e., pipeline interfaces collection is a prioritized list, "
+                "so only the first interface with a protocol match is used.)")
+
+        # Pull out the collection of interfaces (potentially one from each of
+        # the locations indicated in the project configuration file) as a
+        # sort of pool of information about possible ways in which to submit
+        # pipeline(s) for sample(s) of the indicated protocol.
+        protocol = alpha_cased(protocol)
+        try:
+            protocol_interfaces = \
+                    self.interfaces_by_protocol[protocol]
+        except KeyError:
+            # Messaging can be done by the caller.
+            return [], []
+
+        # Bundles hold until the protocol's interfaces change.
+        try:
+            known_interfaces, jobs = self._submission_bundles[protocol]
+        except KeyError:
+            pass
+        else:
+            if known_interfaces == list(protocol_interfaces):
+                return jobs
+        jobs = self._build_submission_bundles(protocol, protocol_interfaces)
+        self._submission_bundles[protocol] = (list(protocol_interfaces), jobs)
+        return jobs
+
+
+    def set_read_types(self, samples=None, rlen_sample_size=10,
+                       permissive=True, processes=None):
+        """
+        Set read type and length for the samples that need them, in bulk.
+
+        Each of the samples' NGS input files is checked just once, and the
+        checks are run concurrently (each one stops once enough reads have
+        been examined), before each sample's read attributes are set.
+
+        :param Iterable[Sample] samples: samples for which to set read
+            attributes, optional; by default, this Project's samples. Only
+            those with NGS inputs and without valid read type are affected.
+        :param int rlen_sample_size: number of reads to examine per file
+        :param bool permissive: whether to simply log a warning or error
+            message rather than raising an exception if a sample's file is
+            not found or otherwise cannot be read
+        :param int processes: maximum number of files to check at once,
+            optional; by default, the number of CPUs
+        :return list[Sample]: the samples for which read attributes were set
+        """
+        samples = [s for s in (self.samples if samples is None else samples)
+                   if s.get("ngs_inputs") and s.read_type_unset_reason()]
+        filepaths = {path for s in samples
+                     for path in " ".join(s.ngs_inputs).split(" ")}
+        self._stat_cache.prefetch(filepaths, processes)
+        filepaths = [path for path in sorted(filepaths)
+                     if (path, rlen_sample_size) not in self._read_checks
+                     and self._stat_cache.exists(path)]
+        if filepaths:
+            _LOGGER.debug("Checking reads of %d file(s)", len(filepaths))
+            pool = ThreadPool(processes)
+            try:
+                checks = pool.map(
+                    partial(_attempt, check_reads,
+                            rlen_sample_size=rlen_sample_size), filepaths)
+            finally:
+                pool.close()
+                pool.join()
+            for path, outcome in zip(filepaths, checks):
+                self._read_checks[(path, rlen_sample_size)] = outcome
+        for s in samples:
+            s.set_read_type(
+                rlen_sample_size=rlen_sample_size, permissive=permissive)
+        return samples
+
+
+    def write_sample_files(self, samples=None, subs_folder_path=None,
+                           delimiter="_", processes=None, file_format=None):
+        """
+        Write each of many Samples to its file, in bulk.
+
+        Each Sample's file is as Sample.to_file would write it, but the
+        Project data that the files share are serialized just once, the
+        files are written concurrently (each one atomically), and a file
+        that already holds exactly what would be written is left as it is.
+
+        :param Iterable[Sample] samples: samples to write, optional; by
+            default, this Project's samples
+        :param str subs_folder_path: path to folder in which to place the
+            files, optional; by default, this Project's submission folder
+        :param str delimiter: text to place between the sample name and the
+            suffix within each filename; irrelevant if there's no suffix
+        :param int processes: maximum number of files to write at once,
+            optional; by default, the number of CPUs
+        :param str file_format: name of the format in which to write,
+            optional; by default, the format this Project selects, or else
+            YAML
+        :return list[str]: path to each sample's file
+        """
+        samples = self.samples if samples is None else samples
+        subs_folder_path = subs_folder_path or self.metadata.submission_subdir
+        # Representation, and YAML, of the data of each of the Projects
+        project_serials, project_texts = {}, {}
+
+        def write(sample):
+            sample_format = sample._file_format(file_format)
+            path = sample._set_yaml_file(
+                subs_folder_path=subs_folder_path, delimiter=delimiter,
+                file_format=sample_format)
+            serial = sample._serialize(project_serials)
+            content = sample._render(serial, sample_format, project_texts)
+            if update_file(path, content):
+                _LOGGER.debug("Wrote %s file: '%s'",
+                              sample.__class__.__name__, path)
+            return path
+
+        pool = ThreadPool(processes)
+        try:
+            return pool.map(write, samples)
+        finally:
+            pool.close()
+            pool.join()
+
+
+    def write_submission_scripts(self, jobs, subs_folder_path=None,
+                                 processes=None, template=None):
+        """
+        Write the submission script of each of many jobs, in bulk.
+
+        The submission template is parsed just once, then filled for each
+        job with this Project's compute settings and the job's own values,
+        the latter taking precedence. Scripts are written concurrently (each
+        one atomically), and a script that already holds exactly what would
+        be written is left as it is.
+
+        :param Iterable[Mapping] jobs: values with which to fill the template
+            for each job: its 'jobname' and 'code', and usually its resource
+            package (e.g., 'cores', 'mem', and 'time'); a job's 'logfile' is
+            by default in the submission folder, named for the job
+        :param str subs_folder_path: path to folder in which to place the
+            scripts, optional; by default, this Project's submission folder
+        :param int processes: maximum number of scripts to write at once,
+            optional; by default, the number of CPUs
+        :param str template: path to the submission template, optional; by
+            default, that of this Project's compute settings
+        :return list[str]: path to each job's submission script, in the
+            submission folder and named for the job
+        :raises KeyError: if a job lacks a 'jobname'
+        :raises ValueError: if no template is given and this Project's
+            compute settings lack a submission template
+        """
+        template = self.get_submission_template(template)
+        subs_folder_path = subs_folder_path or self.metadata.submission_subdir
+        if not _os.path.isdir(subs_folder_path):
+            try:
+                _os.makedirs(subs_folder_path)
+            except OSError:
+                if not _os.path.isdir(subs_folder_path):
+                    raise
+        settings = {k: v for k, v in (self.compute or {}).items()
+                    if v is not None}
+
+        def write(job):
+            base = _os.path.join(subs_folder_path, job["jobname"])
+            values = dict(settings, logfile=base + ".log")
+            values.update(job)
+            path = base + ".sub"
+            if update_file(path, template.render(values)):
+                _LOGGER.debug("Wrote submission script: '%s'", path)
+            return path
+
+        pool = ThreadPool(processes)
+        try:
+            return pool.map(write, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+
+    def samples_by_protocol(self, protocols, exclude=False):
+        """
+        Select this Project's Samples by protocol.
+
+        :param Iterable[str] protocols: names of protocols of interest; these
+            are matched with samples' protocols insensitive to case and
+            punctuation
+        :param bool exclude: whether to select the samples of protocols
+            other than those given, rather than those of the given protocols;
+            a sample without a protocol is selected only in this case
+        :return list[Sample]: this Project's samples with protocol of
+            interest, in the same order as in this Project's samples
+        """
+        protocols = {alpha_cased(p) for p in protocols}
+        if exclude:
+            indexes = self.sample_indexes
+            protocols = {alpha_cased(p) for p in indexes.by_protocol} - \
+                protocols
+            positions = indexes.no_protocol + \
+                self._positions_by_protocol(protocols)
         else:
-            return list(itertools.chain(*job_submission_bundles))
+            positions = self._positions_by_protocol(protocols)
+        samples = self.samples
+        return [samples[i] for i in sorted(positions)]
 
 
     def _check_unique_samples(self):
@@ -1151,8 +1823,9 @@ class Project(AttributeDict):
         # a couple of advantages. We get an unbound, isolated method (the
         # Project-external repeat sample name counter), but we can still
         # do this check from the sample builder, yet have it be override-able.
+        # Names come from the sheet so that this needn't build any Sample.
         repeats = {name: n for name, n in Counter(
-                s.name for s in self._samples).items() if n > 1}
+                self.sample_names).items() if n > 1}
         if repeats:
             histogram_text = "\n".join(
                     "{}: {}".format(name, n) for name, n in repeats.items())
@@ -1250,6 +1923,64 @@ class Project(AttributeDict):
             return pipeline_argtext
 
 
+    def get_sample(self, sample_name):
+        """
+        Get an individual Sample by name.
+
+        :param str sample_name: name of the sample to get
+        :return Sample: this Project's (first) Sample with the given name
+        :raises ValueError: if this Project has no sample with the given name
+        """
+        try:
+            position = self.sample_indexes.by_name[sample_name][0]
+        except KeyError:
+            raise ValueError("Project lacks sample '{}'".format(sample_name))
+        return self.samples[position]
+
+
+    def get_samples(self, sample_names):
+        """
+        Get the Samples with particular names.
+
+        :param Iterable[str] sample_names: names of the samples to get
+        :return list[Sample]: this Project's Samples with the given names,
+            in the order in which the names are given
+        :raises ValueError: if this Project lacks a sample with one of the
+            given names
+        """
+        return [self.get_sample(name) for name in sample_names]
+
+
+    def get_submission_template(self, path=None):
+        """
+        Get a submission template, parsed just once per version of its file.
+
+        :param str path: path to the template, optional; by default, the
+            submission template of this Project's compute settings
+        :return SubmissionTemplate: the template in the file
+        :raises ValueError: if no path is given and this Project's compute
+            settings lack a submission template
+        """
+        if path is None:
+            path = (self.compute or {}).get("submission_template")
+            if not path:
+                raise ValueError("{}'s compute settings lack a submission "
+                                 "template".format(self.__class__.__name__))
+        st = _os.stat(path)
+        version = (getattr(st, "st_mtime_ns", st.st_mtime), st.st_size)
+        try:
+            cached_version, template = self._submission_templates[path]
+        except KeyError:
+            pass
+        else:
+            if cached_version == version:
+                return template
+        _LOGGER.debug("Parsing submission template: '%s'", path)
+        template = SubmissionTemplate.from_file(path)
+        self._submission_templates[path] = (version, template)
+        return template
+
+
     def make_project_dirs(self):
         """
         Creates project directory structure if it doesn't exist.
@@ -1267,20 +1998,245 @@ class Project(AttributeDict):
                                  str(e))
 
 
+    def _sheet_determines(self, attr):
+        """
+        Determine whether the annotations sheet alone sets a Sample attribute.
+
+        :param str attr: name of Sample attribute of interest
+        :return bool: whether each Sample's value for the given attribute is
+            as in (or absent from) its annotations sheet row, regardless of
+            Project constants, implied columns, and merge table data
+        """
+        if attr in (self.constants or {}):
+            return False
+        for implied in (self.get("implied_columns") or {}).values():
+            if any(isinstance(cols, Mapping) and attr in cols
+                   for cols in implied.values()):
+                return False
+        return self.merge_table is None or \
+            attr == SAMPLE_NAME_COLNAME or attr not in self.merge_table.columns
+
+
     def _set_basic_samples(self):
         """ Build the base Sample objects from the annotations sheet data. """
 
         # This should be executed just once, establishing the Project's
         # base Sample objects if they don't already exist.
-        if hasattr(self.metadata, "merge_table"):
+        self._read_merge_table()
+
+        # Set samples and handle non-unique names situation.
+        self._samples = _SampleSequence(self, compact=True) \
+            if self._compact_samples else self._prep_samples()
+        self.__dict__["_sample_indexes"] = None
+        self._check_unique_samples()
+
+
+    def _index_samples(self):
+        """
+        Determine the positions of this Project's samples by name and protocol.
+
+        :return SampleIndexes: positions of samples by name and by protocol,
+            and positions of those lacking a protocol
+        """
+        samples = self.samples
+        by_name = defaultdict(list)
+        by_protocol = _OrderedDict()
+        no_protocol = []
+
+        if isinstance(samples, _SampleSequence) and \
+                self._sheet_determines(SAMPLE_NAME_COLNAME) and \
+                self._sheet_determines("protocol"):
+            # Don't build every Sample just to index them.
+            _LOGGER.debug("Indexing samples from annotations sheet")
+            columns = _SampleColumns(self.sheet[[
+                col for col in [SAMPLE_NAME_COLNAME, "library", "protocol"]
+                if col in self.sheet.columns]])
+            names = list(columns.get(SAMPLE_NAME_COLNAME))
+            protocols = list(columns.get("protocol"))
+            # A Sample that's been built may have been edited since.
+            for i, s in samples._samples.items():
+                names[i] = getattr(s, SAMPLE_NAME_COLNAME, _MISSING)
+                protocols[i] = getattr(s, "protocol", _MISSING)
+        else:
+            names, protocols = [], []
+            for s in samples:
+                names.append(getattr(s, SAMPLE_NAME_COLNAME, _MISSING))
+                protocols.append(getattr(s, "protocol", _MISSING))
+
+        for i, (name, protocol) in enumerate(zip(names, protocols)):
+            by_name[name].append(i)
+            if protocol is _MISSING:
+                no_protocol.append(i)
+            else:
+                by_protocol.setdefault(protocol, []).append(i)
+        return SampleIndexes(dict(by_name), by_protocol, no_protocol)
+
+
+    def _positions_by_protocol(self, protocols):
+        """
+        Find positions of samples with particular (alpha-cased) protocols.
+
+        :param Set[str] protocols: alpha-cased names of protocols of interest
+        :return list[int]: positions of samples having one of the protocols
+        """
+        return list(itertools.chain.from_iterable(
+            positions for protocol, positions in
+            self.sample_indexes.by_protocol.items()
+            if alpha_cased(protocol) in protocols))
+
+
+    def _load_snapshot(self, path):
+        """
+        Establish this Project from a snapshot, if it's current.
+
+        :param str path: path to the snapshot file
+        :return bool: whether this Project was established from the snapshot
+        """
+        try:
+            with open(path, 'rb') as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+        except (IOError, OSError):
+            _LOGGER.debug("No project snapshot: '%s'", path)
+            return False
+        except Exception as e:
+            _LOGGER.warn("Ignoring unreadable project snapshot '%s': %s",
+                         path, str(e))
+            return False
+        inputs = snapshot["inputs"]
+        if fingerprint_files(inputs.keys()) != inputs:
+            _LOGGER.debug("Project snapshot is stale: '%s'", path)
+            return False
+
+        _LOGGER.info("Loading project snapshot: '%s'", path)
+        self.__dict__.update(snapshot["state"])
+
+        # Each Sample refers to this Project.
+        def restore(sample_type, sample_state, flags):
+            sample = _rebuild_sample(sample_type, sample_state, flags)
+            sample.__dict__["prj"] = self
+            return sample
+
+        samples = snapshot["samples"]
+        if samples is None:
+            self._samples = None
+        elif isinstance(samples, Mapping):
+            # Lazy sample sequence, with any Samples already built
+            self._samples = _SampleSequence(
+                self, compact=self._compact_samples)
+            self._samples._samples = {
+                i: restore(*s) for i, s in samples.items()}
+        else:
+            self._samples = [restore(*s) for s in samples]
+        self.__dict__["_sample_indexes"] = None
+        return True
+
+
+    def _save_snapshot(self, path, env_files=None):
+        """
+        Write a snapshot of this Project, keyed by its input files.
+
+        :param str path: path to which to write the snapshot
+        :param Iterable[str] env_files: paths to environment settings files
+            used to construct this Project, optional
+        """
+        # Samples are stored without the reference to this Project, so each
+        # may be rebuilt without an attribute lookup on the unpickled object.
+        def sample_state(sample):
+            state = dict(sample._attributes())
+            del state["prj"]
+            flags = {k: getattr(sample, k) for k in ATTRDICT_METADATA}
+            # A view is restored as an ordinary Sample.
+            sample_type = Sample if isinstance(sample, SampleView) \
+                else type(sample)
+            return sample_type, state, flags
+
+        if isinstance(self._samples, _SampleSequence):
+            samples = {i: sample_state(s)
+                       for i, s in self._samples._samples.items()}
+        elif self._samples is None:
+            samples = None
+        else:
+            samples = [sample_state(s) for s in self._samples]
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in ["_samples", "_sample_indexes", "_read_checks",
+                              "_stat_cache", "_glob_cache",
+                              "_data_source_templates",
+                              "_submission_bundles",
+                              "_submission_templates"]}
+        inputs = self._snapshot_inputs() + \
+            [env_file for env_file in env_files or [] if env_file]
+        snapshot = {"inputs": fingerprint_files(inputs),
+                    "state": state, "samples": samples}
+
+        folder = _os.path.dirname(path)
+        temp_path = "{}.{}.tmp".format(path, _os.getpid())
+        try:
+            if not _os.path.isdir(folder):
+                _os.makedirs(folder)
+            with open(temp_path, 'wb') as snapshot_file:
+                pickle.dump(snapshot, snapshot_file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            # Replace any previous snapshot atomically.
+            getattr(_os, "replace", _os.rename)(temp_path, path)
+        except Exception as e:
+            _LOGGER.warn("Could not write project snapshot '%s': %s",
+                         path, str(e))
+            if _os.path.exists(temp_path):
+                _os.remove(temp_path)
+        else:
+            _LOGGER.debug("Wrote project snapshot: '%s'", path)
+
+
+    def _snapshot_inputs(self):
+        """
+        Determine the paths to the files from which this Project is built.
+
+        :return list[str]: paths to configuration, annotations, merge table,
+            pipeline interface, and environment settings files
+        """
+        inputs = [self.config_file, self.environment_file]
+        metadata = self.metadata
+        for section in [SAMPLE_ANNOTATIONS_KEY, "merge_table"]:
+            try:
+                inputs.append(metadata[section])
+            except KeyError:
+                pass
+        for location in metadata.pipelines_dir:
+            inputs.append(location)
+            if _os.path.isdir(location):
+                inputs.extend(_os.path.join(location, "config", filename)
+                              for filename in ["pipeline_interface.yaml",
+                                               "protocol_mappings.yaml"])
+        return [path for path in inputs if isinstance(path, _STRING_TYPES)]
+
+
+    def _snapshot_path(self, cache_folder, config_file, *args):
+        """
+        Determine where to keep a snapshot of a Project.
+
+        :param str cache_folder: folder in which to keep snapshots
+        :param str config_file: path to the Project's configuration file
+        :param Iterable args: the other arguments with which the Project is
+            constructed that affect its content
+        :return str: path to the snapshot file for the Project
+        """
+        key = repr((__version__, SNAPSHOT_FORMAT, self.__class__.__name__,
+                    _os.path.abspath(config_file)) + tuple(args))
+        return _os.path.join(cache_folder, "{}-{}.pickle".format(
+            _os.path.splitext(_os.path.basename(config_file))[0],
+            hashlib.sha1(key.encode("utf-8")).hexdigest()))
+
+
+    def _read_merge_table(self):
+        """ Parse this Project's merge table, if it has one. """
+        if hasattr(self.metadata, "merge_table"):
             if self.merge_table is None:
                 if self.metadata.merge_table and \
                         _os.path.isfile(self.metadata.merge_table):
                     _LOGGER.info("Reading merge table: %s",
                                  self.metadata.merge_table)
-                    self.merge_table = _pd.read_table(
-                        self.metadata.merge_table,
-                        sep=None, engine="python")
+                    self.merge_table = read_table_data(
+                        self.metadata.merge_table)
                     _LOGGER.debug("Merge table shape: {}".
                                   format(self.merge_table.shape))
                 else:
@@ -1292,48 +2248,240 @@ class Project(AttributeDict):
         else:
             _LOGGER.debug("No merge table")
 
-        # Set samples and handle non-unique names situation.
-        self._samples = self._prep_samples()
-        self._check_unique_samples()
-
 
     def _prep_samples(self):
         """
         Merge this Project's Sample object and set file paths.
 
+        Where the Project's configuration permits, the Sample data that
+        don't depend on a merge are established a column at a time over the
+        whole annotations sheet, and each Sample is made from its finished
+        row; otherwise, each Sample is processed individually.
+
         :return list[Sample]: collection of this Project's Sample objects
         """
 
-        samples = []
+        # Group merge table rows by sample just once, rather than scanning
+        # the whole table for each sample.
+        merge_rows = None if self.merge_table is None \
+            else group_merge_table(self.merge_table)
+
+        columns = self._compute_sample_columns(merge_rows)
+        if columns is None:
+            _LOGGER.debug("Preparing each sample individually")
+        rows = _sheet_rows(self.sheet, as_records=columns is not None)
+        return [self._build_sample(row, i, columns, merge_rows)
+                for i, row in enumerate(rows)]
 
-        for _, row in self.sheet.iterrows():
-            sample = Sample(row.dropna(), prj=self)
 
-            # Add values that are constant across this Project's samples.
-            sample = add_project_sample_constants(sample, self)
+    def _build_sample(self, row, row_index, columns=None, merge_rows=None):
+        """
+        Create and finalize the Sample for a single annotations sheet row.
+
+        :param Mapping | pandas.core.series.Series row: the sheet's data for
+            the sample, without null values
+        :param int row_index: position of the row within the sheet
+        :param _SampleColumns columns: sample data established by column,
+            optional; if unavailable, each step is applied to this Sample
+        :param Mapping[str, list[dict]] merge_rows: merge table rows by
+            sample name, optional
+        :return Sample: the sample for the indicated row
+        """
+        sample = Sample(row, prj=self)
+
+        if columns is not None and not columns.merged[row_index]:
+            columns.apply(sample, row_index, columns.touched)
+            sample.derived_cols_done.extend(columns.derived_done[row_index])
+            sample._set_output_paths(self)
+        else:
+            if columns is None:
+                # Add values that are constant across this Project's samples.
+                sample = add_project_sample_constants(sample, self)
 
-            # TODO: use implied_columns in 0.8.
-            sample.set_genome(self.get("genomes"))
-            sample.set_transcriptome(self.get("transcriptomes"))
+                # TODO: use implied_columns in 0.8.
+                sample.set_genome(self.get("genomes"))
+                sample.set_transcriptome(self.get("transcriptomes"))
+            else:
+                # Merged data precede column implication and derivation.
+                columns.apply(sample, row_index, columns.pre_merge)
 
             _LOGGER.debug("Merging sample '%s'", sample.name)
-            merge_sample(sample, self.merge_table,
+            merge_sample(sample, merge_rows,
                          self.data_sources, self.derived_columns)
             _LOGGER.debug("Setting sample file paths")
             sample.set_file_paths(self)
-            # Hack for backwards-compatibility
-            # Pipelines should now use `data_source`)
-            _LOGGER.debug("Setting sample data path")
-            try:
-                sample.data_path = sample.data_source
-            except AttributeError:
-                _LOGGER.log(5, "Sample '%s' lacks data source; skipping "
-                              "data path assignment", sample.sample_name)
-            else:
-                _LOGGER.log(5, "Path to sample data: '%s'", sample.data_source)
-            samples.append(sample)
 
-        return samples
+        _LOGGER.log(5, "Setting sample data path")
+        for name, value in _legacy_attributes(sample).items():
+            setattr(sample, name, value)
+        return sample
+
+
+    def _compute_sample_columns(self, merge_rows=None, sheet=None):
+        """
+        Establish Sample data a column at a time, where that's equivalent.
+
+        Project constants, genome and transcriptome assemblies, implied
+        columns, and derived data source paths are resolved for all of the
+        annotations sheet's rows at once, looking up each distinct value just
+        once. Samples with merge table rows are left to be finished
+        individually, as their merged data precede column implication and
+        derivation.
+
+        :param Mapping[str, list[dict]] merge_rows: merge table rows by
+            sample name, optional
+        :param pandas.core.frame.DataFrame sheet: annotations for the samples
+            of interest, optional; by default, this Project's whole sheet
+        :return _SampleColumns | NoneType: sample data by column, or null if
+            this Project's configuration requires that each Sample be
+            processed individually
+        """
+
+        if sheet is None:
+            sheet = self.sheet
+        if sheet is None:
+            return None
+        if sheet.columns.duplicated().any() or \
+                SAMPLE_INTERNAL_ATTRS.intersection(sheet.columns):
+            return None
+        columns = _SampleColumns(sheet)
+        num_rows = columns.num_rows
+
+        def unavailable(attr):
+            # Attributes that can't be determined from column data alone.
+            return attr in SAMPLE_INTERNAL_ATTRS or hasattr(Sample, attr)
+
+        # Constants
+        constants = self.constants or {}
+        if any(isinstance(v, Mapping) for v in constants.values()):
+            return None
+        for attr, value in constants.items():
+            columns.assign(attr, [value] * num_rows)
+
+        # Genome and transcriptome, by organism
+        for ome, assemblies in [("genome", self.get("genomes")),
+                                ("transcriptome", self.get("transcriptomes"))]:
+            if not assemblies:
+                continue
+            assembly_by_organism = {_MISSING: None}
+            assemblies_column = []
+            for organism in columns.get("organism"):
+                try:
+                    assembly = assembly_by_organism[organism]
+                except TypeError:
+                    # Unhashable organism
+                    return None
+                except KeyError:
+                    try:
+                        assembly = assemblies[organism]
+                    except KeyError:
+                        assembly = None
+                    if isinstance(assembly, Mapping):
+                        return None
+                    assembly_by_organism[organism] = assembly
+                assemblies_column.append(assembly)
+            columns.assign(ome, assemblies_column)
+
+        columns.pre_merge = list(columns.touched)
+        columns.merged = [bool(merge_rows) and name in merge_rows
+                          for name in columns.get(SAMPLE_NAME_COLNAME)]
+        unmerged = [i for i, merged in enumerate(columns.merged)
+                    if not merged]
+
+        # Implied columns
+        for implier_name, implied in \
+                (self.get("implied_columns") or {}).items():
+            if unavailable(implier_name):
+                return None
+            implications_by_value = {}
+            implications = [None] * num_rows
+            implier_values = columns.get(implier_name)
+            for i in unmerged:
+                implier_value = implier_values[i]
+                if implier_value is _MISSING:
+                    continue
+                try:
+                    implications[i] = implications_by_value[implier_value]
+                except TypeError:
+                    # Unhashable implier value
+                    return None
+                except KeyError:
+                    try:
+                        implied_value_by_column = \
+                            _OrderedDict(implied[implier_value].items())
+                    except KeyError:
+                        implied_value_by_column = None
+                    except AttributeError:
+                        # Leave the error to individual processing.
+                        return None
+                    implications_by_value[implier_value] = \
+                        implied_value_by_column
+                    implications[i] = implied_value_by_column
+            implied_colnames = []
+            for implied_value_by_column in implications_by_value.values():
+                if implied_value_by_column is None:
+                    continue
+                for colname, implied_value in implied_value_by_column.items():
+                    if isinstance(implied_value, Mapping):
+                        return None
+                    if colname not in implied_colnames:
+                        implied_colnames.append(colname)
+            for colname in implied_colnames:
+                columns.assign(colname, [
+                    _MISSING if not implied_value_by_column or
+                    colname not in implied_value_by_column
+                    else implied_value_by_column[colname]
+                    for implied_value_by_column in implications])
+
+        # Derived columns
+        data_sources = self.get(DATA_SOURCES_SECTION)
+        source_templates = {}
+        for col in self.get("derived_columns", []):
+            if unavailable(col):
+                return None
+            source_keys = columns.get(col)
+            targets = [i for i in unmerged if source_keys[i] is not _MISSING
+                       and col not in columns.derived_done[i]]
+            if not targets:
+                continue
+            _LOGGER.debug("Deriving column '%s' for %d sample(s)",
+                          col, len(targets))
+            # Set a variable called {col}_key, so the
+            # original source can also be retrieved.
+            keys = [_MISSING] * num_rows
+            for i in targets:
+                keys[i] = source_keys[i]
+            columns.assign(col + COL_KEY_SUFFIX, keys)
+            filepaths = [_MISSING] * num_rows
+            for i in targets:
+                columns.derived_done[i].append(col)
+                if not data_sources:
+                    continue
+                source_key = source_keys[i]
+                try:
+                    template = source_templates[source_key]
+                except KeyError:
+                    try:
+                        template = self.compile_data_source(
+                                data_sources[source_key])
+                    except KeyError:
+                        template = None
+                    source_templates[source_key] = template
+                except TypeError:
+                    # Unhashable source key
+                    return None
+                if template is None:
+                    continue
+                if SAMPLE_INTERNAL_ATTRS.intersection(template.fields):
+                    return None
+                filepath = columns.format(template, i)
+                if filepath:
+                    filepaths[i] = filepath
+            columns.assign(col, filepaths)
+
+        if SAMPLE_INTERNAL_ATTRS.intersection(columns.touched):
+            return None
+        return columns
 
 
     def parse_config_file(self, subproject=None):
@@ -1638,12 +2786,18 @@ class Sample(AttributeDict):
             data["protocol"] = protocol
         super(Sample, self).__init__(entries=data)
 
-        self.prj = prj
+        # Keep a reference to an actual Project; since a Project is itself a
+        # Mapping, ordinary assignment would store a (costly) copy of it.
+        # Anything else is regarded as Project data, as an AttributeDict.
+        if isinstance(prj, Project):
+            self.__dict__["prj"] = prj
+        else:
+            self.prj = AttributeDict(prj or dict())
         self.merged_cols = {}
         self.derived_cols_done = []
 
         if isinstance(series, _pd.Series):
-            series = series.to_dict()
+            series = _OrderedDict(series.items())
         elif isinstance(series, Sample):
             series = series.as_series().to_dict()
 
@@ -1651,11 +2805,7 @@ class Sample(AttributeDict):
         # so we can create a minimal, ordered representation of the original.
         # This allows summarization of the sample (i.e.,
         # appending new columns onto the original table)
-        self.sheet_attributes = series.keys()
-
-        # Ensure Project reference is actual Project or AttributeDict.
-        if not isinstance(self.prj, Project):
-            self.prj = AttributeDict(self.prj or dict())
+        self.sheet_attributes = list(series.keys())
 
         # Check if required attributes exist and are not empty.
         missing_attributes_message = self.check_valid()
@@ -1683,7 +2833,7 @@ class Sample(AttributeDict):
 
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return self._attributes() == other._attributes()
 
 
     def __ne__(self, other):
@@ -1712,8 +2862,8 @@ class Sample(AttributeDict):
             of this Sample, with its attributes.
         """
         # Note that this preserves metadata, but it could be excluded
-        # with self.items() rather than self.__dict__.
-        return _pd.Series(self.__dict__)
+        # with self.items() rather than self._attributes().
+        return _pd.Series(self._attributes())
 
 
     def check_valid(self, required=None):
@@ -1786,12 +2936,13 @@ class Sample(AttributeDict):
 
         # Second, files
         missing_files = []
+        stat_cache = self._stat_cache()
         for paths in self.required_inputs:
             _LOGGER.log(5, "Text to split and check paths: '%s'", paths)
             # There can be multiple, space-separated values here.
             for path in paths.split(" "):
                 _LOGGER.log(5, "Checking path: '{}'".format(path))
-                if not _os.path.exists(path):
+                if not stat_cache.exists(path):
                     _LOGGER.log(5, "Missing required input file: '{}'".
                                   format(path))
                     missing_files.append(path)
@@ -1804,7 +2955,7 @@ class Sample(AttributeDict):
             return IOError, reason_key, reason_detail
 
 
-    def generate_filename(self, delimiter="_"):
+    def generate_filename(self, delimiter="_", file_format=None):
         """
         Create a name for file in which to represent this Sample.
 
@@ -1815,11 +2966,15 @@ class Sample(AttributeDict):
 
         :param str delimiter: what to place between sample name and name of
             subtype; this is only relevant if the instance is of a subclass
+        :param str file_format: name of the format of the file, which
+            determines its extension, optional; by default, the format
+            selected by this Sample's Project, or else YAML
         :return str: name for file with which to represent this Sample on disk
         """
-        base = self.name if type(self) is Sample else \
+        # A view of a Sample's row is named as the Sample itself would be.
+        base = self.name if type(self) in (Sample, SampleView) else \
             "{}{}{}".format(self.name, delimiter, self.__class__.__name__)
-        return "{}.yaml".format(base)
+        return base + SAMPLE_FILE_FORMATS[self._file_format(file_format)]
 
 
     def generate_name(self):
@@ -1988,30 +3143,23 @@ class Sample(AttributeDict):
                     self.name, source_key, column_name, data_sources.keys()))
             return ""
 
-        # Populate any environment variables like $VAR with os.environ["VAR"]
-        regex = _os.path.expandvars(regex)
-
-        try:
-            # Grab a temporary dictionary of sample attributes and update these
-            # with any provided extra variables to use in the replacement.
-            # This is necessary for derived_columns in the merge table.
-            # Here the copy() prevents the actual sample from being
-            # updated by update().
-            temp_dict = self.__dict__.copy()
-            temp_dict.update(extra_vars or dict())
-            val = regex.format(**temp_dict)
-            if '*' in val or '[' in val:
-                _LOGGER.debug("Pre-glob: %s", val)
-                val_globbed = sorted(glob.glob(val))
-                val = " ".join(val_globbed) or val
-                _LOGGER.debug("Post-glob: %s", val)
-
-        except Exception as e:
-            _LOGGER.error("Can't format data source correctly: %s", regex)
-            _LOGGER.error(str(type(e).__name__) + str(e))
-            return regex
-
-        return val
+        # The Project parses each template (and populates any environment
+        # variables like $VAR with os.environ["VAR"]) just once.
+        template = self.prj.compile_data_source(regex) \
+            if isinstance(self.prj, Project) else DataSourceTemplate(regex)
+
+        # Collect just the values of the template's fields, from any
+        # provided extra variables, or else the sample's own attributes.
+        # Extra variables are necessary for derived_columns in the merge table.
+        extra_vars = extra_vars or dict()
+        attributes = self._attributes()
+        values = {}
+        for field in template.fields:
+            if field in extra_vars:
+                values[field] = extra_vars[field]
+            elif field in attributes:
+                values[field] = attributes[field]
+        return template.populate(values)
 
 
     def make_sample_dirs(self):
@@ -2073,21 +3221,19 @@ class Sample(AttributeDict):
 
             self.derived_cols_done.append(col)
 
-        # Parent
-        self.results_subdir = project.metadata.results_subdir
-        self.paths.sample_root = sample_folder(project, self)
+        self._set_output_paths(project)
 
-        # Track url
-        bigwig_filename = self.name + ".bigWig"
-        try:
-            # Project's public_html folder
-            self.bigwig = _os.path.join(
-                    project.trackhubs.trackhub_dir, bigwig_filename)
-            self.track_url = \
-                    "{}/{}".format(project.trackhubs.url, bigwig_filename)
-        except:
-            _LOGGER.debug("No trackhub/URL")
-            pass
+
+    def _set_output_paths(self, project):
+        """
+        Set the paths for this sample's output, relative to its Project.
+
+        :param AttributeDict project: object with pointers to data paths and
+            such, either full Project or AttributeDict with sufficient data
+        """
+        for name, value in _output_attributes(project, self.name).items():
+            setattr(self, name, value)
+        self.paths.sample_root = sample_folder(project, self)
 
     
     def set_genome(self, genomes):
@@ -2125,6 +3271,26 @@ class Sample(AttributeDict):
         _LOGGER.log(5, "Setting {} as {} on sample: '{}'".
                 format(assembly, ome, self.name))
         setattr(self, ome, assembly)
+
+
+    def _attributes(self):
+        """
+        Map each of this Sample's attribute names to its value.
+
+        :return Mapping[str, object]: this Sample's data, by attribute name
+        """
+        return _without_metadata(self.__dict__)
+
+
+    def _stat_cache(self):
+        """
+        Provide a cache of filesystem stats for this Sample's files.
+
+        :return StatCache: this Sample's Project's stat cache, or a
+            fresh one if this Sample's not tied to a Project
+        """
+        return self.prj.stat_cache if isinstance(self.prj, Project) \
+            else StatCache()
         
 
     def set_pipeline_attributes(
@@ -2172,16 +3338,8 @@ class Sample(AttributeDict):
             # read_type, read_length, paired.
             self.ngs_inputs = self.get_attr_values("ngs_inputs_attr")
 
-            set_rtype = False
-            if not hasattr(self, "read_type"):
-                set_rtype_reason = "read_type not yet set"
-                set_rtype = True
-            elif not self.read_type or self.read_type.lower() \
-                    not in VALID_READ_TYPES:
-                set_rtype_reason = "current read_type is invalid: '{}'".\
-                        format(self.read_type)
-                set_rtype = True
-            if set_rtype:
+            set_rtype_reason = self.read_type_unset_reason()
+            if set_rtype_reason:
                 _LOGGER.debug(
                         "Setting read_type for %s '%s': %s",
                         self.__class__.__name__, self.name, set_rtype_reason)
@@ -2196,7 +3354,23 @@ class Sample(AttributeDict):
         self.required_inputs = self.get_attr_values(REQUIRED_INPUTS_ATTR_NAME)
         self.all_inputs = self.get_attr_values(ALL_INPUTS_ATTR_NAME)
         _LOGGER.debug("All '{}' inputs: {}".format(self.name, self.all_inputs))
-        self.input_file_size = get_file_size(self.all_inputs)
+        self.input_file_size = get_file_size(
+                self.all_inputs, stat_cache=self._stat_cache())
+
+
+    def read_type_unset_reason(self):
+        """
+        Determine why, if at all, this Sample's read type should be set.
+
+        :return str | NoneType: reason for which read type should be set,
+            null if this Sample already has a valid read type
+        """
+        if not hasattr(self, "read_type"):
+            return "read_type not yet set"
+        elif not self.read_type or self.read_type.lower() \
+                not in VALID_READ_TYPES:
+            return "current read_type is invalid: '{}'".format(self.read_type)
+        return None
 
 
     def set_read_type(self, rlen_sample_size=10, permissive=True):
@@ -2231,8 +3405,9 @@ class Sample(AttributeDict):
         # Determine extant/missing filepaths.
         existing_files = list()
         missing_files = list()
+        stat_cache = self._stat_cache()
         for path in ngs_paths.split(" "):
-            if not _os.path.exists(path):
+            if not stat_cache.exists(path):
                 missing_files.append(path)
             else:
                 existing_files.append(path)
@@ -2242,16 +3417,17 @@ class Sample(AttributeDict):
                       format(len(missing_files), missing_files))
 
         # For samples with multiple original BAM files, check all.
+        # A Project checks each file just once, perhaps in bulk beforehand.
         files = list()
-        check_by_ftype = {"bam": check_bam, "fastq": check_fastq}
+        reads_checker = self.prj.check_reads \
+            if isinstance(self.prj, Project) else check_reads
         for input_file in existing_files:
             try:
-                file_type = parse_ftype(input_file)
-                read_lengths, paired = check_by_ftype[file_type](
+                read_lengths, paired = reads_checker(
                         input_file, rlen_sample_size)
             except (KeyError, TypeError):
                 message = "Input file type should be one of: {}".format(
-                        check_by_ftype.keys())
+                        ["bam", "fastq"])
                 if not permissive:
                     raise TypeError(message)
                 _LOGGER.error(message)
@@ -2259,7 +3435,7 @@ class Sample(AttributeDict):
             except NotImplementedError as e:
                 if not permissive:
                     raise
-                _LOGGER.warn(e.message)
+                _LOGGER.warn(str(e))
                 return
             except IOError:
                 if not permissive:
@@ -2277,6 +3453,12 @@ class Sample(AttributeDict):
                         setattr(self, feat_name, None)
                 return
 
+            # A file may be too short to have any reads to examine.
+            if not read_lengths:
+                _LOGGER.warn("No reads found in input file, so read type "
+                             "and length are not set: %s", input_file)
+                return
+
             # Determine most frequent read length among sample.
             rlen, _ = sorted(read_lengths.items(), key=itemgetter(1))[-1]
             _LOGGER.log(5,
@@ -2330,6 +3512,120 @@ class Sample(AttributeDict):
             parent directory is provided.
         """
 
+        return self.to_file(path, subs_folder_path, delimiter, "yaml")
+
+
+    def to_json(self, path=None, subs_folder_path=None, delimiter="_"):
+        """
+        Serializes itself in JSON format, which is much faster to parse.
+
+        :param str path: A file path to write JSON to; provide this or
+            the subs_folder_path
+        :param str subs_folder_path: path to folder in which to place file
+            that's being written; provide this or a full filepath
+        :param str delimiter: text to place between the sample name and the
+            suffix within the filename; irrelevant if there's no suffix
+        :return str: filepath used (same as input if given, otherwise the
+            path value that was inferred)
+        :raises ValueError: if neither full filepath nor path to extant
+            parent directory is provided.
+        """
+        return self.to_file(path, subs_folder_path, delimiter, "json")
+
+
+    def to_msgpack(self, path=None, subs_folder_path=None, delimiter="_"):
+        """
+        Serializes itself in msgpack (binary) format, which requires msgpack.
+
+        :param str path: A file path to write to; provide this or
+            the subs_folder_path
+        :param str subs_folder_path: path to folder in which to place file
+            that's being written; provide this or a full filepath
+        :param str delimiter: text to place between the sample name and the
+            suffix within the filename; irrelevant if there's no suffix
+        :return str: filepath used (same as input if given, otherwise the
+            path value that was inferred)
+        :raises ValueError: if neither full filepath nor path to extant
+            parent directory is provided.
+        """
+        return self.to_file(path, subs_folder_path, delimiter, "msgpack")
+
+
+    def to_file(self, path=None, subs_folder_path=None, delimiter="_",
+                file_format=None):
+        """
+        Serializes itself, in a particular format.
+
+        Whatever the format, the file holds the same data, and load_sample
+        rebuilds the Sample from it. The path is stored as the Sample's
+        yaml_file, the attribute by which pipelines know of a Sample's file.
+
+        :param str path: A file path to write to; provide this or
+            the subs_folder_path
+        :param str subs_folder_path: path to folder in which to place file
+            that's being written; provide this or a full filepath
+        :param str delimiter: text to place between the sample name and the
+            suffix within the filename; irrelevant if there's no suffix
+        :param str file_format: name of the format in which to write, one of
+            SAMPLE_FILE_FORMATS, optional; by default, the format selected
+            by this Sample's Project, or else YAML
+        :return str: filepath used (same as input if given, otherwise the
+            path value that was inferred)
+        :raises ValueError: if neither full filepath nor path to extant
+            parent directory is provided, or the format is unknown.
+        """
+        file_format = self._file_format(file_format)
+        path = self._set_yaml_file(
+            path, subs_folder_path, delimiter, file_format)
+        serial = self._serialize()
+        _LOGGER.debug("Generating %s data for %s: '%s'", file_format,
+                      self.__class__.__name__, self.name)
+        content = self._render(serial, file_format)
+        with open(path, 'wb' if isinstance(content, bytes) else 'w') \
+                as outfile:
+            outfile.write(content)
+        return path
+
+
+    def _file_format(self, file_format=None):
+        """
+        Determine the format in which to write this Sample.
+
+        :param str file_format: name of the format requested, optional
+        :return str: name of the requested format, or if none, of the format
+            selected by this Sample's Project, or else of YAML
+        :raises ValueError: if the format is unknown
+        """
+        if not file_format:
+            try:
+                file_format = self.prj.get(SAMPLE_FILE_FORMAT_KEY)
+            except AttributeError:
+                file_format = None
+            file_format = file_format or "yaml"
+        if file_format not in SAMPLE_FILE_FORMATS:
+            raise ValueError("Unknown {} file format: '{}'; known: {}".format(
+                self.__class__.__name__, file_format,
+                ", ".join(SAMPLE_FILE_FORMATS)))
+        return file_format
+
+
+    def _set_yaml_file(self, path=None, subs_folder_path=None, delimiter="_",
+                       file_format=None):
+        """
+        Determine and set the path to the file to which to write this Sample.
+
+        :param str path: A file path to write yaml to; provide this or
+            the subs_folder_path
+        :param str subs_folder_path: path to folder in which to place file
+            that's being written; provide this or a full filepath
+        :param str delimiter: text to place between the sample name and the
+            suffix within the filename; irrelevant if there's no suffix
+        :param str file_format: name of the format of the file, optional
+        :return str: filepath used (same as input if given, otherwise the
+            path value that was inferred)
+        :raises ValueError: if neither full filepath nor path to extant
+            parent directory is provided.
+        """
         # Determine filepath, prioritizing anything given, then falling
         # back to a default using this Sample's Project's submission_subdir.
         # Use the sample name and YAML extension as the file name,
@@ -2343,13 +3639,26 @@ class Sample(AttributeDict):
                     format(self.__class__.__name__))
             _LOGGER.debug("Creating filename for %s: '%s'",
                           self.__class__.__name__, self.name)
-            filename = self.generate_filename(delimiter=delimiter)
+            filename = self.generate_filename(
+                delimiter=delimiter, file_format=file_format)
             _LOGGER.debug("Filename: '%s'", filename)
             path = _os.path.join(subs_folder_path, filename)
 
         _LOGGER.debug("Setting %s filepath: '%s'",
                       self.__class__.__name__, path)
         self.yaml_file = path
+        return path
+
+
+    def _serialize(self, project_serials=None):
+        """
+        Represent this Sample with just mappings, lists, and scalars.
+
+        :param dict project_serials: representation of each Project's data
+            by the Project's id, optional; it's consulted and updated so that
+            Samples of the same Project can share the representation
+        :return dict: representation of this Sample, as written to YAML
+        """
 
         def _is_project(obj, name=None):
             """ Determine if item to prep for disk is Sample's project. """
@@ -2368,18 +3677,29 @@ class Sample(AttributeDict):
             if name:
                 _LOGGER.log(5, "Converting to dict: '{}'".format(name))
             if _is_project(obj, name):
+                if project_serials is not None and \
+                        id(obj) in project_serials:
+                    return project_serials[id(obj)]
                 _LOGGER.debug("Attempting to store %s's project metadata",
                               self.__class__.__name__)
                 prj_data = grab_project_data(obj)
                 _LOGGER.debug("Sample's project data: {}".format(prj_data))
-                return {k: obj2dict(v, name=k) for k, v in prj_data.items()}
+                prj_serial = {k: obj2dict(v, name=k)
+                              for k, v in prj_data.items()}
+                if project_serials is not None:
+                    project_serials[id(obj)] = prj_serial
+                return prj_serial
             if isinstance(obj, list):
                 return [obj2dict(i) for i in obj]
             if isinstance(obj, AttributeDict):
-                return {k: obj2dict(v, name=k) for k, v in obj.__dict__.items()
-                        if k not in to_skip and
-                        (k not in ATTRDICT_METADATA or
-                         v != ATTRDICT_METADATA[k])}
+                attributes = obj._attributes() if isinstance(obj, Sample) \
+                    else obj.__dict__
+                data = {k: obj2dict(v, name=k)
+                        for k, v in attributes.items() if k not in to_skip}
+                data.update({k: getattr(obj, k)
+                             for k, v in ATTRDICT_METADATA.items()
+                             if k not in to_skip and getattr(obj, k) != v})
+                return data
             elif isinstance(obj, Mapping):
                 return {k: obj2dict(v, name=k)
                         for k, v in obj.items() if k not in to_skip}
@@ -2425,16 +3745,64 @@ class Sample(AttributeDict):
             _LOGGER.debug("Added %s metadata to serialized %s",
                           Project.__class__.__name__, self.__class__.__name__)
         """
+        return serial
 
-        with open(self.yaml_file, 'w') as outfile:
-            _LOGGER.debug("Generating YAML data for %s: '%s'",
-                          self.__class__.__name__, self.name)
+
+    @classmethod
+    def _render(cls, serial, file_format="yaml", project_texts=None):
+        """
+        Render a serialized Sample in a particular format.
+
+        :param dict serial: representation of a Sample
+        :param str file_format: name of the format in which to render
+        :param dict project_texts: YAML for each Project's data, by the id
+            of the data's representation, optional; see _yaml_text
+        :return str | bytes: text, or for a binary format, the bytes, that
+            represent the Sample
+        """
+        if file_format == "json":
+            return json.dumps(serial, sort_keys=True)
+        if file_format == "msgpack":
+            if msgpack is None:
+                raise ImportError("Writing a {} as msgpack requires msgpack".
+                                  format(cls.__name__))
+            return msgpack.packb(serial, use_bin_type=True)
+        return cls._yaml_text(serial, project_texts)
+
+
+    @staticmethod
+    def _yaml_text(serial, project_texts=None):
+        """
+        Render a serialized Sample as YAML.
+
+        :param dict serial: representation of a Sample
+        :param dict project_texts: YAML for each Project's data, by the id
+            of the data's representation, optional; it's consulted and
+            updated so that the representation that Samples share (and that
+            persists meanwhile) is rendered just once
+        :return str: YAML text for the Sample
+        """
+        def dump(data):
             try:
-                yaml_data = yaml.safe_dump(serial, default_flow_style=False)
+                return yaml.dump(data, Dumper=_YAML_DUMPER,
+                                 default_flow_style=False)
             except yaml.representer.RepresenterError:
                 _LOGGER.error("SERIALIZED SAMPLE DATA: {}".format(serial))
                 raise
-            outfile.write(yaml_data)
+
+        prj_serial = serial.get("prj")
+        if project_texts is None or not isinstance(prj_serial, Mapping):
+            return dump(serial)
+        try:
+            prj_text = project_texts[id(prj_serial)]
+        except KeyError:
+            prj_text = dump({"prj": prj_serial})
+            project_texts[id(prj_serial)] = prj_text
+        # The Project's data are a top-level entry, so the rendering of the
+        # rest of the Sample is unaffected by what's there.
+        placeholder = "prj: {}\n".format(_PROJECT_PLACEHOLDER)
+        return dump(dict(serial, prj=_PROJECT_PLACEHOLDER)).replace(
+            placeholder, prj_text, 1)
 
 
     def update(self, newdata):
@@ -2446,47 +3814,195 @@ class Sample(AttributeDict):
 
 
 
-@copy
-class PipelineInterface(object):
+class SampleView(Sample):
     """
-    This class parses, holds, and returns information for a yaml file that
-    specifies how to interact with each individual pipeline. This
-    includes both resources to request for cluster job submission, as well as
-    arguments to be passed from the sample annotation metadata to the pipeline
+    Sample that's a view of one row of its Project's table of sample data.
 
-    :param config: path to file from which to parse configuration data,
-        or pre-parsed configuration data.
-    :type config: str | Mapping
+    The row's values, and those shared by all of the table's samples, are
+    read from the table; only what's set on (or first requested of, in the
+    case of a mutable per-sample value, like paths) the instance itself is
+    stored with it, taking precedence over the table's values.
 
+    :param _SampleTable table: sample data by column
+    :param int row: position of this Sample's row within the table
     """
-    def __init__(self, config):
-        if isinstance(config, Mapping):
-            # Unified pipeline_interface.yaml file (protocol mappings
-            # and the actual pipeline interface data)
-            _LOGGER.debug("Creating %s with preparsed data",
-                         self.__class__.__name__)
-            self.pipe_iface_file = None
-            self.pipe_iface_config = config
-
-        else:
-            # More likely old-style, with protocol_mapping in its own file,
-            # separate from the actual pipeline interface data
-            _LOGGER.debug("Parsing '%s' for PipelineInterface config data",
-                         config)
-            self.pipe_iface_file = config
-            with open(config, 'r') as f:
-                self.pipe_iface_config = yaml.load(f)
 
-        # Ensure that each pipeline path, if provided, is expanded.
-        self._expand_paths()
+    __slots__ = ("_table", "_row", "_hidden")
 
+    def __init__(self, table, row):
+        AttributeDict.__init__(self)
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+        # Names of the table's values that have been deleted for this Sample
+        object.__setattr__(self, "_hidden", None)
 
-    def __getitem__(self, item):
-        try:
-            return self._select_pipeline(item)
-        except _MissingPipelineConfigurationException:
-            raise KeyError("{} is not a known pipeline; known: {}".
-                           format(item, self.pipe_iface_config.keys()))
+
+    def __getattr__(self, item, default=None):
+        if item in SampleView.__slots__:
+            # Unset slot, e.g. on an instance that's bypassed initialization
+            raise AttributeError(item)
+        hidden = self._hidden
+        if not hidden or item not in hidden:
+            table, row = self._table, self._row
+            column = table.data.get(item)
+            if column is not None:
+                value = column[row]
+                if value is not _MISSING:
+                    return value
+            elif item in table.constants:
+                return table.constants[item]
+            elif item in table.factories:
+                # A mutable value is made for this Sample when first needed.
+                value = getattr(table, table.factories[item])(row)
+                self.__dict__[item] = value
+                return value
+        return super(SampleView, self).__getattr__(item, default)
+
+
+    def __setitem__(self, key, value):
+        hidden = self._hidden
+        if hidden and key in hidden:
+            hidden.discard(key)
+        elif value is None and not self._force_nulls and \
+                key not in self.__dict__ and self._shows(key):
+            # As for any Sample, a null doesn't squash an existing value.
+            return
+        super(SampleView, self).__setitem__(key, value)
+
+
+    def __delitem__(self, item):
+        if item in ATTRDICT_METADATA:
+            raise _MetadataOperationException(self, item)
+        shown = self._shows(item)
+        if self.__dict__.pop(item, _MISSING) is _MISSING and not shown:
+            _LOGGER.debug("No item {} to delete".format(item))
+        if shown:
+            if self._hidden is None:
+                object.__setattr__(self, "_hidden", set())
+            self._hidden.add(item)
+
+
+    def __delattr__(self, item):
+        if item not in self.__dict__ and not self._shows(item):
+            raise AttributeError(item)
+        self.__delitem__(item)
+
+
+    def __contains__(self, item):
+        try:
+            if item in self.__dict__ or self._shows(item):
+                return True
+        except TypeError:
+            return False
+        return super(SampleView, self).__contains__(item)
+
+
+    def __iter__(self):
+        return iter(self._attributes())
+
+
+    def __len__(self):
+        return len(self._attributes())
+
+
+    def __repr__(self):
+        return repr({k: v for k, v in self._attributes().items()
+                     if include_in_repr(k, klazz=Sample)})
+
+
+    def __reduce_ex__(self, protocol):
+        # A copy, or a pickled view, is an ordinary Sample.
+        flags = {k: getattr(self, k) for k in ATTRDICT_METADATA}
+        return _rebuild_sample, (Sample, dict(self._attributes()), flags)
+
+
+    def _attributes(self):
+        """
+        Map each of this Sample's attribute names to its value.
+
+        :return Mapping[str, object]: this Sample's data, by attribute name
+        """
+        table, row, hidden = self._table, self._row, self._hidden or ()
+        attributes = {}
+        for name, column in table.data.items():
+            value = column[row]
+            if value is not _MISSING:
+                attributes[name] = value
+        attributes.update(table.constants)
+        for name in table.factories:
+            if name not in self.__dict__ and name not in hidden:
+                # Establish the value, so that it's the same on each request.
+                getattr(self, name)
+        for name in hidden:
+            attributes.pop(name, None)
+        attributes.update(_without_metadata(self.__dict__))
+        return attributes
+
+
+    def _shows(self, name):
+        """
+        Determine whether this Sample has a value from its table.
+
+        :param str name: name of the attribute of interest
+        :return bool: whether this Sample has a value for the attribute from
+            its table, rather than set on the instance itself
+        """
+        if self._hidden and name in self._hidden:
+            return False
+        table = self._table
+        column = table.data.get(name)
+        if column is not None:
+            return column[self._row] is not _MISSING
+        return name in table.constants or name in table.factories
+
+
+
+@copy
+class PipelineInterface(object):
+    """
+    This class parses, holds, and returns information for a yaml file that
+    specifies how to interact with each individual pipeline. This
+    includes both resources to request for cluster job submission, as well as
+    arguments to be passed from the sample annotation metadata to the pipeline
+
+    :param config: path to file from which to parse configuration data,
+        or pre-parsed configuration data.
+    :type config: str | Mapping
+
+    """
+    def __init__(self, config):
+        if isinstance(config, Mapping):
+            # Unified pipeline_interface.yaml file (protocol mappings
+            # and the actual pipeline interface data)
+            _LOGGER.debug("Creating %s with preparsed data",
+                         self.__class__.__name__)
+            self.pipe_iface_file = None
+            self.pipe_iface_config = config
+
+        else:
+            # More likely old-style, with protocol_mapping in its own file,
+            # separate from the actual pipeline interface data
+            _LOGGER.debug("Parsing '%s' for PipelineInterface config data",
+                         config)
+            self.pipe_iface_file = config
+            with open(config, 'r') as f:
+                self.pipe_iface_config = yaml.load(f)
+
+        # Ensure that each pipeline path, if provided, is expanded.
+        self._expand_paths()
+
+        # Resource packages of each pipeline, ordered by minimum file size
+        self._resource_selectors = {}
+        # Options and sample attributes of each pipeline's arguments
+        self._argument_plans = {}
+
+
+    def __getitem__(self, item):
+        try:
+            return self._select_pipeline(item)
+        except _MissingPipelineConfigurationException:
+            raise KeyError("{} is not a known pipeline; known: {}".
+                           format(item, self.pipe_iface_config.keys()))
 
 
     def __iter__(self):
@@ -2556,6 +4072,129 @@ class PipelineInterface(object):
             raise ValueError("Attempted selection of resource package for "
                              "negative file size: {}".format(file_size))
 
+        selector = self._resource_selector(pipeline_name)
+        if selector is None:
+            return {}
+        min_sizes, names, packages = selector
+
+        # Choose the package with the greatest minimum that the size meets.
+        i = bisect_right(min_sizes, file_size) - 1
+        _LOGGER.debug("Selected '%s' package with min file size %s Gb for "
+                      "file of size %s Gb.", names[i], min_sizes[i], file_size)
+        return packages[i]
+
+
+    def choose_resource_packages(self, pipeline_name, file_sizes):
+        """
+        Select resource bundles for many input file sizes to given pipeline.
+
+        :param str pipeline_name: Name of pipeline.
+        :param Iterable[float] | numpy.ndarray file_sizes: Sizes of input
+            data (in gigabytes), e.g. one for each of a batch of samples.
+        :return list[MutableMapping]: resource bundle appropriate for
+            given pipeline, for each given input file size
+        :raises ValueError: if any indicated file size is negative, or if
+            the file size value specified for any resource package is negative
+        :raises _InvalidResourceSpecificationException: if no default
+            resource package specification is provided
+        """
+        file_sizes = _np.asarray(file_sizes, dtype=float).reshape(-1)
+        if (file_sizes < 0).any():
+            raise ValueError(
+                    "Attempted selection of resource package for negative "
+                    "file size: {}".format(file_sizes[file_sizes < 0][0]))
+        selector = self._resource_selector(pipeline_name)
+        if selector is None:
+            return [{} for _ in range(len(file_sizes))]
+        min_sizes, _, packages = selector
+        indices = _np.searchsorted(min_sizes, file_sizes, side="right") - 1
+        return [packages[i] for i in indices]
+
+
+    def invalidate_arguments(self, pipeline_name=None):
+        """
+        Forget a pipeline's arguments, e.g. after their edit.
+
+        A pipeline's arguments are read from its configuration just once;
+        this is redone automatically if an arguments section is replaced or
+        an argument is added or removed, but an argument edited in place
+        requires this invalidation.
+
+        :param str pipeline_name: pipeline for which to forget arguments;
+            all by default
+        """
+        if pipeline_name is None:
+            self._argument_plans.clear()
+        else:
+            self._argument_plans.pop(pipeline_name, None)
+
+
+    def invalidate_resources(self, pipeline_name=None):
+        """
+        Forget how resource packages are selected, e.g. after their edit.
+
+        A pipeline's resource packages are ordered by minimum file size
+        just once; this is redone automatically if the pipeline's resources
+        section is replaced or a package is added or removed, but a package
+        edited in place requires this invalidation.
+
+        :param str pipeline_name: pipeline for which to forget resource
+            package selection; all by default
+        """
+        if pipeline_name is None:
+            self._resource_selectors.clear()
+        else:
+            self._resource_selectors.pop(pipeline_name, None)
+
+
+    def _argument_plan(self, pipeline_name):
+        """
+        Fetch a pipeline's options and the sample attributes they're given.
+
+        :param str pipeline_name: Name of pipeline.
+        :return (list[(str, str)] | NoneType, list[(str, str)]): pairs of
+            option and sample attribute name (null for a flag-like option)
+            of required arguments--null if the pipeline declares none--and
+            of optional arguments
+        """
+        config = self._select_pipeline(pipeline_name)
+        sections = [config.get("arguments"), config.get("optional_arguments")]
+        sizes = [len(section or {}) for section in sections]
+        try:
+            known_sections, known_sizes, plan = \
+                    self._argument_plans[pipeline_name]
+        except KeyError:
+            pass
+        else:
+            if known_sizes == sizes and all(
+                    known is section for known, section
+                    in zip(known_sections, sections)):
+                return plan
+        arguments, optional_arguments = sections
+        required = None if "arguments" not in config \
+            else list((arguments or {}).items())
+        optional = [(option, attribute) for option, attribute
+                    in (optional_arguments or {}).items()
+                    if attribute is not None and attribute != ""]
+        plan = (required, optional)
+        self._argument_plans[pipeline_name] = (sections, sizes, plan)
+        return plan
+
+
+    def _resource_selector(self, pipeline_name):
+        """
+        Fetch a pipeline's resource packages, ordered by minimum file size.
+
+        :param str pipeline_name: Name of pipeline.
+        :return (list[float], list[str], list[MutableMapping]) | NoneType:
+            the packages' minimum file sizes in ascending order, with the
+            packages' names and the packages themselves; null if the pipeline
+            doesn't specify resources
+        :raises ValueError: if the file size value specified for any
+            resource package is negative
+        :raises _InvalidResourceSpecificationException: if no default
+            resource package specification is provided
+        """
         try:
             resources = self._select_pipeline(pipeline_name)["resources"]
         except KeyError:
@@ -2563,7 +4202,17 @@ class PipelineInterface(object):
             if self.pipe_iface_file is not None:
                 msg += " in file '{}'".format(self.pipe_iface_file)
             _LOGGER.warn(msg)
-            return {}
+            return None
+
+        try:
+            known_resources, num_packages, selector = \
+                    self._resource_selectors[pipeline_name]
+        except KeyError:
+            pass
+        else:
+            if known_resources is resources and \
+                    num_packages == len(resources):
+                return selector
 
         # Require default resource package specification.
         try:
@@ -2593,28 +4242,25 @@ class PipelineInterface(object):
         # Enforce default package minimum of 0.
         if "file_size" in default_resource_package:
             del default_resource_package["file_size"]
-        resources[DEFAULT_COMPUTE_RESOURCES_NAME]["min_file_size"] = 0
+        default_resource_package["min_file_size"] = 0
 
         try:
-            # Sort packages by descending file size minimum to return first
-            # package for which given file size satisfies the minimum.
-            resource_packages = sorted(
-                resources.items(),
-                key=lambda name_and_data: file_size_ante(*name_and_data),
-                reverse=True)
+            # Order packages by ascending file size minimum; among packages
+            # with the same minimum, the first declared is placed last, to
+            # be the one chosen for a file of at least that size.
+            sized_packages = sorted(
+                [(file_size_ante(name, data), name, data)
+                 for name, data in reversed(list(resources.items()))],
+                key=itemgetter(0))
         except ValueError:
             _LOGGER.error("Unable to use file size to prioritize "
                           "resource packages: {}".format(resources))
             raise
 
-        # "Descend" packages by min file size, choosing minimally-sufficient.
-        for rp_name, rp_data in resource_packages:
-            size_ante = file_size_ante(rp_name, rp_data)
-            if file_size >= size_ante:
-                msg = "Selected '{}' package with min file size {} Gb for file " \
-                      "of size {} Gb.".format(rp_name, size_ante, file_size)
-                _LOGGER.debug(msg)
-                return rp_data
+        selector = tuple(list(column) for column in zip(*sized_packages))
+        self._resource_selectors[pipeline_name] = \
+                (resources, len(resources), selector)
+        return selector
 
 
     def get_arg_string(self, pipeline_name, sample,
@@ -2631,92 +4277,98 @@ class PipelineInterface(object):
             is null
         :return str: command-line argument string for pipeline
         """
+        return self.get_arg_strings(
+                pipeline_name, [sample], submission_folder_path,
+                **null_replacements)[0]
 
-        def update_argtext(argtext, option, argument):
-            if argument is None or "" == argument:
-                _LOGGER.debug("Skipping null/empty argument for option "
-                              "'{}': {}".format(option, type(argument)))
-                return argtext
-            _LOGGER.debug("Adding argument for pipeline option '{}': {}".
-                          format(option, argument))
-            return "{} {} {}".format(argtext, option, argument)
 
+    def get_arg_strings(self, pipeline_name, samples, submission_folder_path="",
+                        as_argv=False, **null_replacements):
+        """
+        For a given pipeline and many samples, return the arguments of each.
 
-        default_filepath = _os.path.join(
-                submission_folder_path, sample.generate_filename())
-        _LOGGER.debug("Default sample filepath: '%s'", default_filepath)
-        proxies = {"yaml_file": default_filepath}
-        proxies.update(null_replacements)
-
-        _LOGGER.debug("Building arguments string")
-        config = self._select_pipeline(pipeline_name)
-        argstring = ""
+        The pipeline's arguments and optional arguments are read from its
+        configuration just once, and then applied to each sample in turn.
 
-        if "arguments" not in config:
+        :param str pipeline_name: Name of pipeline.
+        :param Iterable[Sample] samples: samples for which jobs are being built
+        :param str submission_folder_path: path to folder in which files
+            related to submission of the samples will be placed.
+        :param bool as_argv: whether to provide each sample's arguments as
+            a list of words, e.g. for subprocess, rather than as text
+        :param dict null_replacements: mapping from name of Sample attribute
+            name to value to use in arg string if Sample attribute's value
+            is null
+        :return list[str] | list[list[str]]: command-line argument string
+            (or words) for pipeline, for each sample
+        :raises _MissingSampleAttributesException: if any sample lacks an
+            attribute to which one of the pipeline's arguments is mapped;
+            the exception names each such sample and attribute
+        :raises ValueError: if a sample's value for an attribute to which
+            one of the pipeline's arguments is mapped is null, and the
+            attribute has no replacement for null
+        """
+        required, optional = self._argument_plan(pipeline_name)
+        if required is None:
             _LOGGER.info("No arguments found for '%s' in '%s'",
-                              pipeline_name, self.pipe_iface_file)
-            return argstring
-
-        args = config["arguments"]
-        for pipe_opt, sample_attr in args.iteritems():
-            if sample_attr is None:
-                _LOGGER.debug("Option '%s' is not mapped to a sample "
-                              "attribute, so it will be added to the pipeline "
-                              "argument string as a flag-like option.",
-                              str(pipe_opt))
-                argstring += " {}".format(pipe_opt)
-                continue
-
-            try:
-               arg = getattr(sample, sample_attr)
-            except AttributeError:
-                _LOGGER.error(
-                        "Error (missing attribute): '%s' requires sample "
-                        "attribute '%s' for option/argument '%s'",
-                        pipeline_name, sample_attr, pipe_opt)
-                raise
-
-            # It's undesirable to put a null value in the argument string.
-            if arg is None:
-                _LOGGER.debug("Null value for sample attribute: '%s'",
-                              sample_attr)
+                         pipeline_name, self.pipe_iface_file)
+            return [[] if as_argv else "" for _ in samples]
+
+        file_format = self.get_sample_file_format(pipeline_name)
+        all_words, missing, missing_optional = [], _OrderedDict(), Counter()
+        for sample in samples:
+            words, lacked = [], []
+            for option, attribute in required:
+                if attribute is None:
+                    # Flag-like option, not mapped to a sample attribute
+                    words.append(option)
+                    continue
                 try:
-                    arg = proxies[sample_attr]
-                except KeyError:
-                    reason = "No default for null sample attribute: '{}'".\
-                            format(sample_attr)
-                    raise ValueError(reason)
-                _LOGGER.debug("Found default for '{}': '{}'".
-                              format(sample_attr, arg))
-
-            argstring = update_argtext(
-                    argstring, option=pipe_opt, argument=arg)
-
-        # Add optional arguments
-        if "optional_arguments" in config:
-            _LOGGER.debug("Processing options")
-            args = config["optional_arguments"]
-            for pipe_opt, sample_attr in args.iteritems():
-                _LOGGER.debug("Option '%s' maps to sample attribute '%s'",
-                              pipe_opt, sample_attr)
-                if sample_attr is None or sample_attr == "":
-                    _LOGGER.debug("Null/empty sample attribute name for "
-                                  "pipeline option '{}'".format(pipe_opt))
+                    arg = getattr(sample, attribute)
+                except AttributeError:
+                    lacked.append((option, attribute))
                     continue
+                # It's undesirable to put a null value in the arguments.
+                if arg is None:
+                    try:
+                        arg = null_replacements[attribute]
+                    except KeyError:
+                        if attribute != "yaml_file":
+                            raise ValueError(
+                                "No default for null sample attribute: "
+                                "'{}'".format(attribute))
+                        arg = _os.path.join(
+                            submission_folder_path,
+                            sample.generate_filename(file_format=file_format))
+                if arg is not None and "" != arg:
+                    words.extend([option, "{}".format(arg)])
+            if lacked:
+                missing[sample.name] = lacked
+                continue
+            for option, attribute in optional:
                 try:
-                    arg = getattr(sample, sample_attr)
+                    arg = getattr(sample, attribute)
                 except AttributeError:
-                    _LOGGER.warn(
-                        "> Note (missing optional attribute): '%s' requests "
-                        "sample attribute '%s' for option '%s'",
-                        pipeline_name, sample_attr, pipe_opt)
+                    missing_optional[(option, attribute)] += 1
                     continue
-                argstring = update_argtext(
-                        argstring, option=pipe_opt, argument=arg)
-
-        _LOGGER.debug("Script args: '%s'", argstring)
-
-        return argstring
+                if arg is not None and "" != arg:
+                    words.extend([option, "{}".format(arg)])
+            all_words.append(words)
+
+        if missing:
+            _LOGGER.error("Error (missing attribute): %d sample(s) lack "
+                          "attribute(s) that '%s' requires",
+                          len(missing), pipeline_name)
+            raise _MissingSampleAttributesException(pipeline_name, missing)
+        for (option, attribute), count in missing_optional.items():
+            _LOGGER.warn("> Note (missing optional attribute): '%s' requests "
+                         "sample attribute '%s' for option '%s', which %d "
+                         "sample(s) lack", pipeline_name, attribute, option,
+                         count)
+
+        if as_argv:
+            return all_words
+        return [" " + " ".join(words) if words else "" for words in all_words]
 
 
     def get_attribute(self, pipeline_name, attribute_key, path_as_list=True):
@@ -2734,6 +4386,18 @@ class PipelineInterface(object):
         return [value] if isinstance(value, str) and path_as_list else value
 
 
+    def get_sample_file_format(self, pipeline_name):
+        """
+        Determine the format in which a pipeline reads each Sample's file.
+
+        :param str pipeline_name: name of the pipeline of interest
+        :return str | NoneType: name of the format the pipeline selects, if
+            it selects one
+        """
+        config = self._select_pipeline(pipeline_name)
+        return config.get(SAMPLE_FILE_FORMAT_KEY)
+
+
     def get_pipeline_name(self, pipeline):
         """
         Translate a pipeline name (e.g., stripping file extension).
@@ -3076,45 +4740,420 @@ class ProtocolMapper(Mapping):
 
     def build_pipeline(self, protocol):
         """
-        Create command-line text for given protocol's pipeline(s).
+        Create the graph of jobs for given protocol's pipeline(s).
+
+        Pipelines separated by a semicolon run serially, each after all of
+        those before the semicolon; pipelines separated by a comma (and
+        conventionally parenthesized) are independent of one another. For
+        example, with "a; (b, c); d", each of b and c follows a, and d
+        follows both b and c.
 
         :param str protocol: Name of protocol.
+        :return Mapping[str, tuple[str]]: key of each of the protocol's
+            pipelines, in the order mapped, with the key(s) of the
+            pipeline(s) on which it depends; empty if the protocol's unmapped
         """
 
         _LOGGER.debug("Building pipeline for protocol '%s'", protocol)
 
+        protocol = alpha_cased(protocol)
         if protocol not in self.mappings:
             _LOGGER.warn(
                     "Missing Protocol Mapping: '%s' is not found in '%s'",
-                    protocol, self.mappings_file)
-            return []
+                    protocol, self.filepath or "mapping")
+            return _OrderedDict()
+
+        # First list level: each group of jobs follows the previous one. A
+        # group that adds no jobs (e.g., repeating an earlier pipeline)
+        # leaves the following group to depend on the one before it.
+        graph = _OrderedDict()
+        dep = None
+        for split_job in self.mappings[protocol].split(';'):
+            dep = self.parse_parallel_jobs(split_job, dep, graph) or dep
+        return graph
+
+
+    def parse_parallel_jobs(self, job, dep, graph):
+        """
+        Register each of a group of independent pipelines.
+
+        :param str job: one or more comma-separated pipeline keys, possibly
+            within parentheses
+        :param Iterable[str] dep: key(s) of the pipeline(s) on which each of
+            the group depends, if any
+        :param MutableMapping[str, tuple[str]] graph: jobs registered so far
+        :return list[str]: key(s) of the pipeline(s) newly registered
+        """
+        job = job.replace("(", "").replace(")", "")
+        split_jobs = [x.strip() for x in job.split(',')]
+        return [s for s in split_jobs
+                if s and self.register_job(s, dep, graph)]
+
+
+    def register_job(self, job, dep, graph):
+        """
+        Add a pipeline to a graph of jobs, unless it's already there.
+
+        :param str job: key of the pipeline to register
+        :param Iterable[str] dep: key(s) of the pipeline(s) on which this one
+            depends, if any
+        :param MutableMapping[str, tuple[str]] graph: jobs registered so far
+        :return bool: whether the pipeline was newly registered
+        """
+        if job in graph:
+            _LOGGER.debug("Job already registered: %s", job)
+            return False
+        _LOGGER.debug("Register Job Name: %s\tDep: %s", str(job), str(dep))
+        graph[job] = tuple(dep or ())
+        return True
+
+
+
+class _SampleSequence(Sequence):
+    """
+    A Project's Samples, each built and cached only when first needed.
+
+    Samples are keyed by annotations sheet row, so a Sample that's indexed,
+    sliced, or iterated over is built (merged, with paths set) just once,
+    and Samples that are never requested are never built at all.
+    """
+
+    # Iteration builds Samples in batches, doubling up to this size, so that
+    # column-wise preparation may be used without building much more than
+    # is actually consumed.
+    MAX_BATCH_SIZE = 1024
 
-        # First list level
-        split_jobs = [x.strip() for x in self.mappings[protocol].split(';')]
-        return split_jobs  # hack works if no parallelism
+    def __init__(self, prj, compact=False):
+        """
+        Samples are of the Project's sheet, merged with its merge table.
 
-        # Placeholder for parallelism.
+        :param Project prj: the Project of which to provide Samples
+        :param bool compact: whether to establish the sample data for the
+            whole sheet at once, by column, with each (unmerged) Sample a
+            view of its row
         """
-        for i in range(0, len(split_jobs)):
-            if i == 0:
-                self.parse_parallel_jobs(split_jobs[i], None)
+        self._prj = prj
+        self._merge_rows = None if prj.merge_table is None \
+            else group_merge_table(prj.merge_table)
+        self._samples = {}
+        self._table = None
+        if compact:
+            columns = prj._compute_sample_columns(self._merge_rows)
+            if columns is None:
+                _LOGGER.debug("Sample data can't be kept by column; "
+                              "building each sample in full")
             else:
-                self.parse_parallel_jobs(split_jobs[i], split_jobs[i - 1])
+                self._table = _SampleTable(prj, columns)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+            self._build(indices)
+            return [self._samples[i] for i in indices]
+        num_samples = len(self)
+        if index < 0:
+            index += num_samples
+        if not 0 <= index < num_samples:
+            raise IndexError("Sample index out of range: {}".format(index))
+        self._build([index])
+        return self._samples[index]
+
+
+    def __iter__(self):
+        start, batch_size, num_samples = 0, 1, len(self)
+        while start < num_samples:
+            indices = range(start, min(start + batch_size, num_samples))
+            self._build(indices)
+            for i in indices:
+                yield self._samples[i]
+            start += batch_size
+            batch_size = min(2 * batch_size, self.MAX_BATCH_SIZE)
+
+
+    def __len__(self):
+        return len(self._prj.sheet)
+
+
+    def __repr__(self):
+        return "{} of {}; {} of {} built".format(
+            self.__class__.__name__, self._prj.__class__.__name__,
+            len(self._samples), len(self))
+
+
+    @property
+    def num_built(self):
+        """ Number of Samples built so far. """
+        return len(self._samples)
+
+
+    def _build(self, indices):
+        """
+        Build and cache the Samples for particular sheet rows.
+
+        :param Iterable[int] indices: positions of the rows in the sheet
         """
+        indices = [i for i in indices if i not in self._samples]
+        if not indices:
+            return
+        if self._table is not None:
+            self._build_views(indices)
+            return
+        sheet = self._prj.sheet.iloc[indices]
+        columns = None if len(indices) == 1 else \
+            self._prj._compute_sample_columns(self._merge_rows, sheet)
+        rows = _sheet_rows(sheet, as_records=columns is not None)
+        for position, (i, row) in enumerate(zip(indices, rows)):
+            self._samples[i] = self._prj._build_sample(
+                row, position, columns, self._merge_rows)
 
 
-    def parse_parallel_jobs(self, job, dep):
-        job = job.replace("(", "").replace(")", "")
-        split_jobs = [x.strip() for x in job.split(',')]
-        if len(split_jobs) > 1:
-            for s in split_jobs:
-                self.register_job(s, dep)
+    def _build_views(self, indices):
+        """
+        Establish the Samples for particular rows of the sample data table.
+
+        A merged sample is built in full, as its data aren't in the table.
+
+        :param Iterable[int] indices: positions of the rows in the sheet
+        """
+        table, merged = self._table, []
+        for i in indices:
+            if table.columns.merged[i]:
+                merged.append(i)
+            else:
+                self._samples[i] = SampleView(table, i)
+        if merged:
+            rows = _sheet_rows(self._prj.sheet.iloc[merged], as_records=True)
+            for i, row in zip(merged, rows):
+                self._samples[i] = self._prj._build_sample(
+                    row, i, table.columns, self._merge_rows)
+
+
+
+class DataSourceTemplate(object):
+    """
+    Data source path template, parsed once to be populated many times.
+
+    Environment variables in the template are expanded when it's parsed,
+    and it knows the fields it references, so populating it requires just
+    the values of those fields.
+
+    :param str template: data source path template, with
+        format-style fields like {sample_name}
+    :param GlobCache glob_cache: cache with which to find the paths
+        matching a populated template that's a glob pattern; glob by default
+    """
+
+    def __init__(self, template, glob_cache=None):
+        self.template = _os.path.expandvars(template)
+        self.fields = frozenset(_format_fields(self.template))
+        self._glob_cache = glob_cache
+
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.template)
+
+
+    def populate(self, values):
+        """
+        Fill in the template with its fields' values.
+
+        :param Mapping[str, object] values: value by field name
+        :return str: populated template, globbed if it's a pattern; the
+            (environment-expanded) template itself if it can't be populated
+        """
+        try:
+            val = self.template.format(**values)
+            if '*' in val or '[' in val:
+                _LOGGER.debug("Pre-glob: %s", val)
+                matches = sorted(glob.glob(val)) if self._glob_cache is None \
+                    else self._glob_cache.glob(val)
+                val = " ".join(matches) or val
+                _LOGGER.debug("Post-glob: %s", val)
+        except Exception as e:
+            _LOGGER.error("Can't format data source correctly: %s",
+                          self.template)
+            _LOGGER.error(str(type(e).__name__) + str(e))
+            return self.template
+        return val
+
+
+
+class _SampleColumns(object):
+    """
+    Sample data for each of an annotations sheet's rows, by column.
+
+    Each column holds a value per row, with a placeholder for a row that
+    lacks a value, and assigning a column follows the semantics of setting
+    a Sample attribute, such that a null doesn't squash an existing value.
+    """
+
+    def __init__(self, sheet):
+        """
+        Begin with the sheet's data, as a Sample would.
+
+        :param pandas.core.frame.DataFrame sheet: sample annotations
+        """
+        self.num_rows = len(sheet)
+        nulls = sheet.isnull()
+        self.data = _OrderedDict(
+            (col, [_MISSING if null else value for value, null in
+                   zip(sheet[col].tolist(), nulls[col].tolist())])
+            for col in sheet.columns)
+        # A Sample regards the "library" as its protocol, and it's named by
+        # its sample name.
+        library = self.data.pop("library", None)
+        if library is not None:
+            self.data["protocol"] = [
+                p if l is _MISSING else l for l, p in
+                zip(library, self.get("protocol"))]
+        self.data["name"] = list(self.get(SAMPLE_NAME_COLNAME))
+        # Columns established beyond the sheet's own data
+        self.touched = []
+        self.pre_merge = []
+        self.merged = [False] * self.num_rows
+        self.derived_done = [[] for _ in range(self.num_rows)]
+
+
+    def apply(self, sample, row_index, columns):
+        """
+        Set a row's values for particular columns as Sample attributes.
+
+        :param Sample sample: the Sample for the indicated row
+        :param int row_index: position of the row within the sheet
+        :param Iterable[str] columns: names of the columns to set
+        """
+        for col in columns:
+            value = self.data[col][row_index]
+            if value is not _MISSING:
+                setattr(sample, col, value)
+
+
+    def assign(self, col, values):
+        """
+        Set a column's values, as if setting an attribute on each Sample.
+
+        :param str col: name of the column to set
+        :param Sequence values: value for each row, with the placeholder for
+            a row for which the attribute isn't set
+        """
+        current = self.data.get(col)
+        if current is None:
+            self.data[col] = list(values)
         else:
-            self.register_job(job, dep)
+            self.data[col] = [
+                old if new is _MISSING or (new is None and old is not _MISSING)
+                else new for old, new in zip(current, values)]
+        if col not in self.touched:
+            self.touched.append(col)
+
+
+    def format(self, template, row_index):
+        """
+        Populate a data source template with a row's values.
+
+        :param DataSourceTemplate template: data source path template
+        :param int row_index: position of the row within the sheet
+        :return str: populated template, globbed if it's a pattern; the
+            template itself if it can't be populated
+        """
+        values = {}
+        for field in template.fields:
+            try:
+                value = self.data[field][row_index]
+            except KeyError:
+                continue
+            if value is not _MISSING:
+                values[field] = value
+        return template.populate(values)
+
+
+    def get(self, col):
+        """
+        Fetch a column's values.
+
+        :param str col: name of the column to fetch
+        :return list: value for each row, with the placeholder for a row
+            that lacks the column
+        """
+        try:
+            return self.data[col]
+        except KeyError:
+            return [_MISSING] * self.num_rows
+
+
+
+class _SampleTable(object):
+    """
+    A Project's sample data, shared by the Samples that are views of it.
+
+    Each attribute name is held once (interned), with a column of values,
+    rather than in each Sample's own mapping. The attributes that a Sample
+    establishes for itself are either constant across the table or made
+    for a Sample when it first needs one.
+    """
+
+    # Name of the method that makes each attribute for a Sample, so that
+    # the table holds no bound methods (which Python 2 can't pickle).
+    factories = {"merged_cols": "_merged_cols", "paths": "_paths",
+                 "sheet_attributes": "_sheet_attributes"}
+
+    def __init__(self, prj, columns):
+        """
+        Finish the sample data as a Sample does when its Project builds it.
+
+        :param Project prj: the Project whose Samples are of this table
+        :param _SampleColumns columns: sample data by column, for the whole
+            annotations sheet
+        """
+        self.prj = prj
+        self.columns = columns
+        self.data = _OrderedDict(
+            (_intern(col) if isinstance(col, str) else col, values)
+            for col, values in columns.data.items())
+        self.data["derived_cols_done"] = columns.derived_done
+        # As for an individually built Sample
+        outputs = [_output_attributes(prj, name) for name in self.data["name"]]
+        for name in outputs[0] if outputs else ():
+            self.data[name] = [attributes[name] for attributes in outputs]
+        self.data.update(_legacy_attributes(self.data))
+        self.constants = {"prj": prj, "required_paths": None,
+                          "yaml_file": None, "merged": False}
+
+
+    def _merged_cols(self, row):
+        """
+        Make the container for a Sample's merged columns.
+
+        :param int row: position of the Sample's row
+        :return AttributeDict: empty container for merged columns
+        """
+        return AttributeDict()
+
+
+    def _paths(self, row):
+        """
+        Make the container for a Sample's paths.
 
+        :param int row: position of the Sample's row
+        :return Paths: container for the Sample's paths, with its root folder
+        """
+        paths = Paths()
+        sample_name = self.data[SAMPLE_NAME_COLNAME][row]
+        paths.sample_root = sample_folder(
+            self.prj, {SAMPLE_NAME_COLNAME: sample_name})
+        return paths
 
-    def register_job(self, job, dep):
-        _LOGGER.info("Register Job Name: %s\tDep: %s", str(job), str(dep))
+
+    def _sheet_attributes(self, row):
+        """
+        Determine the names of a Sample's values from the annotations sheet.
+
+        :param int row: position of the Sample's row
+        :return list[str]: names of the columns in which the row has a value
+        """
+        values = self.prj.sheet.iloc[row]
+        return [col for col, value in values.items() if not _pd.isnull(value)]
 
 
 
@@ -3166,10 +5205,33 @@ class _MissingPipelineConfigurationException(Exception):
 
 
 
+class _MissingSampleAttributesException(AttributeError):
+    """ Samples lack attributes to which a pipeline's arguments are mapped. """
+    def __init__(self, pipeline, missing):
+        """
+        :param str pipeline: name of the pipeline
+        :param Mapping[str, list[(str, str)]] missing: pairs of option and
+            sample attribute lacked, by name of sample
+        """
+        self.missing = missing
+        details = "; ".join(
+                "{}: {}".format(sample_name, ", ".join(
+                        "'{}' (for '{}')".format(attribute, option)
+                        for option, attribute in lacked))
+                for sample_name, lacked in missing.items())
+        super(_MissingSampleAttributesException, self).__init__(
+                "{} sample(s) lack attribute(s) required by '{}': {}".format(
+                        len(missing), pipeline, details))
+
+
+
 def _import_sample_subtype(pipeline_filepath, subtype_name=None):
     """
     Import a particular Sample subclass from a Python module.
 
+    The module's subtypes are first determined from its source, so it's
+    imported only if one of them is to be used.
+
     :param str pipeline_filepath: path to file to regard as Python module
     :param str subtype_name: name of the target class (which must derive from
         the base Sample class in order for it to be used), optional; if
@@ -3184,55 +5246,30 @@ def _import_sample_subtype(pipeline_filepath, subtype_name=None):
     if ext != ".py":
         return base_type
 
-    try:
-        _LOGGER.debug("Attempting to import module defined by {}".
-                      format(pipeline_filepath))
-
-        # TODO: consider more fine-grained control here. What if verbose
-        # TODO: logging is only to file, not to stdout/err?
-
-        # Redirect standard streams during the import to prevent noisy
-        # error messaging in the shell that may distract or confuse a user.
-        if _LOGGER.getEffectiveLevel() > logging.DEBUG:
-            with open(_os.devnull, 'w') as temp_standard_streams:
-                with standard_stream_redirector(temp_standard_streams):
-                    pipeline_module = import_from_source(pipeline_filepath)
-        else:
-            pipeline_module = import_from_source(pipeline_filepath)
-
-    except SystemExit:
-        # SystemExit would be caught as BaseException, but SystemExit is
-        # particularly suggestive of an a script without a conditional
-        # check on __main__, and as such warrant a tailored message.
-        _LOGGER.warn("'%s' appears to attempt to run on import; "
-                     "does it lack a conditional on '__main__'? "
-                     "Using base type: %s",
-                     pipeline_filepath, base_type.__name__)
+    # Avoid running the module unless a subtype may be selected from it.
+    declared = declared_subclasses(pipeline_filepath, base_type)
+    if declared is None:
+        _LOGGER.debug("%s subtypes of '%s' can't be determined without "
+                      "importing it", base_type.__name__, pipeline_filepath)
+    elif subtype_name and subtype_name not in declared:
+        _LOGGER.debug("'%s' isn't among the %d %s subtype(s) declared in "
+                      "'%s'; importing it to check", subtype_name,
+                      len(declared), base_type.__name__, pipeline_filepath)
+    elif not subtype_name and len(declared) != 1:
+        _LOGGER.debug("%s subtype cannot be selected from %d found in "
+                      "'%s'; using base type", base_type.__name__,
+                      len(declared), pipeline_filepath)
         return base_type
+    else:
+        subtype_name = subtype_name or declared[0]
 
-    except (BaseException, Exception) as e:
-        _LOGGER.warn("Using base %s because of failure in attempt to "
-                     "import pipeline module '%s': %r",
-                     base_type.__name__, pipeline_filepath, e)
+    proper_subtypes = _pipeline_sample_subtypes(pipeline_filepath)
+    if proper_subtypes is None:
         return base_type
 
-    else:
-        _LOGGER.debug("Successfully imported pipeline module '%s', "
-                      "naming it '%s'", pipeline_filepath,
-                      pipeline_module.__name__)
-
     def class_names(cs):
         return ", ".join([c.__name__ for c in cs])
 
-    # Find classes from pipeline module and determine which derive from Sample.
-    classes = _fetch_classes(pipeline_module)
-    _LOGGER.debug("Found %d classes: %s", len(classes), class_names(classes))
-
-    # Base Sample could be imported; we want the true subtypes.
-    proper_subtypes = _proper_subtypes(classes, base_type)
-    _LOGGER.debug("%d proper %s subtype(s): %s", len(proper_subtypes),
-                  base_type.__name__, class_names(proper_subtypes))
-
     # Determine course of action based on subtype request and number found.
     if not subtype_name:
         _LOGGER.debug("No specific subtype is requested from '%s'",
@@ -3269,6 +5306,310 @@ def _import_sample_subtype(pipeline_filepath, subtype_name=None):
 
 
 
+def _job_waves(job_graph, jobs):
+    """
+    Group jobs into waves, each depending only on jobs of earlier waves.
+
+    :param Mapping[str, Iterable[str]] job_graph: key(s) of the job(s) on
+        which each job depends, with each job after those on which it depends
+    :param Mapping[str, object] jobs: jobs to group, by key; a job of the
+        graph that's absent here is skipped, so that jobs depending on it
+        depend instead on the job(s) on which it depends
+    :return list[list[object]]: the jobs, in waves ordered by dependency
+    """
+    levels = {}
+    waves = []
+    for key, deps in job_graph.items():
+        level = max([levels[d] + (d in jobs) for d in deps] or [0])
+        levels[key] = level
+        if key in jobs:
+            if level == len(waves):
+                waves.append([])
+            waves[level].append(jobs[key])
+    return waves
+
+
+
+def _legacy_attributes(data):
+    """
+    Determine the values of a Sample's attributes that are kept only for
+    backwards-compatibility (pipelines should now use data_source).
+
+    :param Mapping data: the Sample's data, or its data by column
+    :return Mapping[str, object]: value (or column) of each such attribute
+        that the data determine
+    """
+    try:
+        data_source = data[DATA_SOURCE_COLNAME]
+    except KeyError:
+        _LOGGER.log(5, "No data source; skipping data path assignment")
+        return {}
+    _LOGGER.log(5, "Path to sample data: '%s'", data_source)
+    return {"data_path": data_source}
+
+
+
+def _output_attributes(project, sample_name):
+    """
+    Determine the values of a Sample's attributes that locate its output.
+
+    :param AttributeDict project: object with pointers to data paths and
+        such, either full Project or AttributeDict with sufficient data
+    :param str sample_name: name of the Sample
+    :return Mapping[str, str]: the Sample's results_subdir, and its bigwig
+        and track_url if the Project has a trackhub
+    """
+    # Parent
+    attributes = _OrderedDict(
+        [("results_subdir", project.metadata.results_subdir)])
+    # Track url
+    bigwig_filename = sample_name + ".bigWig"
+    try:
+        # Project's public_html folder
+        attributes["bigwig"] = _os.path.join(
+                project.trackhubs.trackhub_dir, bigwig_filename)
+        attributes["track_url"] = \
+                "{}/{}".format(project.trackhubs.url, bigwig_filename)
+    except Exception:
+        _LOGGER.debug("No trackhub/URL")
+    return attributes
+
+
+
+def _pipeline_sample_subtypes(pipeline_filepath):
+    """
+    Determine the Sample subtypes that a pipeline module defines.
+
+    A pipeline module's import and class inspection is done once per version
+    of the file; the outcome is cached for the process, by absolute path,
+    and redone only when the file's modification time or size changes.
+
+    :param str pipeline_filepath: path to file to regard as Python module
+    :return list[type] | NoneType: proper Sample subtypes defined by the
+        module, or null if the module can't be imported
+    """
+    path = _os.path.abspath(pipeline_filepath)
+    try:
+        st = _os.stat(path)
+    except OSError:
+        version = None
+    else:
+        version = (getattr(st, "st_mtime_ns", st.st_mtime), st.st_size)
+        try:
+            cached_version, subtypes = _PIPELINE_MODULES[path]
+        except KeyError:
+            pass
+        else:
+            if cached_version == version:
+                # Mark as most recently used.
+                _PIPELINE_MODULES[path] = _PIPELINE_MODULES.pop(path)
+                _LOGGER.debug("Using cached Sample subtypes from '%s'",
+                              pipeline_filepath)
+                return subtypes
+
+    try:
+        _LOGGER.debug("Attempting to import module defined by {}".
+                      format(pipeline_filepath))
+
+        # TODO: consider more fine-grained control here. What if verbose
+        # TODO: logging is only to file, not to stdout/err?
+
+        # Redirect standard streams during the import to prevent noisy
+        # error messaging in the shell that may distract or confuse a user.
+        if _LOGGER.getEffectiveLevel() > logging.DEBUG:
+            with open(_os.devnull, 'w') as temp_standard_streams:
+                with standard_stream_redirector(temp_standard_streams):
+                    pipeline_module = import_from_source(pipeline_filepath)
+        else:
+            pipeline_module = import_from_source(pipeline_filepath)
+
+    except SystemExit:
+        # SystemExit would be caught as BaseException, but SystemExit is
+        # particularly suggestive of an a script without a conditional
+        # check on __main__, and as such warrant a tailored message.
+        _LOGGER.warn("'%s' appears to attempt to run on import; "
+                     "does it lack a conditional on '__main__'? "
+                     "Using base type: %s",
+                     pipeline_filepath, Sample.__name__)
+        subtypes = None
+
+    except (BaseException, Exception) as e:
+        _LOGGER.warn("Using base %s because of failure in attempt to "
+                     "import pipeline module '%s': %r",
+                     Sample.__name__, pipeline_filepath, e)
+        subtypes = None
+
+    else:
+        _LOGGER.debug("Successfully imported pipeline module '%s', "
+                      "naming it '%s'", pipeline_filepath,
+                      pipeline_module.__name__)
+        # Find classes from pipeline module; which derive from Sample?
+        classes = _fetch_classes(pipeline_module)
+        _LOGGER.debug("Found %d classes: %s", len(classes),
+                      ", ".join([c.__name__ for c in classes]))
+        # Base Sample could be imported; we want the true subtypes.
+        subtypes = _proper_subtypes(classes, Sample)
+        _LOGGER.debug("%d proper %s subtype(s): %s", len(subtypes),
+                      Sample.__name__,
+                      ", ".join([c.__name__ for c in subtypes]))
+
+    if version is not None:
+        _PIPELINE_MODULES.pop(path, None)
+        _PIPELINE_MODULES[path] = (version, subtypes)
+        while len(_PIPELINE_MODULES) > MAX_PIPELINE_MODULES:
+            _PIPELINE_MODULES.popitem(last=False)
+    return subtypes
+
+# Sample subtypes of each pipeline module imported, with file version, by path
+_PIPELINE_MODULES = _OrderedDict()
+
+
+
+def _without_metadata(attributes):
+    """
+    Exclude AttributeDict metadata flags from an instance's attributes.
+
+    :param Mapping[str, object] attributes: an AttributeDict's __dict__
+    :return Mapping[str, object]: the given attributes themselves if they
+        include no metadata flag, otherwise a copy without them
+    """
+    for name in ATTRDICT_METADATA:
+        if name in attributes:
+            return {k: v for k, v in attributes.items()
+                    if k not in ATTRDICT_METADATA}
+    return attributes
+
+
+
+def _rebuild_sample(sample_type, state, flags):
+    """
+    Rebuild a Sample from its data, bypassing initialization.
+
+    :param type sample_type: Sample class of which to make an instance
+    :param Mapping[str, object] state: the Sample's data by attribute name
+    :param Mapping[str, bool] flags: the Sample's metadata flags
+    :return Sample: the rebuilt Sample
+    """
+    sample = sample_type.__new__(sample_type)
+    AttributeDict.__init__(sample, **flags)
+    sample.__dict__.update(state)
+    return sample
+
+
+
+def _sample_file_type(path, sample_name):
+    """
+    Determine the Sample type from the name of a file written for a Sample.
+
+    :param str path: path to the file written for the Sample
+    :param str sample_name: name of the Sample
+    :return type: Sample subtype that the filename names after the sample
+        name, among the subtypes that have been imported (the one with the
+        longest name that ends the filename); base Sample if there's no
+        such subtype
+    """
+    stem = _os.path.splitext(_os.path.basename(path))[0]
+    sample_name = str(sample_name)
+    suffix = stem[len(sample_name):] if stem.startswith(sample_name) else stem
+    # Sample and each of its (imported) subtypes, breadth-first
+    types = [Sample]
+    for t in types:
+        types.extend(s for s in t.__subclasses__() if s not in types)
+    matches = [t for t in types[1:] if t is not SampleView and
+               len(suffix) > len(t.__name__) and suffix.endswith(t.__name__)]
+    # The longest name is the one that the suffix names, e.g. SCRNASample
+    # rather than RNASample for the suffix '_SCRNASample'.
+    return max(matches, key=lambda t: len(t.__name__)) if matches else Sample
+
+
+
+def _sheet_rows(sheet, as_records=False):
+    """
+    Generate the data for each of a sheet's rows, without null values.
+
+    :param pandas.core.frame.DataFrame sheet: sample annotations
+    :param bool as_records: whether to generate each row as an ordered
+        mapping, rather than a pandas Series (which is much more costly to
+        create)
+    :return Iterable[Mapping]: data for each of the sheet's rows, in the
+        order of its columns
+    """
+    if not as_records:
+        return (row.dropna() for _, row in sheet.iterrows())
+    columns = list(sheet.columns)
+    rows = sheet.itertuples(index=False, name=None)
+    if not sheet.isnull().values.any():
+        return (_OrderedDict(zip(columns, values)) for values in rows)
+    return (_OrderedDict((k, v) for k, v in zip(columns, values)
+                        if not _pd.isnull(v)) for values in rows)
+
+
+
+def _attempt(func, *args, **kwargs):
+    """
+    Call a function, capturing rather than raising any error.
+
+    :param callable func: function to call
+    :return (object, Exception | NoneType): function's result (null if it
+        failed) and the error it raised (null if it succeeded)
+    """
+    try:
+        return func(*args, **kwargs), None
+    except Exception as e:
+        return None, e
+
+
+
+def _class_attributes(cls):
+    """
+    Determine a class's attributes, and which are data descriptors.
+
+    For an instance of the class, attribute access finds a data descriptor
+    (e.g., a property) ahead of an entry of the same name in the instance's
+    __dict__, and any other class attribute after such an entry.
+
+    :param type cls: class for which to find attributes
+    :return Mapping[str, bool]: whether each of the class's attributes
+        (by name) is a data descriptor
+    """
+    try:
+        return _CLASS_ATTRIBUTES[cls]
+    except KeyError:
+        attributes = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                attributes[name] = hasattr(type(attr), "__set__") or \
+                    hasattr(type(attr), "__delete__")
+        _CLASS_ATTRIBUTES[cls] = attributes
+        return attributes
+
+# Attributes of each class, determined once
+_CLASS_ATTRIBUTES = {}
+
+
+
+def _format_fields(template):
+    """
+    Determine the names of the (root) keyword fields of a format string.
+
+    :param str template: format string, e.g. a data source path template
+    :return set[str]: names of the keyword fields of the template, the
+        attribute or item of a field notwithstanding; empty if the template
+        is malformed
+    """
+    fields = set()
+    try:
+        for _, field, spec, _ in string.Formatter().parse(template):
+            if field:
+                fields.add(re.split(r"[.\[]", field, 1)[0])
+            if spec and "{" in spec:
+                fields |= _format_fields(spec)
+    except ValueError:
+        return set()
+    return fields
+
+
+
 def _fetch_classes(mod):
     """ Return the classes defined in a module. """
     try:
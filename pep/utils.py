@@ -1,20 +1,62 @@
 """ Helpers without an obvious logical home. """
 
-from collections import defaultdict, Iterable
+import ast
+from collections import defaultdict, Iterable, OrderedDict
 import contextlib
+import csv
+import fnmatch
+import gzip
+import inspect
 import logging
+import math
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
 import random
+import re
 import string
+import struct
 import subprocess as sp
+import sys
+import threading
+import zlib
+if sys.version_info < (3, ):
+    import __builtin__ as builtins
+    import imp
+    _EXTENSION_SUFFIXES = [suffix for suffix, _, kind in imp.get_suffixes()
+                           if kind == imp.C_EXTENSION]
+    _STRING_TYPES = (basestring, )
+else:
+    import builtins
+    from importlib.machinery import EXTENSION_SUFFIXES as _EXTENSION_SUFFIXES
+    _STRING_TYPES = (str, )
 
 import yaml
 
-from .const import GENERIC_PROTOCOL_KEY, SAMPLE_INDEPENDENT_PROJECT_SECTIONS
+from .const import \
+        FLAGS, GENERIC_PROTOCOL_KEY, SAMPLE_INDEPENDENT_PROJECT_SECTIONS
 
 
 _LOGGER = logging.getLogger(__name__)
 
+DELIMITER_BY_EXTENSION = {".csv": ",", ".tsv": "\t", ".tab": "\t"}
+SNIFFABLE_DELIMITERS = ",\t;| "
+
+# BAM alignment record's fixed-size fields, following its block_size:
+# refID, pos, l_read_name, mapq, bin, n_cigar_op, flag, l_seq,
+# next_refID, next_pos, tlen
+BAM_RECORD_FIELDS = struct.Struct("<iiBBHHHiiii")
+
+# Paired-end FASTQ naming: 'R' and mate number just before a separator or
+# the extension, or underscore and mate number just before the extension,
+# e.g. sample_R1_001.fastq.gz, sample.r2.fq, sample_2.fq (not sample-2.fq)
+FASTQ_MATE_PATTERN = re.compile(
+        r"^(?P<head>.*(?:[._-](?P<r>[Rr])|_))(?P<mate>[12])"
+        r"(?P<tail>(?(r)(?:[._-][^/]*)?)\.f(?:ast)?q(?:\.gz)?)$")
+
+# Python source files of which to remember the parse
+MAX_SOURCE_MODULES = 256
+
 
 
 def add_project_sample_constants(sample, project):
@@ -51,22 +93,172 @@ def check_bam(bam, o):
     """
     Check reads in BAM file for read type and lengths.
 
+    The file's first alignment records are decoded directly; samtools is
+    used only if that fails, e.g. for a file that's not in BGZF format.
+
     :param str bam: BAM file path.
     :param int o: Number of reads to look at for estimation.
+    :return (Mapping[int, int], int): count of examined reads by length,
+        and number of examined reads that are paired; empty and 0 if the
+        file has no alignments
+    :raises IOError: if the file doesn't exist
+    :raises OSError: if the file can't be decoded, and samtools is
+        not available
+    """
+    if not os.path.isfile(bam):
+        raise IOError("BAM file does not exist: '{}'".format(bam))
+    try:
+        read_lengths, paired = _read_bam_head(bam, o)
+    except (IOError, EOFError, ValueError, struct.error, zlib.error) as e:
+        _LOGGER.debug("Falling back to samtools for BAM file '%s': %s",
+                      bam, str(e))
+        read_lengths, paired = _samtools_bam_head(bam, o)
+    if not read_lengths:
+        # A BAM file may have a header but no alignments.
+        _LOGGER.debug("No alignments in BAM file: '%s'", bam)
+    _LOGGER.debug("Read lengths: {}".format(read_lengths))
+    _LOGGER.debug("paired: {}".format(paired))
+    return read_lengths, paired
+
+
+
+def check_fastq(fastq, o):
+    """
+    Check reads in FASTQ file for read type and lengths.
+
+    Just the first records are read, and a gzipped file is decompressed
+    only as far as needed. Reads are deemed paired if the file has a mate
+    (R1/R2 naming, e.g. sample_R1.fastq.gz and sample_R2.fastq.gz) whose
+    first read has the same name, or if successive records share a read
+    name, as in an interleaved file.
+
+    :param str fastq: FASTQ file to examine.
+    :param int o: Number of reads to look at for estimation.
+    :return (Mapping[int, int], int): count of examined reads by length,
+        and number of examined reads that are paired
+    :raises IOError: if the file can't be read, or isn't FASTQ
+    """
+    read_lengths = defaultdict(int)
+    names = []
+    for name, sequence in _fastq_records(fastq, o):
+        names.append(name)
+        read_lengths[len(sequence)] += 1
+
+    if _is_mate_pair(fastq, names):
+        paired = len(names)
+    else:
+        # Interleaved mates are adjacent records with the same read name.
+        paired = sum(1 for i, name in enumerate(names)
+                     if (i > 0 and name == names[i - 1]) or
+                     (i + 1 < len(names) and name == names[i + 1]))
+
+    _LOGGER.debug("Read lengths: {}".format(read_lengths))
+    _LOGGER.debug("paired: {}".format(paired))
+    return read_lengths, paired
+
+
+
+def fastq_mate(fastq):
+    """
+    Find the extant file with the other reads of a paired-end FASTQ file.
+
+    :param str fastq: path to FASTQ file
+    :return str | NoneType: path to mate file, null if the file's name
+        doesn't indicate a mate number, or if its mate doesn't exist
+    """
+    folder, filename = os.path.split(fastq)
+    match = FASTQ_MATE_PATTERN.match(filename)
+    if not match:
+        return None
+    mate_filename = "".join([match.group("head"),
+                             "2" if match.group("mate") == "1" else "1",
+                             match.group("tail")])
+    mate = os.path.join(folder, mate_filename)
+    return mate if os.path.isfile(mate) else None
+
+
+
+def _read_bam_head(bam, o):
+    """
+    Decode flag and sequence length of a BAM file's first alignments.
+
+    BGZF is a series of gzip members, so only the blocks holding the
+    header and first alignments are read and decompressed.
+
+    :param str bam: BAM file path.
+    :param int o: Number of reads to look at for estimation.
+    :return (Mapping[int, int], int): count of examined reads by length,
+        and number of examined reads that are paired
+    :raises ValueError: if the file isn't BAM
+    :raises EOFError: if the file is truncated
+    """
+
+    def read_exactly(f, n):
+        data = f.read(n)
+        if len(data) < n:
+            raise EOFError("Truncated BAM file: '{}'".format(bam))
+        return data
+
+    def read_int(f):
+        return struct.unpack("<i", read_exactly(f, 4))[0]
+
+    paired = 0
+    read_lengths = defaultdict(int)
+    with gzip.open(bam, 'rb') as f:
+        if read_exactly(f, 4) != b"BAM\1":
+            raise ValueError("Not a BAM file: '{}'".format(bam))
+        # Skip header text and reference sequence dictionary.
+        read_exactly(f, read_int(f))
+        for _ in range(read_int(f)):
+            read_exactly(f, read_int(f) + 4)
+        while o > 0:  # Count down number of alignments
+            size_data = f.read(4)
+            if not size_data:
+                break
+            block_size = struct.unpack("<i", size_data)[0]
+            record = read_exactly(f, block_size)
+            fields = BAM_RECORD_FIELDS.unpack_from(record)
+            flag, l_seq = fields[6], fields[7]
+            # As with samtools view, an absent sequence ('*') has length 1.
+            read_lengths[l_seq or 1] += 1
+            if 1 & flag:  # check decimal flag contains 1 (paired)
+                paired += 1
+            o -= 1
+    return read_lengths, paired
+
+
+
+def _samtools_bam_head(bam, o):
+    """
+    Use samtools to tally flag and sequence length of first alignments.
+
+    :param str bam: BAM file path.
+    :param int o: Number of reads to look at for estimation.
+    :return (Mapping[int, int], int): count of examined reads by length,
+        and number of examined reads that are paired
+    :raises OSError: if samtools is not available
     """
     try:
         p = sp.Popen(['samtools', 'view', bam], stdout=sp.PIPE)
         # Count paired alignments
         paired = 0
         read_lengths = defaultdict(int)
-        while o > 0:  # Count down number of lines
-            line = p.stdout.readline().decode().split("\t")
-            flag = int(line[1])
-            read_lengths[len(line[9])] += 1
-            if 1 & flag:  # check decimal flag contains 1 (paired)
-                paired += 1
-            o -= 1
-        p.kill()
+        try:
+            for line in p.stdout:
+                if o <= 0:  # Count down number of lines
+                    break
+                fields = line.split(b"\t", 10)
+                flag = int(fields[1])
+                read_lengths[len(fields[9])] += 1
+                if 1 & flag:  # check decimal flag contains 1 (paired)
+                    paired += 1
+                o -= 1
+        finally:
+            # Stop samtools once enough reads have been seen.
+            p.stdout.close()
+            if p.poll() is None:
+                p.kill()
+            p.wait()
     except OSError:
         reason = "Note (samtools not in path): For NGS inputs, " \
                  "pep needs samtools to auto-populate " \
@@ -74,15 +266,73 @@ def check_bam(bam, o):
                  "these attributes were not populated."
         raise OSError(reason)
 
-    _LOGGER.debug("Read lengths: {}".format(read_lengths))
-    _LOGGER.debug("paired: {}".format(paired))
     return read_lengths, paired
 
 
 
-def check_fastq(fastq, o):
-    raise NotImplementedError("Detection of read type/length for "
-                              "fastq input is not yet implemented.")
+def _fastq_read_name(header):
+    """
+    Strip a FASTQ header line to the name shared by a read and its mate.
+
+    :param bytes header: FASTQ record's header line
+    :return bytes: read name, without mate number suffix or comment
+    """
+    name = header[1:].split(None, 1)[0] if header[1:].strip() else b""
+    if name[-2:] in (b"/1", b"/2"):
+        name = name[:-2]
+    return name
+
+
+
+def _fastq_records(fastq, o):
+    """
+    Read name and sequence of each of a FASTQ file's first records.
+
+    :param str fastq: FASTQ file path, gzipped according to extension
+    :param int o: maximum number of records to read
+    :return list[(bytes, bytes)]: read name, without mate number suffix,
+        and sequence of each record, in order
+    :raises IOError: if the file can't be read, or isn't FASTQ
+    """
+    records = []
+    opener = gzip.open if fastq.endswith(".gz") else open
+    with opener(fastq, 'rb') as f:
+        while len(records) < o:
+            record = [f.readline() for _ in range(4)]
+            if not record[0].strip():
+                break
+            if not (record[0].startswith(b"@")
+                    and record[2].startswith(b"+")):
+                raise IOError("Malformed FASTQ record {} in file: '{}'".format(
+                        len(records) + 1, fastq))
+            records.append(
+                    (_fastq_read_name(record[0]), record[1].rstrip()))
+    return records
+
+
+
+def _is_mate_pair(fastq, names):
+    """
+    Determine whether a FASTQ file has a mate file with the same reads.
+
+    :param str fastq: FASTQ file path
+    :param list[bytes] names: names of the file's first reads
+    :return bool: whether the file's mate (by name) exists, and its first
+        read has the same name as this file's
+    """
+    mate = fastq_mate(fastq)
+    if mate is None or not names:
+        return False
+    try:
+        mate_records = _fastq_records(mate, 1)
+    except IOError as e:
+        _LOGGER.debug("Can't read mate of FASTQ file '%s': %s", fastq, e)
+        return False
+    if mate_records and mate_records[0][0] == names[0]:
+        return True
+    _LOGGER.debug("First reads of FASTQ file '%s' and '%s' differ, so they're "
+                  "not mates", fastq, mate)
+    return False
 
 
 
@@ -106,6 +356,46 @@ def check_sample_sheet_row_count(sheet, filepath):
 
 
 
+def declared_subclasses(module_filepath, supertype):
+    """
+    Determine, without running it, a module's subclasses of a type.
+
+    The module's source is parsed, and the bases of its classes are resolved
+    through its imports: by an already-imported module itself, otherwise by
+    parsing the source of the module to import, rather than by importing it.
+    Statements conditional on the module being run as '__main__' are
+    disregarded.
+
+    :param str module_filepath: path to the Python source file to inspect
+    :param type supertype: type of which to find the module's subclasses
+    :return list[str] | NoneType: names of the classes, among the module's
+        members, that are proper subclasses of the given type; null if that
+        can't be determined statically, e.g. if the file can't be parsed, an
+        import can't be found as Python source, a name's bound to the result
+        of a call, or a name's bound by a block that may or may not run (a
+        conditional branch, a loop, or an exception handler) or by a function
+    """
+    resolver = _SubclassResolver(supertype)
+    module = resolver.source_module(os.path.abspath(module_filepath))
+    if module is None:
+        return None
+    member_names = resolver.member_names(module)
+    if member_names is None:
+        return None
+    names = []
+    for name in member_names:
+        value = resolver.attribute(module, name)
+        is_subclass = resolver.is_subclass(value)
+        if is_subclass is None:
+            _LOGGER.debug("Can't statically determine whether '%s' in '%s' "
+                          "is a %s subclass", name, module_filepath,
+                          supertype.__name__)
+            return None
+        if is_subclass and value != (_IMPORTED, supertype):
+            names.append(resolver.class_name(value))
+    return names
+
+
 def expandpath(path):
     """
     Expand a filesystem path that may or may not contain user/env vars.
@@ -117,26 +407,83 @@ def expandpath(path):
 
 
 
-def get_file_size(filename):
+def infer_delimiter(filepath, default=","):
+    """
+    Determine the delimiter of a file of delimited text.
+
+    The delimiter is sniffed from the file's first nonblank line (its header)
+    as pandas's Python parser does, but without reading any further, and
+    only common delimiters are considered; if that fails, the delimiter is
+    inferred from the file's extension.
+
+    :param str filepath: path to file of delimited text, perhaps gzipped
+    :param str default: delimiter to use if neither the file's header nor its
+        extension indicates one
+    :return str: the file's delimiter
+    :raises IOError: if the file can't be read
+    """
+    opener = gzip.open if filepath.endswith(".gz") else open
+    header = ""
+    with opener(filepath, 'rb') as f:
+        for line in f:
+            header = line.decode("utf-8", "replace").strip("\r\n")
+            if header.strip():
+                break
+    try:
+        return csv.Sniffer().sniff(header, SNIFFABLE_DELIMITERS).delimiter
+    except csv.Error:
+        _LOGGER.debug("Could not sniff delimiter of file: '%s'", filepath)
+    basename = filepath[:-len(".gz")] if filepath.endswith(".gz") else filepath
+    return DELIMITER_BY_EXTENSION.get(
+        os.path.splitext(basename)[1].lower(), default)
+
+
+
+def fingerprint_files(paths):
+    """
+    Fingerprint files by modification time and size, to detect changes.
+
+    :param Iterable[str] paths: paths to the files to fingerprint
+    :return dict[str, (float, int) | NoneType]: modification time and size
+        by file path, null for a path at which no file exists
+    """
+    fingerprints = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            fingerprints[path] = None
+        else:
+            fingerprints[path] = (stat.st_mtime, stat.st_size)
+    return fingerprints
+
+
+
+def get_file_size(filename, stat_cache=None):
     """
     Get size of all files in gigabytes (Gb).
 
     :param str | collections.Iterable[str] filename: A space-separated
         string or list of space-separated strings of absolute file paths.
+    :param StatCache stat_cache: cache through which to stat files, optional
     :return float: size of file(s), in gigabytes.
     """
     if filename is None:
         return float(0)
     if type(filename) is list:
-        return float(sum([get_file_size(x) for x in filename]))
-    try:
-        total_bytes = sum([float(os.stat(f).st_size)
-                           for f in filename.split(" ") if f is not ''])
-    except OSError:
-        # File not found
-        return 0.0
-    else:
-        return float(total_bytes) / (1024 ** 3)
+        return float(sum([get_file_size(x, stat_cache) for x in filename]))
+    if stat_cache is None:
+        stat_cache = StatCache()
+    total_bytes = 0.0
+    for f in filename.split(" "):
+        if f == '':
+            continue
+        stat = stat_cache.stat(f)
+        if stat is None:
+            # File not found
+            return 0.0
+        total_bytes += stat.st_size
+    return float(total_bytes) / (1024 ** 3)
 
 
 
@@ -321,6 +668,42 @@ def standard_stream_redirector(stream):
 
 
 
+def update_file(path, content):
+    """
+    Write to a file, unless the file already holds exactly what's given.
+
+    The content is written to a temporary file that then replaces any
+    previous file, so that a reader never encounters a partially written file.
+
+    :param str path: path to the file to write
+    :param str | bytes content: what the file is to hold; text is encoded
+        as UTF-8
+    :return bool: whether the file was written
+    """
+    if not isinstance(content, bytes):
+        content = content.encode("utf-8")
+    try:
+        if os.path.getsize(path) == len(content):
+            with open(path, 'rb') as f:
+                if f.read() == content:
+                    return False
+    except (IOError, OSError):
+        pass
+    # Unique to this process and thread, as others may write the same file.
+    temp_path = "{}.{}-{}.tmp".format(
+        path, os.getpid(), threading.current_thread().ident)
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        getattr(os, "replace", os.rename)(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+
+
 class CommandChecker(object):
     """
     Validate PATH availability of executables referenced by a config file.
@@ -440,21 +823,1126 @@ class CommandChecker(object):
 
 
 
-def is_command_callable(command, name=""):
+class ExecutableCache(object):
+    """
+    Find the executables that commands name, listing PATH folders just once.
+
+    As by the shell's 'command -v', a name is looked up in the folders of
+    PATH, in order, and a path is checked directly; shell builtins,
+    functions, and aliases aren't considered. What's found for each name
+    holds while PATH and the modification time of each of its folders are
+    unchanged (so each lookup is a stat of each folder), or until the cache
+    is invalidated.
+    """
+
+
+    def __init__(self):
+        super(ExecutableCache, self).__init__()
+        self._listings = {}
+        self._executables = {}
+
+
+    def check(self, commands):
+        """
+        Determine which of several commands can be called.
+
+        :param Iterable[str] commands: commands to check
+        :return Mapping[str, bool]: whether each command can be called
+        """
+        return OrderedDict((c, self.which(c) is not None) for c in commands)
+
+
+    def invalidate(self, commands=None):
+        """
+        Forget what's been found, so that lookups are made anew.
+
+        :param str | Iterable[str] commands: command(s) whose executable
+            to forget; all by default
+        """
+        self._listings.clear()
+        if commands is None:
+            self._executables.clear()
+            return
+        for command in [commands] if isinstance(commands, _STRING_TYPES) \
+                else commands:
+            words = command.split()
+            if words:
+                self._executables.pop(words[0], None)
+
+
+    def which(self, command):
+        """
+        Find the executable that a command would run.
+
+        :param str command: command, the first word of which names or is
+            the path to an executable
+        :return str | NoneType: path to the executable, null if there's none
+        """
+        try:
+            executable = command.split()[0]
+        except (AttributeError, IndexError):
+            return None
+        if os.path.dirname(executable):
+            return executable if _is_executable(executable) else None
+        folders = os.environ.get("PATH", os.defpath).split(os.pathsep)
+        versions = [(folder, _mtime_or_null(folder)) for folder in folders]
+        try:
+            known_versions, found = self._executables[executable]
+        except KeyError:
+            pass
+        else:
+            if known_versions == versions:
+                return found
+        found = None
+        # A file that's not (yet) executable may become so without a change
+        # to its folder, so its absence isn't remembered.
+        remember = True
+        for folder, version in versions:
+            if executable in self._listdir(folder, version):
+                candidate = os.path.join(folder, executable)
+                if _is_executable(candidate):
+                    found = candidate
+                    break
+                remember = False
+        if remember or found is not None:
+            self._executables[executable] = (versions, found)
+        else:
+            self._executables.pop(executable, None)
+        return found
+
+
+    def _listdir(self, folder, version):
+        """ Names in a directory, listed anew once it's modified. """
+        try:
+            known_version, names = self._listings[folder]
+        except KeyError:
+            pass
+        else:
+            if known_version == version:
+                return names
+        try:
+            names = frozenset(os.listdir(folder or os.curdir))
+        except (OSError, ValueError):
+            names = frozenset()
+        self._listings[folder] = (version, names)
+        return names
+
+
+
+# Executables found for this process's commands
+_EXECUTABLES = ExecutableCache()
+
+
+
+class GlobCache(object):
+    """
+    Resolve glob patterns against directory listings, each made just once.
+
+    Results are as for glob.glob (sorted), but each directory is listed only
+    the first time it's needed, so many similar patterns (e.g., a data
+    source template populated for each sample) don't each rescan the same
+    large directories. Listings hold until the cache is invalidated.
+    """
+
+
+    def __init__(self):
+        super(GlobCache, self).__init__()
+        self._listings = {}
+
+
+    def __contains__(self, folder):
+        return folder in self._listings
+
+
+    def glob(self, pattern):
+        """
+        Find the paths that match a glob pattern.
+
+        :param str pattern: glob pattern, e.g. /data/{flowcell}_1*.bam
+        :return list[str]: sorted paths that match the pattern
+        """
+        return sorted(self._iglob(pattern))
+
+
+    def invalidate(self, folders=None):
+        """
+        Forget directory listings, so that they're made anew when next used.
+
+        :param str | Iterable[str] folders: folder(s) whose listing to
+            forget; all by default
+        """
+        if folders is None:
+            self._listings.clear()
+            return
+        for folder in [folders] if isinstance(folders, _STRING_TYPES) \
+                else folders:
+            self._listings.pop(folder, None)
+
+
+    def listdir(self, folder):
+        """
+        List a directory, just once until it's invalidated.
+
+        :param str folder: path to directory; empty for current directory
+        :return list[str]: names in the directory, empty if it can't be listed
+        """
+        try:
+            return self._listings[folder]
+        except KeyError:
+            try:
+                names = os.listdir(folder or os.curdir)
+            except (OSError, ValueError):
+                names = []
+            self._listings[folder] = names
+            return names
+
+
+    def _iglob(self, pathname):
+        """ Generate paths matching a pattern, as glob.iglob does. """
+        dirname, basename = os.path.split(pathname)
+        if not _has_glob_magic(pathname):
+            if basename:
+                if self._exists(dirname, basename):
+                    yield pathname
+            elif os.path.isdir(dirname):
+                yield pathname
+            return
+        if not dirname:
+            for name in self._match(dirname, basename):
+                yield name
+            return
+        if dirname != pathname and _has_glob_magic(dirname):
+            dirs = self._iglob(dirname)
+        else:
+            dirs = [dirname]
+        for folder in dirs:
+            if _has_glob_magic(basename):
+                names = self._match(folder, basename)
+            elif not basename:
+                names = [basename] if os.path.isdir(folder) else []
+            else:
+                names = [basename] if self._exists(folder, basename) else []
+            for name in names:
+                yield os.path.join(folder, name)
+
+
+    def _exists(self, folder, name):
+        """ Determine whether a folder has an entry with the given name. """
+        if name in (os.curdir, os.pardir):
+            return os.path.lexists(os.path.join(folder, name))
+        return name in self.listdir(folder)
+
+
+    def _match(self, folder, pattern):
+        """ Find names in a folder that match a pattern, as glob does. """
+        names = self.listdir(folder)
+        if not pattern.startswith("."):
+            names = [n for n in names if not n.startswith(".")]
+        return fnmatch.filter(names, pattern)
+
+
+
+class LocalExecutor(object):
+    """
+    Run submission scripts on this machine, several at once.
+
+    Jobs start in the order submitted, as soon as the cores and memory
+    (in megabytes) that each requests are free, so that the machine is
+    packed without being oversubscribed; a job that requests more than the
+    machine has runs alone. A job may also wait for others to complete.
+    Each job's status is one of the FLAGS: waiting, running, completed, or
+    failed (by nonzero exit code, or failure to launch or of a job on
+    which it depends).
+    """
+
+
+    def __init__(self, cores=None, mem=None, submission_command="sh"):
+        """
+        Executor is bounded by the given resources, or the machine's.
+
+        :param int cores: number of cores to use, by default all of them
+        :param int | str mem: memory to use, by default all of it (if it
+            can be determined), e.g. 64000 or '64G'
+        :param str submission_command: command with which to run each
+            submission script
+        """
+        super(LocalExecutor, self).__init__()
+        self.cores = int(cores or multiprocessing.cpu_count())
+        self.mem = _total_memory() if mem is None else _megabytes(mem)
+        self.submission_command = submission_command
+        self._jobs = OrderedDict()
+        self._queue = []
+        self._cores_used = 0
+        self._mem_used = 0
+        self._finished = threading.Condition()
+
+
+    def exit_code(self, name):
+        """
+        Fetch the exit code of a finished job.
+
+        :param str name: name of the job
+        :return int | NoneType: the job's exit code, null if it's not
+            finished or never ran
+        :raises KeyError: if no job has the given name
+        """
+        return self._jobs[name].exit_code
+
+
+    def status(self, name):
+        """
+        Fetch the status of a job.
+
+        :param str name: name of the job
+        :return str: the job's status, one of FLAGS
+        :raises KeyError: if no job has the given name
+        """
+        return self._jobs[name].status
+
+
+    def submit(self, script, name=None, resources=None, after=None):
+        """
+        Queue a submission script to run.
+
+        :param str script: path to the submission script
+        :param str name: name of the job, by default the script's path
+        :param Mapping resources: resource package for the job (as from
+            PipelineInterface.choose_resource_package), the cores and mem
+            of which are those that the job requests; by default, one core
+        :param Iterable[str] after: name(s) of job(s) that must complete
+            before this one may start
+        :return str: the name of the job
+        :raises ValueError: if a job of the given name is already waiting or
+            running, or if the job depends on one that's unknown
+        """
+        name = name or script
+        resources = resources or {}
+        after = tuple(after or ())
+        with self._finished:
+            job = self._jobs.get(name)
+            if job is not None and job.status in (_WAITING, _RUNNING):
+                raise ValueError("Job '{}' is already {}".format(
+                        name, job.status))
+            unknown = [n for n in after if n not in self._jobs]
+            if unknown:
+                raise ValueError("Job '{}' depends on unknown job(s): {}".
+                                 format(name, ", ".join(unknown)))
+            cores = int(resources.get("cores") or 1)
+            mem = _megabytes(resources.get("mem") or 0)
+            if cores > self.cores or (self.mem and mem > self.mem):
+                _LOGGER.warning(
+                        "Job '%s' requests %d cores and %d MB, more than the "
+                        "%d cores and %s MB available; it will run alone",
+                        name, cores, mem, self.cores, self.mem)
+            job = _LocalJob(name, script, min(cores, self.cores),
+                            min(mem, self.mem) if self.mem else mem, after)
+            self._jobs[name] = job
+            self._queue.append(job)
+        return name
+
+
+    def wait(self):
+        """
+        Run queued jobs, returning once all have finished.
+
+        :return Mapping[str, str]: status of each job, by name
+        """
+        with self._finished:
+            while True:
+                progressed = self._start_ready()
+                running = any(j.status == _RUNNING
+                              for j in self._jobs.values())
+                if not self._queue and not running:
+                    break
+                if running:
+                    self._finished.wait()
+                elif not progressed:
+                    # Nothing's running to free a queued job, e.g. one
+                    # that's resubmitted on a job depending on it.
+                    for job in self._queue:
+                        _LOGGER.warning("Job '%s' won't run; jobs on which "
+                                        "it depends can't run", job.name)
+                        job.status = _FAILED
+                    self._queue = []
+            return OrderedDict((n, j.status) for n, j in self._jobs.items())
+
+
+    def _start_ready(self):
+        """
+        Start each queued job that may run now, in the order queued.
+
+        :return bool: whether any queued job started or failed
+        """
+        queued = len(self._queue)
+        waiting = []
+        for job in self._queue:
+            upstream = [self._jobs[n].status for n in job.after]
+            if _FAILED in upstream:
+                _LOGGER.warning("Job '%s' won't run; a job on which it "
+                                "depends failed", job.name)
+                job.status = _FAILED
+            elif any(s != _COMPLETED for s in upstream) or \
+                    not self._fits(job):
+                waiting.append(job)
+            else:
+                self._start(job)
+        self._queue = waiting
+        return len(waiting) < queued
+
+
+    def _fits(self, job):
+        """ Determine whether there are cores and memory free for a job. """
+        return self._cores_used + job.cores <= self.cores and \
+               (not self.mem or self._mem_used + job.mem <= self.mem)
+
+
+    def _start(self, job):
+        """ Launch a job, with a thread to await its finish. """
+        command = self.submission_command.split() + [job.script]
+        _LOGGER.info("Running job '%s' (%d cores, %d MB): %s", job.name,
+                     job.cores, job.mem, " ".join(command))
+        try:
+            process = sp.Popen(command)
+        except OSError as e:
+            _LOGGER.error("Failed to launch job '%s': %s", job.name, e)
+            job.status = _FAILED
+            return
+        job.status = _RUNNING
+        self._cores_used += job.cores
+        self._mem_used += job.mem
+        thread = threading.Thread(target=self._await, args=(job, process))
+        thread.daemon = True
+        thread.start()
+
+
+    def _await(self, job, process):
+        """ Record a job's exit, freeing its resources for others. """
+        exit_code = process.wait()
+        with self._finished:
+            job.exit_code = exit_code
+            job.status = _COMPLETED if exit_code == 0 else _FAILED
+            self._cores_used -= job.cores
+            self._mem_used -= job.mem
+            _LOGGER.info("Job '%s' %s (exit code %d)",
+                         job.name, job.status, exit_code)
+            self._finished.notify_all()
+
+
+
+class StatCache(object):
+    """
+    Filesystem stat results by path, so that each path is stat'd just once.
+
+    Paths may be stat'd in bulk, concurrently; this pays off on network
+    filesystems, where each stat is a round trip. Results hold until the
+    cache is explicitly invalidated.
+    """
+
+
+    def __init__(self):
+        super(StatCache, self).__init__()
+        self._stats = {}
+
+
+    def __contains__(self, path):
+        return path in self._stats
+
+
+    def __len__(self):
+        return len(self._stats)
+
+
+    def exists(self, path):
+        """
+        Determine whether a file or folder exists at the given path.
+
+        :param str path: path to check
+        :return bool: whether the path exists
+        """
+        return self.stat(path) is not None
+
+
+    def invalidate(self, paths=None):
+        """
+        Forget stat results, so that paths are stat'd anew when next used.
+
+        :param str | Iterable[str] paths: path(s) to forget; all by default
+        """
+        if paths is None:
+            self._stats.clear()
+            return
+        for path in [paths] if isinstance(paths, _STRING_TYPES) else paths:
+            self._stats.pop(path, None)
+
+
+    def prefetch(self, paths, processes=1):
+        """
+        Stat each of the given paths that's not yet cached.
+
+        :param Iterable[str] paths: paths to stat
+        :param int processes: number of paths to stat at once; null for
+            number of CPUs
+        :return StatCache: this instance, with all given paths cached
+        """
+        paths = [p for p in set(paths) if p not in self._stats]
+        if processes == 1 or len(paths) < 2:
+            for path in paths:
+                self.stat(path)
+            return self
+        pool = ThreadPool(processes)
+        try:
+            stats = pool.map(_stat_or_null, paths)
+        finally:
+            pool.close()
+            pool.join()
+        self._stats.update(zip(paths, stats))
+        return self
+
+
+    def stat(self, path):
+        """
+        Stat a path, just once until it's invalidated.
+
+        :param str path: path to stat
+        :return os.stat_result | NoneType: result of stat, null if nothing
+            exists at the path
+        """
+        try:
+            return self._stats[path]
+        except KeyError:
+            result = self._stats[path] = _stat_or_null(path)
+            return result
+
+
+
+class SubmissionTemplate(object):
+    """
+    Submission script template, parsed just once to fill for many jobs.
+
+    A template's fields are upper-case names in braces, e.g. {CORES}, each
+    filled with the value of the same name, insensitive to case. A field
+    without a value is left as it is, and a shell variable in braces, e.g.
+    ${HOME}, isn't a field.
+    """
+
+
+    def __init__(self, text):
+        """
+        Template is parsed into its literal text and its fields.
+
+        :param str text: content of the template
+        """
+        super(SubmissionTemplate, self).__init__()
+        self.text = text
+        # Literal text at even positions, interleaved with field names
+        self._parts = _TEMPLATE_FIELD_PATTERN.split(text)
+
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Read a template from a file.
+
+        :param str path: path to the template file
+        :return SubmissionTemplate: the template in the file
+        """
+        with open(path, 'r') as f:
+            return cls(f.read())
+
+
+    @property
+    def fields(self):
+        """
+        Names of the template's fields, in order of first appearance.
+
+        :return list[str]: names of the template's fields
+        """
+        return list(OrderedDict.fromkeys(self._parts[1::2]))
+
+
+    def render(self, values):
+        """
+        Fill the template's fields.
+
+        :param Mapping values: value for each field, by name
+        :return str: the template, with each field that has a value filled
+        """
+        values = {str(k).upper(): v for k, v in values.items()}
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            try:
+                parts[i] = str(values[parts[i]])
+            except KeyError:
+                parts[i] = "{" + parts[i] + "}"
+        return "".join(parts)
+
+
+
+class _LocalJob(object):
+    """ A submission script for LocalExecutor to run, and its status. """
+
+    def __init__(self, name, script, cores, mem, after):
+        self.name = name
+        self.script = script
+        self.cores = cores
+        self.mem = mem
+        self.after = after
+        self.status = _WAITING
+        self.exit_code = None
+
+
+
+class _SourceModule(object):
+    """ Top-level name bindings of a Python source file, as parsed. """
+
+    def __init__(self, path):
+        """
+        Parse a Python source file.
+
+        :param str path: absolute path to the file
+        :raise SyntaxError: if the file isn't valid Python source
+        """
+        with open(path, 'rb') as source:
+            tree = ast.parse(source.read(), path)
+        self.path = path
+        self.package_folder = os.path.dirname(path)
+        self.star_imports = []
+        self._bindings = OrderedDict()
+        self._position = 0
+        # Depth within blocks that may or may not run, e.g. an if's branch
+        self._conditional = 0
+        self._bind_statements(tree.body)
+        # Names that a function may rebind in the module when it's called
+        self._global_names = {name for node in ast.walk(tree)
+                              if isinstance(node, ast.Global)
+                              for name in node.names}
+
+
+    def binding(self, name, position=None):
+        """
+        Fetch what a name is bound to.
+
+        :param str name: name to look up
+        :param int position: statement before which the binding is
+            established, optional; the final binding is used by default
+        :return (int, tuple) | NoneType: statement position of the binding,
+            and the binding itself, or null if the name's unbound; a name
+            bound by a block that may or may not run, or by a function
+            (as global), is of unknown binding
+        """
+        if name in self._global_names:
+            return 0, ("unknown", )
+        for bound_at, binding in reversed(self._bindings.get(name, [])):
+            if position is None or bound_at < position:
+                return bound_at, binding
+        return None
+
+
+    def names(self):
+        """
+        Names that the module binds itself, i.e., not by star import.
+
+        :return list[str]: names bound in the module, in order of first
+            binding
+        """
+        return list(self._bindings.keys()) + \
+            sorted(n for n in self._global_names if n not in self._bindings)
+
+
+    def _bind(self, name, binding):
+        if self._conditional:
+            binding = ("unknown", )
+        self._bindings.setdefault(name, []).append((self._position, binding))
+
+
+    def _bind_alternatives(self, statements):
+        """ Record bindings by statements that may or may not run. """
+        self._conditional += 1
+        try:
+            self._bind_statements(statements)
+        finally:
+            self._conditional -= 1
+
+
+    def _bind_statements(self, statements):
+        """ Record the name bindings established by some statements. """
+        for node in statements:
+            self._position += 1
+            if isinstance(node, ast.ClassDef):
+                self._bind(node.name, ("class", node))
+            elif isinstance(node, _FUNCTION_NODES):
+                # A decorator may make of a function something else.
+                self._bind(node.name, ("unknown", ) if node.decorator_list
+                           else ("other", ))
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self._bind(alias.asname, ("import", alias.name))
+                    else:
+                        top = alias.name.split(".")[0]
+                        self._bind(top, ("import", top))
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    if alias.name == "*":
+                        self.star_imports.append(
+                                (self._position, node.module, node.level))
+                    else:
+                        self._bind(alias.asname or alias.name,
+                                   ("from", node.module, node.level,
+                                    alias.name))
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    for name in _target_names(target):
+                        self._bind(name, _assigned(target, node.value))
+            elif isinstance(node, ast.If):
+                if _is_main_check(node.test):
+                    # Just the alternative runs when the module's imported.
+                    self._bind_statements(node.orelse)
+                else:
+                    self._bind_alternatives(node.body)
+                    self._bind_alternatives(node.orelse)
+            elif isinstance(node, _TRY_NODES):
+                self._bind_statements(node.body)
+                for handler in getattr(node, "handlers", []):
+                    self._bind_alternatives(handler.body)
+                self._bind_alternatives(getattr(node, "orelse", []))
+                self._bind_statements(getattr(node, "finalbody", []))
+            elif isinstance(node, _LOOP_NODES):
+                self._conditional += 1
+                try:
+                    for name in _target_names(getattr(node, "target", None)):
+                        self._bind(name, ("other", ))
+                    self._bind_statements(node.body)
+                    self._bind_statements(node.orelse)
+                finally:
+                    self._conditional -= 1
+            elif isinstance(node, _WITH_NODES):
+                items = getattr(node, "items", None) or [node]
+                for item in items:
+                    if item.optional_vars is not None:
+                        for name in _target_names(item.optional_vars):
+                            self._bind(name, ("unknown", ))
+                self._bind_statements(node.body)
+            elif getattr(node, "target", None) is not None:
+                # Augmented or annotated assignment
+                value = getattr(node, "value", None)
+                for name in _target_names(node.target):
+                    self._bind(name, ("other", ) if value is None
+                               else _assigned(node.target, value,
+                                              isinstance(node, ast.AugAssign)))
+
+
+
+class _SubclassResolver(object):
+    """
+    Resolver of names in Python source to subclasses of a type, statically.
+
+    What a name resolves to is represented as a pair: the kind of value
+    (_IMPORTED, _SOURCE_MODULE, _SOURCE_CLASS, _OTHER, or _UNKNOWN) and
+    the value itself (an object, a _SourceModule, or a class definition with
+    its module and position).
+    """
+
+    def __init__(self, supertype):
+        """
+        :param type supertype: type of which to find subclasses
+        """
+        self.supertype = supertype
+        self._subclass_by_class = {}
+
+
+    def source_module(self, path):
+        """
+        Parse a module's source, just once for each version of its file.
+
+        :param str path: absolute path to a Python source file
+        :return _SourceModule | NoneType: the parsed module, or null if the
+            file can't be read or parsed
+        """
+        try:
+            stat = os.stat(path)
+            version = (getattr(stat, "st_mtime_ns", stat.st_mtime),
+                       stat.st_size)
+            cached_version, module = _SOURCE_MODULES[path]
+        except (OSError, ValueError):
+            return None
+        except KeyError:
+            pass
+        else:
+            if cached_version == version:
+                return module
+        try:
+            module = _SourceModule(path)
+        except (IOError, OSError, SyntaxError, TypeError, ValueError) as e:
+            _LOGGER.debug("Can't parse '%s': %r", path, e)
+            module = None
+        _SOURCE_MODULES.pop(path, None)
+        _SOURCE_MODULES[path] = (version, module)
+        while len(_SOURCE_MODULES) > MAX_SOURCE_MODULES:
+            _SOURCE_MODULES.popitem(last=False)
+        return module
+
+
+    def module(self, name, level=0, importer=None):
+        """
+        Find a module to import, without importing it.
+
+        :param str name: (dotted) name of the module, possibly relative
+        :param int level: number of leading dots of a relative import
+        :param _SourceModule importer: module doing a relative import
+        :return (object, object): what the module resolves to; unknown if it
+            can't be found as Python source
+        """
+        found = self._find_module(name, level, importer)
+        return (_UNKNOWN, None) if found is None else found
+
+
+    def _find_module(self, name, level=0, importer=None):
+        """ Resolve a module to import, null if it's not found at all. """
+        parts = name.split(".") if name else []
+        if level:
+            folder = importer.package_folder
+            for _ in range(level - 1):
+                folder = os.path.dirname(folder)
+            roots = [folder]
+        else:
+            try:
+                module = sys.modules[name]
+            except KeyError:
+                pass
+            else:
+                if module is not None:
+                    return _IMPORTED, module
+            roots = [p or os.getcwd() for p in sys.path
+                     if isinstance(p, str)]
+        for root in roots:
+            base = os.path.join(root, *parts)
+            for path in [base + ".py", os.path.join(base, "__init__.py")]:
+                if os.path.isfile(path):
+                    module = self.source_module(path)
+                    return (_UNKNOWN, None) if module is None \
+                        else (_SOURCE_MODULE, module)
+            if os.path.isdir(base) or any(
+                    os.path.isfile(base + ext) for ext in _EXTENSION_SUFFIXES):
+                # Namespace package or extension module, without source
+                return _UNKNOWN, None
+        # Import would fail.
+        return None
+
+
+    def attribute(self, value, name, position=None):
+        """
+        Resolve an attribute of a value, e.g. a name in a module.
+
+        :param (object, object) | _SourceModule value: resolved value, or
+            module in which to look up a name
+        :param str name: name of the attribute
+        :param int position: statement before which a name in a module is
+            looked up, optional
+        :return (object, object): what the attribute resolves to
+        """
+        if isinstance(value, _SourceModule):
+            value = (_SOURCE_MODULE, value)
+        kind, obj = value
+        if kind is _SOURCE_MODULE:
+            if obj.binding(name) is None and \
+                    os.path.basename(obj.path) == "__init__.py":
+                submodule = self._find_module(name, 1, obj)
+                if submodule is not None:
+                    return submodule
+            return self._module_name(obj, name, position)
+        if kind is _IMPORTED:
+            try:
+                return _IMPORTED, getattr(obj, name)
+            except AttributeError:
+                if not inspect.ismodule(obj):
+                    return _OTHER, None
+                return self.module("{}.{}".format(obj.__name__, name))
+            except Exception:
+                return _UNKNOWN, None
+        return (_OTHER, None) if kind is _OTHER else (_UNKNOWN, None)
+
+
+    def class_name(self, value):
+        """ Name of a resolved class. """
+        kind, obj = value
+        return obj.__name__ if kind is _IMPORTED else obj[0].name
+
+
+    def is_subclass(self, value):
+        """
+        Determine whether a resolved value is a subclass of the supertype.
+
+        :param (object, object) value: resolved value
+        :return bool | NoneType: whether the value is a subclass of the
+            supertype (the supertype itself included), null if that can't
+            be determined statically
+        """
+        kind, obj = value
+        if kind is _IMPORTED:
+            return inspect.isclass(obj) and issubclass(obj, self.supertype)
+        if kind is _SOURCE_CLASS:
+            node, module, position = obj
+            key = (module.path, position)
+            try:
+                return self._subclass_by_class[key]
+            except KeyError:
+                # Placeholder protects against cyclic definitions.
+                self._subclass_by_class[key] = None
+            result = False
+            for base in node.bases:
+                base_is_subclass = self.is_subclass(
+                        self._expression(module, base, position))
+                if base_is_subclass:
+                    result = True
+                    break
+                if base_is_subclass is None:
+                    result = None
+            self._subclass_by_class[key] = result
+            return result
+        if kind is _UNKNOWN:
+            return None
+        return False
+
+
+    def member_names(self, module, seen=None):
+        """
+        Names of a module's members, including those star-imported.
+
+        :param _SourceModule module: module of which to name members
+        :param set[str] seen: paths of modules already considered
+        :return list[str] | NoneType: names of the module's members, null if
+            a star import's names can't be determined statically
+        """
+        seen = seen or set()
+        seen.add(module.path)
+        names = module.names()
+        for _, name, level in module.star_imports:
+            star_names = self._star_names(
+                    self.module(name, level, module), seen)
+            if star_names is None:
+                return None
+            names.extend(n for n in star_names if n not in names)
+        return names
+
+
+    def _star_names(self, value, seen):
+        """ Names that a star import of a (resolved) module provides. """
+        kind, obj = value
+        if kind is _IMPORTED:
+            return list(getattr(obj, "__all__", [
+                n for n in dir(obj) if not n.startswith("_")]))
+        if kind is _SOURCE_MODULE:
+            if obj.path in seen:
+                return []
+            names = self.member_names(obj, seen)
+            return None if names is None else \
+                [n for n in names if not n.startswith("_")]
+        return None
+
+
+    def _module_name(self, module, name, position=None):
+        """ Resolve a name in a module's source. """
+        bound = module.binding(name, position)
+        if bound is None:
+            for at, star_name, level in reversed(module.star_imports):
+                if position is not None and at >= position:
+                    continue
+                star_module = self.module(star_name, level, module)
+                star_names = self._star_names(star_module, {module.path})
+                if star_names is None:
+                    return _UNKNOWN, None
+                if name in star_names:
+                    return self.attribute(star_module, name)
+            try:
+                return _IMPORTED, getattr(builtins, name)
+            except AttributeError:
+                # Reference would fail.
+                return _OTHER, None
+        position, binding = bound
+        kind = binding[0]
+        if kind == "unknown":
+            return _UNKNOWN, None
+        if kind == "class":
+            return _SOURCE_CLASS, (binding[1], module, position)
+        if kind == "expression":
+            return self._expression(module, binding[1], position)
+        if kind == "import":
+            return self.module(binding[1])
+        if kind == "from":
+            _, module_name, level, imported = binding
+            return self.attribute(
+                    self.module(module_name, level, module), imported)
+        return _OTHER, None
+
+
+    def _expression(self, module, node, position):
+        """ Resolve a (name or attribute) expression in a module's source. """
+        if isinstance(node, ast.Name):
+            return self._module_name(module, node.id, position)
+        if isinstance(node, ast.Attribute):
+            return self.attribute(
+                    self._expression(module, node.value, position), node.attr)
+        return _UNKNOWN, None
+
+# Parsed Python source modules, with file version, by path
+_SOURCE_MODULES = OrderedDict()
+
+# Kinds of value to which a name in Python source may resolve
+_IMPORTED, _SOURCE_MODULE, _SOURCE_CLASS, _OTHER, _UNKNOWN = \
+    "imported", "source module", "source class", "other", "unknown"
+
+# Statuses of jobs run by LocalExecutor
+_COMPLETED, _RUNNING, _FAILED, _WAITING = FLAGS[:4]
+
+# Megabytes per unit of memory, as in a resource package's mem
+_MEGABYTES_PER_UNIT = {"K": 1.0 / 1024, "M": 1, "G": 1024, "T": 1024 ** 2}
+_MEMORY_PATTERN = re.compile(
+        r"^(\d+(?:\.\d*)?)\s*([KMGT]?)B?$", re.IGNORECASE)
+
+# Field of a submission template, e.g. {CORES}, but not ${CORES}
+_TEMPLATE_FIELD_PATTERN = re.compile(r"(?<!\$)\{([A-Z][A-Z0-9_]*)\}")
+
+# Kinds of statement that bind names, by syntax tree node types
+_FUNCTION_NODES, _TRY_NODES, _LOOP_NODES, _WITH_NODES = [
+    tuple(getattr(ast, n) for n in names if hasattr(ast, n)) for names in
+    [("FunctionDef", "AsyncFunctionDef"),
+     ("Try", "TryStar", "TryExcept", "TryFinally"),
+     ("For", "AsyncFor", "While"), ("With", "AsyncWith")]]
+
+# Kinds of expression whose value isn't a class, by syntax tree node types
+_LITERAL_NODES = tuple(getattr(ast, n) for n in [
+    "Constant", "Num", "Str", "Bytes", "NameConstant", "JoinedStr", "List",
+    "Tuple", "Dict", "Set", "ListComp", "SetComp", "DictComp", "GeneratorExp",
+    "Lambda"] if hasattr(ast, n))
+
+
+
+def _has_glob_magic(path):
+    """ Determine whether a path has glob pattern characters. """
+    return any(c in path for c in "*?[")
+
+
+
+def _is_executable(path):
+    """ Determine whether a path is to an executable file. """
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+
+def _is_main_check(test):
+    """ Determine whether a condition is the check for running as main. """
+    if not (isinstance(test, ast.Compare) and
+            isinstance(test.left, ast.Name) and test.left.id == "__name__"
+            and len(test.comparators) == 1):
+        return False
+    comparand = test.comparators[0]
+    if isinstance(comparand, getattr(ast, "Constant", ())):
+        return comparand.value == "__main__"
+    return getattr(comparand, "s", None) == "__main__"
+
+
+
+def _megabytes(mem):
+    """
+    Amount of memory in megabytes, from a number of them or text with units.
+
+    :param int | float | str mem: amount of memory, e.g. 8000, '8000',
+        '8000M', or '8G'
+    :return int: amount of memory in megabytes, rounded up
+    :raises ValueError: if the amount of memory can't be interpreted
+    """
+    match = _MEMORY_PATTERN.match(str(mem).strip())
+    if not match:
+        raise ValueError("Invalid amount of memory: {}".format(mem))
+    number, unit = match.groups()
+    return int(math.ceil(
+            float(number) * _MEGABYTES_PER_UNIT[(unit or "M").upper()]))
+
+
+
+def _mtime_or_null(path):
+    """
+    Modification time of a path, tolerating its nonexistence.
+
+    :param str path: path of which to get the modification time
+    :return int | float | NoneType: modification time (in nanoseconds where
+        available), null if nothing exists at the path
+    """
+    st = _stat_or_null(path or os.curdir)
+    return None if st is None else getattr(st, "st_mtime_ns", st.st_mtime)
+
+
+
+def _stat_or_null(path):
+    """
+    Stat a path, tolerating its nonexistence.
+
+    :param str path: path to stat
+    :return os.stat_result | NoneType: result of stat, null if nothing
+        exists at the path
+    """
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+
+def _assigned(target, value, augmented=False):
+    """
+    Binding of a name by an assignment.
+
+    :param ast.AST target: target of the assignment
+    :param ast.AST value: value assigned
+    :param bool augmented: whether the assignment's augmented, e.g. +=
+    :return tuple: binding to an expression that can be resolved, to a value
+        that's not a class, or else to an unknown value, e.g. of a call
+    """
+    if isinstance(target, ast.Name):
+        if isinstance(value, _LITERAL_NODES):
+            return "other",
+        if not augmented and isinstance(value, (ast.Name, ast.Attribute)):
+            return "expression", value
+    return "unknown",
+
+
+
+def _target_names(target):
+    """ Names bound by an assignment target. """
+    if isinstance(target, ast.Name):
+        return [target.id]
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return [n for t in target.elts for n in _target_names(t)]
+    if isinstance(target, getattr(ast, "Starred", ())):
+        return _target_names(target.value)
+    return []
+
+
+
+def _total_memory():
+    """ This machine's physical memory in megabytes, null if unknown. """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") \
+               // 1024 ** 2
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+
+def is_command_callable(command, name="", executables=None):
     """
     Check if command can be called.
 
     :param str command: actual command to call
     :param str name: nickname/alias by which to reference the command, optional
-    :return bool: whether given command's call succeeded
+    :param ExecutableCache executables: cache through which to find the
+        command's executable, optional; the process's by default
+    :return bool: whether given command can be called
     """
-
-    # Use `command` to see if command is callable, store exit code
-    code = os.system(
-        "command -v {0} >/dev/null 2>&1 || {{ exit 1; }}".format(command))
-
-    if code != 0:
+    callable_ = (executables or _EXECUTABLES).which(command) is not None
+    if not callable_:
         alias_value = " ('{}') ".format(name) if name else " "
         _LOGGER.debug("Command '{0}' is not callable: {1}".
                       format(alias_value, command))
-    return not bool(code)
+    return callable_
@@ -447,6 +447,48 @@ class AttributeDictItemAccessTests:
         assert getattr(ad, getter)("self_reporter") == "self_reporter"
 
 
+    @pytest.mark.parametrize(argnames="identity", argvalues=[False, True])
+    def test_metadata_apart_from_data(self, identity):
+        """ Metadata flags aren't among the keys, but are still accessible. """
+        ad = AttributeDict({"a": 1, "b": {"c": 2}},
+                           _attribute_identity=identity)
+        assert ["a", "b"] == sorted(ad)
+        assert 2 == len(ad)
+        assert identity is ad._attribute_identity
+        assert ad._force_nulls is False
+        assert "_force_nulls" not in ad.__dict__
+        ad._force_nulls = True
+        assert ad._force_nulls
+        assert ["a", "b"] == sorted(ad)
+        assert 2 == len(ad)
+        ad._force_nulls = False
+        assert all(n not in ad.__dict__ for n in ATTRDICT_METADATA
+                   if not getattr(ad, n))
+
+
+    @pytest.mark.parametrize(
+            argnames=["identity", "item", "expected"],
+            argvalues=[(False, "a", True), (False, "missing", False),
+                       (False, "keys", True), (False, 1, False),
+                       (True, "missing", True), (True, "__missing__", False)])
+    def test_membership(self, identity, item, expected):
+        """ Membership agrees with item access. """
+        ad = AttributeDict({"a": 1}, _attribute_identity=identity)
+        assert expected is (item in ad)
+
+
+    @pytest.mark.parametrize(argnames="force_nulls", argvalues=[False, True])
+    def test_copy_keeps_metadata(self, force_nulls):
+        """ A copy has the original's metadata. """
+        ad = AttributeDict({"a": 1}, _force_nulls=force_nulls,
+                           _attribute_identity=True)
+        for duplicate in [deepcopy(ad), pickle.loads(pickle.dumps(ad))]:
+            assert ad == duplicate
+            assert force_nulls is duplicate._force_nulls
+            assert duplicate._attribute_identity
+            assert ["a"] == list(duplicate)
+
+
 
 class AttributeDictSerializationTests:
     """ Tests for AttributeDict serialization. """
@@ -1,5 +1,6 @@
 """ Tests for PipelineInterface ADT. """
 
+from collections import OrderedDict
 import copy
 import inspect
 import itertools
@@ -123,6 +124,17 @@ def test_unconfigured_pipeline_exception(
 
 
 
+@pytest.mark.parametrize(argnames="file_format", argvalues=[None, "json"])
+def test_sample_file_format(basic_pipe_iface_data, file_format):
+    """ A pipeline may select the format of the Sample files it reads. """
+    if file_format:
+        basic_pipe_iface_data["ATACseq.py"]["sample_file_format"] = file_format
+    pi = PipelineInterface(basic_pipe_iface_data)
+    assert file_format == pi.get_sample_file_format("ATACseq.py")
+    assert pi.get_sample_file_format("WGBS.py") is None
+
+
+
 class PipelineInterfaceNameResolutionTests:
     """ Name is explicit or inferred from key. """
 
@@ -334,6 +346,44 @@ class PipelineInterfaceResourcePackageTests:
                 pi.choose_resource_package(pipe_name, random.randrange(0, 10))
 
 
+    def test_batch_selection_matches_single(
+            self, use_new_file_size, pi_with_resources, midsize_resources):
+        """ Packages chosen for many file sizes at once are as for each. """
+        for pipe_data in pi_with_resources.pipelines:
+            pipe_data["resources"]["midsize"] = midsize_resources
+        file_sizes = [64, 0, 4, 16, 0.5, 1000]
+        for pipe_name in pi_with_resources.pipeline_names:
+            observed = pi_with_resources.choose_resource_packages(
+                    pipe_name, file_sizes)
+            expected = [pi_with_resources.choose_resource_package(
+                    pipe_name, size) for size in file_sizes]
+            assert expected == observed
+        with pytest.raises(ValueError):
+            pi_with_resources.choose_resource_packages(pipe_name, [1, -1])
+
+
+    def test_packages_ordered_until_changed(
+            self, use_new_file_size, pi_with_resources, midsize_resources):
+        """ Packages are ordered once, then again when they change. """
+        pipe_name = list(pi_with_resources.pipeline_names)[0]
+        resources = pi_with_resources[pipe_name]["resources"]
+        assert resources["huge"] is \
+                pi_with_resources.choose_resource_package(pipe_name, 64)
+        # An edit in place takes effect when selection is invalidated.
+        resources["huge"]["min_file_size"] = 1000
+        resources["huge"].pop("file_size", None)
+        with mock.patch("pep.models.sorted", create=True) as sort:
+            pi_with_resources.choose_resource_package(pipe_name, 64)
+        sort.assert_not_called()
+        pi_with_resources.invalidate_resources(pipe_name)
+        assert resources["default"] is \
+                pi_with_resources.choose_resource_package(pipe_name, 64)
+        # A package added is considered without invalidation.
+        resources["midsize"] = midsize_resources
+        assert resources["midsize"] is \
+                pi_with_resources.choose_resource_package(pipe_name, 64)
+
+
 
 class ConstructorPathParsingTests:
     """ The constructor is responsible for expanding pipeline path(s). """
@@ -459,3 +509,80 @@ class PipelineInterfaceArgstringTests:
 class PipelineInterfaceLooperArgsTests:
     """  """
     pass
+
+
+
+class ArgumentStringTests:
+    """ Pipeline arguments are made from a sample's attributes. """
+
+    PIPELINE = "ATACseq.py"
+
+
+    @pytest.fixture(scope="function")
+    def pi(self, basic_pipe_iface_data):
+        """ Provide a PipelineInterface with required and optional args. """
+        pipe_data = basic_pipe_iface_data[self.PIPELINE]
+        pipe_data["arguments"] = OrderedDict(
+                [("--sample-name", "sample_name"), ("--flag", None),
+                 ("--input", "data_path"), ("--config", "yaml_file")])
+        pipe_data["optional_arguments"] = OrderedDict(
+                [("--genome", "genome"), ("--ignored", None)])
+        return PipelineInterface(basic_pipe_iface_data)
+
+
+    @staticmethod
+    def _samples(**extra_data):
+        return [Sample(dict(extra_data, sample_name=name,
+                            data_path=name + ".bam", yaml_file=None))
+                for name in ["s1", "s2"]]
+
+
+    def test_arg_strings_and_argv(self, pi):
+        """ Arguments are in order; null or missing optional ones skipped. """
+        samples = self._samples()
+        samples[1].genome = "hg38"
+        samples[0].data_path = ""
+        observed = pi.get_arg_strings(self.PIPELINE, samples, "sub")
+        assert [" --sample-name s1 --flag --config sub/s1.yaml",
+                " --sample-name s2 --flag --input s2.bam "
+                "--config sub/s2.yaml --genome hg38"] == observed
+        assert observed[1] == pi.get_arg_string(
+                self.PIPELINE, samples[1], "sub")
+        assert ["--sample-name", "s2", "--flag", "--input", "s2.bam",
+                "--config", "sub/s2.yaml", "--genome", "hg38"] == \
+            pi.get_arg_strings(self.PIPELINE, samples, "sub", as_argv=True)[1]
+
+
+
+    def test_null_replacement(self, pi):
+        """ A null attribute's replacement is used in its place. """
+        sample = self._samples(genome=None)[0]
+        assert " --sample-name s1 --flag --input s1.bam --config conf.yaml" \
+            == pi.get_arg_string(self.PIPELINE, sample, yaml_file="conf.yaml")
+        with pytest.raises(ValueError):
+            pi.get_arg_string(self.PIPELINE,
+                              Sample({"sample_name": "s3", "data_path": None}))
+
+
+    def test_missing_attributes_reported_together(self, pi):
+        """ Each sample lacking a required attribute is named. """
+        samples = self._samples()
+        for s in samples:
+            del s["data_path"]
+        with pytest.raises(AttributeError) as error:
+            pi.get_arg_strings(self.PIPELINE, samples)
+        assert ["s1", "s2"] == list(error.value.missing)
+        assert "'data_path' (for '--input')" in str(error.value)
+
+
+    def test_arguments_read_until_changed(self, pi):
+        """ Arguments are read once, then again when they change. """
+        sample = self._samples()[0]
+        arguments = pi[self.PIPELINE]["arguments"]
+        before = pi.get_arg_string(self.PIPELINE, sample)
+        arguments["--flag"] = "data_path"
+        assert before == pi.get_arg_string(self.PIPELINE, sample)
+        pi.invalidate_arguments(self.PIPELINE)
+        assert "--flag s1.bam" in pi.get_arg_string(self.PIPELINE, sample)
+        arguments["--new"] = None
+        assert pi.get_arg_string(self.PIPELINE, sample).endswith("--new")
@@ -3,13 +3,14 @@
 import copy
 import logging
 import os
+import pickle
 import mock
 import pytest
 import yaml
 import pep
 from pep.models import \
-        AttributeDict, Project, Sample, _MissingMetadataException, \
-        SAMPLE_ANNOTATIONS_KEY, SAMPLE_NAME_COLNAME
+        AttributeDict, Project, Sample, SampleView, \
+        _MissingMetadataException, SAMPLE_ANNOTATIONS_KEY, SAMPLE_NAME_COLNAME
 
 
 __author__ = "Vince Reuter"
@@ -168,6 +169,35 @@ class ProjectConstructorTests:
             assert all([Sample == type(s) for s in p._samples])
 
 
+    def test_lazy_samples_built_on_demand(
+            self, path_project_conf, path_sample_anns):
+        """ With deferred construction, only requested Samples are built. """
+        p = Project(path_project_conf, defer_sample_construction=True)
+        samples = p.samples
+        assert 0 == samples.num_built
+        assert p.num_samples == len(samples)
+        last = samples[-1]
+        assert 1 == samples.num_built
+        assert last is samples[len(samples) - 1]
+        assert 1 == samples.num_built
+        assert [last] == samples[-1:]
+        with pytest.raises(IndexError):
+            samples[len(samples)]
+
+
+    def test_lazy_samples_match_eager_samples(
+            self, path_project_conf, path_sample_anns):
+        """ Deferred construction doesn't alter the Samples built. """
+        eager = Project(path_project_conf).samples
+        lazy = Project(path_project_conf, defer_sample_construction=True)
+        lazy_samples = list(lazy.samples)
+        assert lazy.samples.num_built == len(eager) == len(lazy_samples)
+        for exp, obs in zip(eager, lazy_samples):
+            assert type(exp) is type(obs)
+            assert SamplePreparationTests._comparable(exp) == \
+                   SamplePreparationTests._comparable(obs)
+
+
     @pytest.mark.parametrize(argnames="lazy", argvalues=[False, True])
     def test_sample_name_availability(
             self, path_project_conf, path_sample_anns, lazy):
@@ -449,6 +479,479 @@ class DerivedColumnsTests:
 
 
 
+class SamplePreparationTests:
+    """ Samples established by column match those established one by one. """
+
+    ANNOTATIONS = """sample_name,library,organism,file,file2,col_modifier
+a,ATAC,human,src1,src2,1
+b,RNA,mouse,src1,,2
+c,RNA,frog,unknown,src1,
+d,ChIP,,src3,src2,3
+""".splitlines(True)
+
+    MERGE_TABLE = """sample_name,file,col_modifier
+d,src1,4
+d,src1,5
+""".splitlines(True)
+
+
+    @pytest.fixture
+    def conf_path(self, tmpdir):
+        """ Write annotations, merge table, and config for a Project. """
+        datadir = tmpdir.mkdir("data")
+        for name in ["a1", "b2", "d4", "d5"]:
+            datadir.join("{}.txt".format(name)).write("")
+        tmpdir.join("anns.csv").write("".join(self.ANNOTATIONS))
+        tmpdir.join("merge.csv").write("".join(self.MERGE_TABLE))
+        src1 = os.path.join(datadir.strpath, "{sample_name}{col_modifier}.txt")
+        config_data = {
+            "metadata": {
+                SAMPLE_ANNOTATIONS_KEY: "anns.csv", "merge_table": "merge.csv",
+                "output_dir": tmpdir.strpath},
+            "constants": {"read_type": "SINGLE", "assay": "seq"},
+            "genomes": {"human": "hg38", "mouse": "mm10"},
+            "derived_columns": ["file", "file2"],
+            "data_sources": {
+                "src1": src1, "src2": os.path.join(datadir.strpath, "*.txt"),
+                "src3": "{missing_attribute}.txt"},
+            "implied_columns": {
+                "protocol": {"RNA": {"stranded": "yes", "phenome": "p1"}}}
+        }
+        return _write_project_config(config_data, dirpath=tmpdir.strpath)
+
+
+    def test_columnar_preparation_matches_individual(self, conf_path):
+        """ Column-wise Sample preparation is an optimization only. """
+        observed = Project(conf_path).samples
+        with mock.patch.object(
+                Project, "_compute_sample_columns", return_value=None):
+            expected = Project(conf_path).samples
+        assert [s.name for s in expected] == [s.name for s in observed]
+        for exp, obs in zip(expected, observed):
+            assert self._comparable(exp) == self._comparable(obs)
+
+
+    @pytest.mark.parametrize(argnames="columnar", argvalues=[False, True])
+    def test_sheet_attributes_in_column_order(self, conf_path, columnar):
+        """ A Sample's sheet attributes are ordered as the sheet's columns. """
+        header = self.ANNOTATIONS[0].strip().split(",")
+        if columnar:
+            samples = Project(conf_path).samples
+        else:
+            with mock.patch.object(
+                    Project, "_compute_sample_columns", return_value=None):
+                samples = Project(conf_path).samples
+        for sample in samples[:3]:
+            assert [c for c in header if c in sample.sheet_attributes] == \
+                   list(sample.sheet_attributes)
+        assert header == list(samples[0].sheet_attributes)
+
+
+    def test_columnar_preparation_values(self, conf_path):
+        """ Spot-check constants, implications, and derived paths. """
+        prj = Project(conf_path)
+        columns = prj._compute_sample_columns()
+        assert columns is not None
+        a, b, c, d = prj.samples
+        assert "seq" == a.assay == d.assay
+        assert "hg38" == a.genome and "mm10" == b.genome
+        assert c.genome is None and d.genome is None
+        assert "yes" == b.stranded == c.stranded
+        assert not hasattr(a, "stranded")
+        assert a.file.endswith(os.path.join("data", "a1.txt"))
+        assert "src1" == a.file_key
+        assert 4 == len(a.file2.split(" "))
+        assert "unknown" == c.file
+        assert d.merged
+
+
+    def test_individual_preparation_fallback(self, conf_path):
+        """ Configurations not reproducible by column are handled one by one. """
+        with open(conf_path, 'r') as conf_file:
+            config_data = yaml.safe_load(conf_file)
+        config_data["constants"] = {"nested": {"k": "v"}}
+        with open(conf_path, 'w') as conf_file:
+            yaml.safe_dump(config_data, conf_file)
+        prj = Project(conf_path)
+        assert prj._compute_sample_columns() is None
+        assert 4 == len(prj.samples)
+        assert all("v" == s.nested.k for s in prj.samples)
+
+
+    @pytest.mark.parametrize(argnames="lazy", argvalues=[False, True])
+    def test_compact_samples_match_full(self, conf_path, lazy):
+        """ A Sample that's a view of its row has the same data. """
+        expected = Project(conf_path).samples
+        observed = Project(conf_path, compact_samples=True,
+                           defer_sample_construction=lazy).samples
+        assert [True, True, True, False] == \
+               [isinstance(s, SampleView) for s in observed]
+        for exp, obs in zip(expected, observed):
+            assert self._comparable(exp) == self._comparable(obs)
+            assert set(exp.keys()) == set(obs.keys())
+            assert exp.paths.sample_root == obs.paths.sample_root
+            assert exp.sheet_attributes == obs.sheet_attributes
+
+
+    def test_compact_samples_track_outputs(self, conf_path):
+        """ A view's output locations are those of the full Sample. """
+        with open(conf_path, 'a') as conf_file:
+            yaml.safe_dump({"trackhubs": {"trackhub_dir": "/hub",
+                                          "url": "http://hub"}}, conf_file)
+        expected = Project(conf_path).samples
+        observed = Project(conf_path, compact_samples=True).samples
+        for exp, obs in zip(expected, observed):
+            assert os.path.join("/hub", exp.name + ".bigWig") == exp.bigwig
+            assert "http://hub/{}.bigWig".format(exp.name) == exp.track_url
+            for name in ["results_subdir", "bigwig", "track_url"]:
+                assert getattr(exp, name) == getattr(obs, name)
+
+
+    def test_compact_samples_to_yaml(self, conf_path, tmpdir):
+        """ A Sample's view of its row is written as the Sample would be. """
+        full = Project(conf_path).samples[0]
+        view = Project(conf_path, compact_samples=True).samples[0]
+        assert full.generate_filename() == view.generate_filename()
+        full.to_yaml(tmpdir.join("full.yaml").strpath)
+        view.to_yaml(tmpdir.join("view.yaml").strpath)
+        full_data, view_data = \
+            [yaml.safe_load(tmpdir.join(f).read())
+             for f in ["full.yaml", "view.yaml"]]
+        del full_data["yaml_file"], view_data["yaml_file"]
+        assert full_data == view_data
+
+
+    def test_compact_sample_modification(self, conf_path):
+        """ Changes to a Sample that's a view don't affect its table. """
+        prj = Project(conf_path, compact_samples=True)
+        a, b = prj.samples[:2]
+        a.organism = "frog"
+        a.paths.extra = "extra"
+        a.merged_cols["file"] = "x"
+        a.genome = None
+        del a.file_key
+        assert "frog" == a.organism and "human" == prj.sheet.organism[0]
+        assert "hg38" == a.genome
+        assert "file_key" not in a and not hasattr(a, "file_key")
+        assert "file_key" not in a.keys() and "file_key" in b
+        assert "extra" == prj.samples[0].paths.extra
+        assert not hasattr(b.paths, "extra") and not b.merged_cols
+        a.file_key = "src2"
+        assert "src2" == a["file_key"]
+
+
+    def test_compact_sample_copies_are_samples(self, conf_path):
+        """ A pickled or copied view is an ordinary Sample. """
+        view = Project(conf_path, compact_samples=True).samples[1]
+        view.stranded = "no"
+        for restored in [pickle.loads(pickle.dumps(view)), copy.copy(view)]:
+            assert type(restored) is Sample
+            assert "no" == restored.stranded
+            assert self._comparable(view) == self._comparable(restored)
+
+
+    @staticmethod
+    def _comparable(sample):
+        return {k: v for k, v in sample._attributes().items()
+                if k not in ["prj", "paths"]}
+
+
+
+class SampleIndexesTests:
+    """ Project finds Samples by name and by protocol without a scan. """
+
+
+    @pytest.mark.parametrize(argnames="lazy", argvalues=[False, True])
+    def test_get_sample(self, path_project_conf, path_sample_anns, lazy):
+        """ A Sample may be fetched by name. """
+        p = Project(path_project_conf, defer_sample_construction=lazy)
+        names = list(p.sample_names)
+        for name in names:
+            assert name == p.get_sample(name).name
+        assert names[::-1] == [s.name for s in p.get_samples(names[::-1])]
+        if lazy:
+            assert len(names) == p.samples.num_built
+
+
+    def test_get_missing_sample(self, path_project_conf, path_sample_anns):
+        """ Request for an unknown sample is an error. """
+        p = Project(path_project_conf)
+        with pytest.raises(ValueError):
+            p.get_sample("not-a-sample")
+
+
+    @pytest.mark.parametrize(argnames="lazy", argvalues=[False, True])
+    @pytest.mark.parametrize(
+            argnames=["protocols", "exclude", "expected"],
+            argvalues=[(["testlib"], False, ["a", "b", "c"]),
+                       (["TEST-NGS"], False, ["d"]),
+                       (["testngs"], True, ["a", "b", "c"]),
+                       (["unknown"], False, [])])
+    def test_samples_by_protocol(
+            self, path_project_conf, path_sample_anns,
+            lazy, protocols, exclude, expected):
+        """ Selection by protocol builds only the Samples selected. """
+        p = Project(path_project_conf, defer_sample_construction=lazy)
+        observed = p.samples_by_protocol(protocols, exclude=exclude)
+        assert expected == [s.name for s in observed]
+        assert {"testlib", "testngs"} == p.protocols
+        if lazy:
+            assert len(expected) == p.samples.num_built
+
+
+    @pytest.mark.parametrize(argnames="lazy", argvalues=[False, True])
+    def test_renamed_sample_is_found(
+            self, path_project_conf, path_sample_anns, lazy):
+        """ Once invalidated, indexes reflect edits to built Samples. """
+        p = Project(path_project_conf, defer_sample_construction=lazy)
+        sample = p.get_sample("a")
+        sample.sample_name = "renamed"
+        sample.protocol = "ATAC-seq"
+        p.invalidate_sample_indexes()
+        assert sample is p.get_sample("renamed")
+        with pytest.raises(ValueError):
+            p.get_sample("a")
+        assert [sample] == list(p.samples_by_protocol(["atacseq"]))
+        assert ["b", "c"] == \
+            [s.name for s in p.samples_by_protocol(["testlib"])]
+        if lazy:
+            assert 3 == p.samples.num_built
+
+
+    def test_index_reflects_protocol_constant(
+            self, path_project_conf, path_sample_anns):
+        """ Indexes agree with Samples when the sheet doesn't suffice. """
+        with open(path_project_conf, 'r') as conf_file:
+            config_data = yaml.safe_load(conf_file)
+        config_data["constants"] = {"protocol": "ATAC-seq"}
+        with open(path_project_conf, 'w') as conf_file:
+            yaml.safe_dump(config_data, conf_file)
+        p = Project(path_project_conf, defer_sample_construction=True)
+        assert {"ATAC-seq"} == p.protocols
+        assert p.num_samples == len(p.samples_by_protocol(["atacseq"]))
+
+
+
+class ReadTypeTests:
+    """ Project checks each sample input file's reads just once. """
+
+
+    @pytest.mark.parametrize(argnames="processes", argvalues=[1, 3])
+    def test_set_read_types_checks_each_file_once(
+            self, tmpdir, path_project_conf, path_sample_anns, processes):
+        """ Samples sharing an input file share its check. """
+        paths = [tmpdir.join(n).strpath for n in ["x.bam", "y.bam"]]
+        for path in paths:
+            open(path, 'w').close()
+        p = Project(path_project_conf)
+        for i, s in enumerate(p.samples):
+            s.ngs_inputs = [paths[i % 2]]
+        features = ({50: 8, 49: 2}, 10)
+        with mock.patch("pep.models.check_bam",
+                        return_value=features) as check_bam:
+            updated = p.set_read_types(processes=processes)
+            assert p.num_samples == len(updated)
+            assert sorted(paths) == \
+                   sorted(c[0][0] for c in check_bam.call_args_list)
+            # Checks are reused rather than repeated.
+            for s in p.samples:
+                s.set_read_type()
+            assert len(paths) == check_bam.call_count
+        for s in p.samples:
+            assert "paired" == s.read_type
+            assert 50 == s.read_length
+            assert s.paired
+
+
+    def test_set_read_types_skips_valid_read_type(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ A Sample that already has a valid read type is left alone. """
+        path = tmpdir.join("x.bam").strpath
+        open(path, 'w').close()
+        p = Project(path_project_conf)
+        for s in p.samples:
+            s.ngs_inputs = [path]
+            s.read_type = "single"
+        with mock.patch("pep.models.check_bam") as check_bam:
+            assert [] == p.set_read_types()
+        assert not check_bam.called
+
+
+    def test_input_files_stat_once(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ Read checks and requirement checks share the Project's stats. """
+        path = tmpdir.join("x.bam").strpath
+        open(path, 'w').close()
+        missing = tmpdir.join("missing.bam").strpath
+        p = Project(path_project_conf)
+        for s in p.samples:
+            s.ngs_inputs = [path]
+            s.required_inputs = [path + " " + missing]
+            s.required_inputs_attr = []
+        with mock.patch("pep.models.check_bam", return_value=({1: 10}, 0)), \
+                mock.patch("pep.utils.os.stat", wraps=os.stat) as stat:
+            p.set_read_types()
+            for s in p.samples:
+                error_type, _, detail = s.determine_missing_requirements()
+                assert IOError is error_type
+                assert missing == detail
+        assert sorted([path, missing]) == \
+               sorted(c[0][0] for c in stat.call_args_list)
+        p.invalidate_files(path)
+        assert path not in p.stat_cache and missing in p.stat_cache
+        assert not any(k[0] == path for k in p._read_checks)
+
+
+    def test_input_sizes_use_project_stats(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ Input file sizes are computed through the Project's stats. """
+        path = tmpdir.join("x.txt")
+        path.write("a" * 1024)
+        p = Project(path_project_conf)
+        assert 0 == len(p.stat_cache)
+        attributes = {"ngs_input_files": None,
+                      "required_input_files": ["input_path"],
+                      "all_input_files": None}
+        iface = mock.MagicMock()
+        iface.get_attribute.side_effect = lambda _, name: attributes[name]
+        for s in p.samples:
+            s.input_path = path.strpath
+            s.set_pipeline_attributes(iface, "pipeline")
+            assert float(1024) / (1024 ** 3) == s.input_file_size
+        assert path.strpath in p.stat_cache and 1 == len(p.stat_cache)
+
+
+    def test_failed_check_is_reraised(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ An error from a bulk check surfaces for each Sample. """
+        path = tmpdir.join("x.bam").strpath
+        open(path, 'w').close()
+        p = Project(path_project_conf)
+        for s in p.samples:
+            s.ngs_inputs = [path]
+        with mock.patch("pep.models.check_bam", side_effect=IOError), \
+                pytest.raises(IOError):
+            p.set_read_types(permissive=False)
+
+
+
+class SampleYamlWriterTests:
+    """ Project writes its Samples' YAML files in bulk. """
+
+
+    @pytest.mark.parametrize(argnames="processes", argvalues=[1, 3])
+    def test_files_match_to_yaml(
+            self, tmpdir, path_project_conf, path_sample_anns, processes):
+        """ Each file is as the Sample itself would write it. """
+        p = Project(path_project_conf)
+        folder = tmpdir.mkdir("submission").strpath
+        expected = []
+        for s in p.samples:
+            s.to_yaml(subs_folder_path=folder)
+            with open(s.yaml_file, 'r') as f:
+                expected.append((s.yaml_file, f.read()))
+            os.remove(s.yaml_file)
+        paths = p.write_sample_files(
+            subs_folder_path=folder, processes=processes)
+        assert [path for path, _ in expected] == paths
+        for path, text in expected:
+            with open(path, 'r') as f:
+                assert text == f.read()
+
+
+    def test_project_data_serialized_once(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ The Project data in each Sample's file are determined once. """
+        p = Project(path_project_conf)
+        with mock.patch("pep.models.grab_project_data",
+                        wraps=pep.models.grab_project_data) as grab:
+            p.write_sample_files(subs_folder_path=tmpdir.strpath)
+        assert p.num_samples > 1
+        assert 1 == grab.call_count
+
+
+    def test_unchanged_files_are_kept(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ Only a file whose content changes is rewritten. """
+        p = Project(path_project_conf)
+        paths = p.write_sample_files(subs_folder_path=tmpdir.strpath)
+        inodes = [os.stat(path).st_ino for path in paths]
+        p.samples[0].extra = "new"
+        p.write_sample_files(subs_folder_path=tmpdir.strpath)
+        # A rewritten file replaces the previous one.
+        assert [False] + [True] * (len(paths) - 1) == \
+               [os.stat(path).st_ino == i for path, i in zip(paths, inodes)]
+        assert "new" == yaml.safe_load(open(paths[0]))["extra"]
+
+
+
+class ProjectSnapshotTests:
+    """ Tests for the opt-in, on-disk Project snapshot cache. """
+
+
+    @pytest.mark.parametrize(argnames="lazy", argvalues=[False, True])
+    def test_unchanged_project_is_loaded(
+            self, tmpdir, path_project_conf, path_sample_anns, lazy):
+        """ An up-to-date snapshot replaces Project construction. """
+        cache = tmpdir.join("cache").strpath
+        built = Project(path_project_conf, cache_folder=cache,
+                        defer_sample_construction=lazy)
+        assert 1 == len(os.listdir(cache))
+        with mock.patch("pep.models.check_sheet") as read_sheet:
+            loaded = Project(path_project_conf, cache_folder=cache,
+                             defer_sample_construction=lazy)
+        read_sheet.assert_not_called()
+        assert list(built.sample_names) == list(loaded.sample_names)
+        for exp, obs in zip(built.samples, loaded.samples):
+            assert obs.prj is loaded
+            assert type(exp) is type(obs)
+            assert SamplePreparationTests._comparable(exp) == \
+                   SamplePreparationTests._comparable(obs)
+
+
+    def test_changed_annotations_invalidate_snapshot(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ Modification of a Project input file means Project is rebuilt. """
+        cache = tmpdir.join("cache").strpath
+        Project(path_project_conf, cache_folder=cache)
+        with open(path_sample_anns, 'a') as anns_file:
+            anns_file.write("new_sample,testlib,src3,src3,,src3,src3,\n")
+        p = Project(path_project_conf, cache_folder=cache)
+        assert "new_sample" == p.samples[-1].name
+
+
+    def test_inputs_given_as_text_are_fingerprinted(
+            self, path_project_conf, path_sample_anns):
+        """ An input file counts whatever the type of its path's string. """
+        p = Project(path_project_conf)
+        anns = u"{}".format(path_sample_anns)
+        p.metadata[SAMPLE_ANNOTATIONS_KEY] = anns
+        assert anns in p._snapshot_inputs()
+
+
+    def test_arguments_distinguish_snapshots(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ Projects constructed with different arguments aren't confused. """
+        cache = tmpdir.join("cache").strpath
+        Project(path_project_conf, cache_folder=cache)
+        p = Project(path_project_conf, cache_folder=cache, permissive=False)
+        assert not p.permissive
+        assert 2 == len(os.listdir(cache))
+
+
+    def test_unreadable_snapshot_is_ignored(
+            self, tmpdir, path_project_conf, path_sample_anns):
+        """ A corrupt snapshot is replaced rather than loaded. """
+        cache = tmpdir.join("cache")
+        Project(path_project_conf, cache_folder=cache.strpath)
+        snapshot, = cache.listdir()
+        snapshot.write("not a snapshot")
+        p = Project(path_project_conf, cache_folder=cache.strpath)
+        assert p.num_samples == len(p.samples)
+        assert b"not a snapshot" != snapshot.read_binary()
+
+
+
 class ProjectPipelineArgstringTests:
     """ Tests for Project config's pipeline_arguments section. """
 
@@ -684,6 +1187,203 @@ class ProjectPipelineArgstringTests:
 
 
 
+class SubmissionBundleCacheTests:
+    """ A protocol's submission bundles are built once, until invalidated. """
+
+    @pytest.fixture
+    def prj(self, tmpdir):
+        """ Project with one pipeline interface covering two protocols. """
+        return _write_pipelines_project(
+                tmpdir.strpath, {"ATAC-seq": "atac.py", "RNA": "rna.py; qc.py"},
+                ["atac.py", "rna.py", "qc.py"])
+
+
+    @staticmethod
+    def _count_builds(prj, calls):
+        """ Make calls with Project, counting pipeline path resolutions. """
+        with mock.patch.object(
+                pep.models.ProtocolInterface, "finalize_pipeline_key_and_paths",
+                autospec=True, side_effect=pep.models.ProtocolInterface.
+                        finalize_pipeline_key_and_paths) as finalize:
+            results = [call(prj) for call in calls]
+        return finalize.call_count, results
+
+
+    def test_bundles_built_once_per_protocol(self, prj):
+        """ Repeat requests, however the protocol's cased, are lookups. """
+        num_built, results = self._count_builds(prj, [
+                lambda p: p.build_submission_bundles("RNA"),
+                lambda p: p.build_submission_bundles("rna"),
+                lambda p: p.build_submission_bundles("RNA")])
+        assert 2 == num_built
+        assert all(results[0] == r for r in results[1:])
+        assert ["rna.py", "qc.py"] == [b.pipeline for b in results[0]]
+
+
+    def test_unknown_protocol(self, prj):
+        """ No bundles for a protocol without interfaces. """
+        assert [] == prj.build_submission_bundles("ChIP-seq")
+
+
+    def test_prefetch(self, prj):
+        """ Prefetching builds each protocol's bundles, for later lookup. """
+        num_built, results = self._count_builds(prj, [
+                lambda p: p.prefetch_submission_bundles(),
+                lambda p: p.build_submission_bundles("ATAC-seq")])
+        assert 3 == num_built
+        prefetched, atac = results
+        assert {"ATACSEQ", "RNA"} == set(prefetched)
+        assert prefetched["ATACSEQ"] == atac
+
+
+    @pytest.mark.parametrize(
+            argnames="invalidate",
+            argvalues=[lambda p: p.invalidate_submission_bundles(),
+                       lambda p: p.invalidate_submission_bundles(["rna"]),
+                       lambda p: p.invalidate_submission_bundles(u"rna")],
+            ids=["all", "protocol", "text"])
+    def test_rebuilt_when_invalidated(self, prj, invalidate):
+        """ Bundles are rebuilt after invalidation or interfaces change. """
+        num_built, _ = self._count_builds(prj, [
+                lambda p: p.build_submission_bundles("RNA"),
+                invalidate,
+                lambda p: p.build_submission_bundles("RNA")])
+        assert 4 == num_built
+
+
+    def test_interfaces_change(self, prj):
+        """ New interfaces for a protocol aren't hidden by stored bundles. """
+        assert 2 == len(prj.build_submission_bundles("RNA"))
+        prj.interfaces_by_protocol["RNA"] = []
+        assert [] == prj.build_submission_bundles("RNA")
+
+
+
+class SubmissionWavesTests:
+    """ A protocol's bundles are grouped by dependency among pipelines. """
+
+
+    @staticmethod
+    def _wave_pipelines(prj, protocol):
+        return [[b.pipeline for b in wave]
+                for wave in prj.build_submission_waves(protocol)]
+
+
+    @pytest.mark.parametrize(
+            argnames=["mapping", "expected"],
+            argvalues=[("a.py", [["a.py"]]),
+                       ("a.py, b.py", [["a.py", "b.py"]]),
+                       ("(a.py, b.py)", [["a.py", "b.py"]]),
+                       ("a.py; b.py; c.py", [["a.py"], ["b.py"], ["c.py"]]),
+                       ("a.py; (b.py, c.py); d.py",
+                        [["a.py"], ["b.py", "c.py"], ["d.py"]]),
+                       ("(a.py, b.py); c.py; a.py",
+                        [["a.py", "b.py"], ["c.py"]])])
+    def test_waves(self, tmpdir, mapping, expected):
+        """ Serial pipelines are in successive waves, parallel ones share. """
+        prj = _write_pipelines_project(
+                tmpdir.strpath, {"RNA": mapping},
+                ["a.py", "b.py", "c.py", "d.py"])
+        assert expected == self._wave_pipelines(prj, "RNA")
+        assert [p for wave in expected for p in wave] == \
+               [b.pipeline for b in prj.build_submission_bundles("RNA")]
+
+
+    def test_missing_script_skipped(self, tmpdir):
+        """ Pipelines after a missing one follow that one's upstream. """
+        prj = _write_pipelines_project(
+                tmpdir.strpath, {"RNA": "a.py; (b.py, c.py); d.py; e.py"},
+                ["a.py", "b.py", "c.py", "d.py", "e.py"],
+                missing=["a.py", "d.py"])
+        assert [["b.py", "c.py"], ["e.py"]] == \
+               self._wave_pipelines(prj, "RNA")
+
+
+    def test_unknown_protocol(self, tmpdir):
+        """ No waves for a protocol without interfaces. """
+        prj = _write_pipelines_project(
+                tmpdir.strpath, {"RNA": "a.py"}, ["a.py"])
+        assert [] == prj.build_submission_waves("ChIP-seq")
+
+
+
+class SubmissionScriptsTests:
+    """ Submission scripts are written in bulk from a parsed template. """
+
+    TEMPLATE = "#SBATCH --job-name='{JOBNAME}'\n" \
+               "#SBATCH --output='{LOGFILE}'\n#SBATCH --mem='{MEM}'\n" \
+               "#SBATCH --partition='{PARTITION}'\n{CODE}\n"
+
+
+    @pytest.fixture
+    def prj(self, tmpdir):
+        """ Project with a compute partition. """
+        prj = _write_pipelines_project(
+                tmpdir.strpath, {"RNA": "a.py"}, ["a.py"])
+        prj.compute.partition = "longq"
+        return prj
+
+
+    @pytest.fixture
+    def template(self, tmpdir):
+        """ Path to a SLURM-like submission template. """
+        path = tmpdir.join("template.sub")
+        path.write(self.TEMPLATE)
+        return path.strpath
+
+
+    def test_scripts(self, prj, template, tmpdir):
+        """ Compute settings fill what a job's values don't. """
+        folder = tmpdir.join("subs").strpath
+        jobs = [{"jobname": "a", "code": "a.py", "mem": 8000},
+                {"jobname": "b", "code": "b.py", "mem": "4000",
+                 "partition": "shortq", "logfile": "b.out"}]
+        paths = prj.write_submission_scripts(
+                jobs, subs_folder_path=folder, template=template)
+        assert [os.path.join(folder, "a.sub"),
+                os.path.join(folder, "b.sub")] == paths
+        with open(paths[0]) as f:
+            assert "#SBATCH --job-name='a'\n#SBATCH --output='{}'\n" \
+                   "#SBATCH --mem='8000'\n#SBATCH --partition='longq'\n" \
+                   "a.py\n".format(os.path.join(folder, "a.log")) == f.read()
+        with open(paths[1]) as f:
+            assert "#SBATCH --job-name='b'\n#SBATCH --output='b.out'\n" \
+                   "#SBATCH --mem='4000'\n#SBATCH --partition='shortq'\n" \
+                   "b.py\n" == f.read()
+
+
+    def test_template_parsed_once(self, prj, template, tmpdir):
+        """ A template is parsed again only once its file changes. """
+        jobs = [{"jobname": "j{}".format(i), "code": "run.py"}
+                for i in range(10)]
+        with mock.patch.object(
+                pep.models.SubmissionTemplate, "from_file",
+                wraps=pep.models.SubmissionTemplate.from_file) as from_file:
+            for _ in range(3):
+                prj.write_submission_scripts(
+                        jobs, subs_folder_path=tmpdir.strpath,
+                        template=template)
+            assert 1 == from_file.call_count
+            with open(template, 'a') as f:
+                f.write("echo done\n")
+            paths = prj.write_submission_scripts(
+                    jobs, subs_folder_path=tmpdir.strpath, template=template)
+            assert 2 == from_file.call_count
+        with open(paths[0]) as f:
+            assert f.read().endswith("run.py\necho done\n")
+
+
+    def test_default_template(self, prj, tmpdir):
+        """ By default, the compute settings' template is filled. """
+        path, = prj.write_submission_scripts(
+                [{"jobname": "j", "code": "run.py"}],
+                subs_folder_path=tmpdir.strpath)
+        with open(path) as f:
+            assert "run.py | tee {}".format(
+                    os.path.join(tmpdir.strpath, "j.log")) in f.read()
+
+
+
 def _write_project_config(config_data, dirpath, filename="proj-conf.yaml"):
     """
     Write the configuration file for a Project.
@@ -700,6 +1400,40 @@ def _write_project_config(config_data, dirpath, filename="proj-conf.yaml"):
 
 
 
+def _write_pipelines_project(
+        dirpath, protocol_mapping, pipelines, missing=()):
+    """
+    Write a Project with one pipeline interface, and its pipeline scripts.
+
+    :param str dirpath: path to folder in which to place files
+    :param Mapping[str, str] protocol_mapping: pipeline(s) by protocol
+    :param Iterable[str] pipelines: name of each pipeline script to declare
+    :param Iterable[str] missing: pipeline scripts not to create
+    :return Project: Project with a sample for each mapped protocol
+    """
+    for pipe in pipelines:
+        if pipe not in missing:
+            open(os.path.join(dirpath, pipe), 'w').close()
+    piface_path = os.path.join(dirpath, "piface.yaml")
+    with open(piface_path, 'w') as f:
+        yaml.safe_dump({
+            "protocol_mapping": protocol_mapping,
+            "pipelines": {pipe: {"name": os.path.splitext(pipe)[0]}
+                          for pipe in pipelines}}, f)
+    anns_path = os.path.join(dirpath, "anns.csv")
+    with open(anns_path, 'w') as f:
+        f.write("sample_name,protocol\n")
+        for i, protocol in enumerate(protocol_mapping):
+            f.write("s{},{}\n".format(i, protocol))
+    conf_path = _write_project_config(
+            {"metadata": {SAMPLE_ANNOTATIONS_KEY: anns_path,
+                          "output_dir": dirpath,
+                          "pipeline_interfaces": piface_path}},
+            dirpath=dirpath)
+    return Project(conf_path)
+
+
+
 def _env_paths_to_names(envs):
     """
     Convert filepath(s) in each environment to filename for assertion.
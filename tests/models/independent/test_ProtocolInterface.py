@@ -585,6 +585,105 @@ class SampleSubtypeTests:
         assert target == subtype.__name__
 
 
+    def test_pipeline_module_imported_once(
+            self, tmpdir, path_config_file, atac_pipe_name):
+        """ A pipeline module's subtypes are remembered, not reimported. """
+        pipe_path = os.path.join(tmpdir.strpath, atac_pipe_name)
+        _create_module(lines_by_class=[_class_definition_lines(
+                "OnlySubtype", Sample.__name__)], filepath=pipe_path)
+        piface = ProtocolInterface(path_config_file)
+        with mock.patch("pep.models.import_from_source",
+                        wraps=models.import_from_source) as mocked_import:
+            subtypes = [piface.fetch_sample_subtype(
+                    protocol=ATAC_PROTOCOL_NAME,
+                    strict_pipe_key=atac_pipe_name, full_pipe_path=pipe_path)
+                for _ in range(3)]
+        assert 1 == mocked_import.call_count
+        assert ["OnlySubtype"] * 3 == [st.__name__ for st in subtypes]
+
+
+    def test_modified_pipeline_module_is_reimported(
+            self, tmpdir, path_config_file, atac_pipe_name):
+        """ A change to a pipeline module's file invalidates its subtypes. """
+        pipe_path = os.path.join(tmpdir.strpath, atac_pipe_name)
+        piface = ProtocolInterface(path_config_file)
+        observed = []
+        for i, name in enumerate(["Before", "AfterModification"]):
+            _create_module(lines_by_class=[_class_definition_lines(
+                    name, Sample.__name__)], filepath=pipe_path)
+            # Distinguish the versions regardless of timestamp resolution.
+            os.utime(pipe_path, (1000000 + i, 1000000 + i))
+            observed.append(piface.fetch_sample_subtype(
+                    protocol=ATAC_PROTOCOL_NAME,
+                    strict_pipe_key=atac_pipe_name,
+                    full_pipe_path=pipe_path).__name__)
+        assert ["Before", "AfterModification"] == observed
+
+
+    @pytest.mark.parametrize(
+            argnames="subtype_names", argvalues=[[], ["A", "B"]])
+    def test_module_not_imported_without_subtype_selection(
+            self, tmpdir, path_config_file, atac_pipe_name, subtype_names):
+        """ Without a subtype to select, the module isn't imported. """
+        pipe_path = os.path.join(tmpdir.strpath, atac_pipe_name)
+        _create_module(lines_by_class=[_class_definition_lines(
+                name, Sample.__name__) for name in subtype_names],
+                filepath=pipe_path)
+        piface = ProtocolInterface(path_config_file)
+        with mock.patch("pep.models.import_from_source") as mocked_import:
+            subtype = piface.fetch_sample_subtype(
+                    protocol=ATAC_PROTOCOL_NAME,
+                    strict_pipe_key=atac_pipe_name, full_pipe_path=pipe_path)
+        assert subtype is Sample
+        mocked_import.assert_not_called()
+
+
+    def test_conditional_subtype_is_imported(
+            self, tmpdir, path_config_file, atac_pipe_name):
+        """ A subtype that's bound conditionally is found by import. """
+        pipe_path = os.path.join(tmpdir.strpath, atac_pipe_name)
+        with open(pipe_path, 'w') as f:
+            f.write("\n".join([
+                    SAMPLE_IMPORT, "if True:",
+                    "    class Chosen(Sample): pass",
+                    "else:", "    Chosen = None", ""]))
+        piface = ProtocolInterface(path_config_file)
+        subtype = piface.fetch_sample_subtype(
+                protocol=ATAC_PROTOCOL_NAME,
+                strict_pipe_key=atac_pipe_name, full_pipe_path=pipe_path)
+        assert "Chosen" == subtype.__name__
+
+
+    @pytest.mark.parametrize(
+            argnames="lines",
+            argvalues=[("import os, sys",
+                        "sys.path.insert(0, os.path.join("
+                        "os.path.dirname(__file__), 'lib'))",
+                        "from helpers import Chosen"),
+                       (SAMPLE_IMPORT,
+                        "Chosen = type('Chosen', (Sample, ), {})")],
+            ids=["path_added_import", "call"])
+    def test_unresolvable_subtype_is_imported(
+            self, tmpdir, path_config_file, atac_pipe_name, lines):
+        """ A subtype that can't be resolved statically is found by import. """
+        lib = tmpdir.mkdir("lib")
+        lib.join("helpers.py").write(
+                "\n".join([SAMPLE_IMPORT, "class Chosen(Sample): pass", ""]))
+        pipe_path = os.path.join(tmpdir.strpath, atac_pipe_name)
+        with open(pipe_path, 'w') as f:
+            f.write("\n".join(lines + ("", )))
+        piface = ProtocolInterface(path_config_file)
+        try:
+            subtype = piface.fetch_sample_subtype(
+                    protocol=ATAC_PROTOCOL_NAME,
+                    strict_pipe_key=atac_pipe_name, full_pipe_path=pipe_path)
+        finally:
+            sys.modules.pop("helpers", None)
+            if lib.strpath in sys.path:
+                sys.path.remove(lib.strpath)
+        assert "Chosen" == subtype.__name__
+
+
     @pytest.fixture(scope="function")
     def atacseq_piface_data_with_subtypes(
             self, request, atacseq_piface_data, atac_pipe_name):
@@ -0,0 +1,39 @@
+""" Tests for ProtocolMapper, the parsing of a protocol's pipeline(s). """
+
+import pytest
+from pep.models import ProtocolMapper
+
+
+__author__ = "Vince Reuter"
+__email__ = "vreuter@virginia.edu"
+
+
+
+@pytest.mark.parametrize(
+        argnames=["mapping", "expected"],
+        argvalues=[("a.py", [("a.py", ())]),
+                   ("a.py, b.py", [("a.py", ()), ("b.py", ())]),
+                   (" (a.py, b.py) ", [("a.py", ()), ("b.py", ())]),
+                   ("a.py; b.py", [("a.py", ()), ("b.py", ("a.py", ))]),
+                   ("a.py; (b.py, c.py); d.py",
+                    [("a.py", ()), ("b.py", ("a.py", )),
+                     ("c.py", ("a.py", )), ("d.py", ("b.py", "c.py"))]),
+                   ("a.py; b.py;", [("a.py", ()), ("b.py", ("a.py", ))])])
+def test_build_pipeline(mapping, expected):
+    """ Each pipeline depends on those of the group before it. """
+    protomap = ProtocolMapper({"ATAC-seq": mapping})
+    assert expected == list(protomap.build_pipeline("ATAC-seq").items())
+
+
+
+def test_repeated_pipeline_registered_once():
+    """ A repeated pipeline keeps its place; those after it follow on. """
+    protomap = ProtocolMapper({"RNA": "a.py; b.py; a.py; c.py"})
+    assert [("a.py", ()), ("b.py", ("a.py", )), ("c.py", ("b.py", ))] == \
+           list(protomap.build_pipeline("RNA").items())
+
+
+
+def test_unmapped_protocol():
+    """ A protocol without a mapping has no pipelines. """
+    assert {} == ProtocolMapper({"RNA": "a.py"}).build_pipeline("ATAC")
@@ -1,7 +1,11 @@
 """ Tests for the Sample. """
 
 import copy
+import glob
+import gzip
+import json
 import os
+import struct
 import yaml
 import mock
 import numpy as np
@@ -9,7 +13,7 @@ from pandas import Series
 import pytest
 import pep
 from pep.models import \
-    AttributeDict, Sample, DATA_SOURCE_COLNAME, \
+    load_sample, AttributeDict, Sample, DATA_SOURCE_COLNAME, \
     DATA_SOURCES_SECTION, SAMPLE_NAME_COLNAME
 from tests.helpers import named_param
 
@@ -223,6 +227,146 @@ def test_input_files(files, test_type, tmpdir):
 
 
 
+class SetReadTypeTests:
+    """ Read type and length are set from a sample's input files. """
+
+
+    def test_empty_fastq(self, tmpdir):
+        """ Without reads to examine, read type and length are unset. """
+        path = tmpdir.join("empty_R1.fastq")
+        path.write("")
+        s = Sample({SAMPLE_NAME_COLNAME: "s1"})
+        s.ngs_inputs = [path.strpath]
+        s.set_read_type()
+        assert s.read_type is None
+        assert s.read_length is None
+
+
+    def test_bam_without_alignments(self, tmpdir):
+        """ A BAM file with just a header leaves read type unset. """
+        path = tmpdir.join("header.bam").strpath
+        with gzip.open(path, 'wb') as f:
+            f.write(b"BAM\1" + struct.pack("<ii", 0, 0))
+        s = Sample({SAMPLE_NAME_COLNAME: "s1"})
+        s.ngs_inputs = [path]
+        s.set_read_type()
+        assert s.read_type is None
+        assert s.read_length is None
+
+
+
+class ChipSample(Sample):
+    """ Sample subtype, as a pipeline may define. """
+    pass
+
+
+
+class RNASample(Sample):
+    """ Sample subtype that's named by the end of another's name. """
+    pass
+
+
+
+class SCRNASample(RNASample):
+    """ Subtype of a subtype, for finding the type of a Sample file. """
+    pass
+
+
+
+class SampleFileFormatTests:
+    """ A Sample's file may be in any of several formats. """
+
+    FORMATS = ["yaml", "json"]
+
+
+    @pytest.fixture
+    def sample(self):
+        """ Provide a Sample with some nested data. """
+        s = Sample({SAMPLE_NAME_COLNAME: "s1", "protocol": "ChIP",
+                    "read_length": 50},
+                   prj={"metadata": {"output_dir": "out"}, "other": "x"})
+        s.paths.sample_root = os.path.join("out", "s1")
+        s.merged_cols["file"] = "a.txt"
+        return s
+
+
+    @pytest.mark.parametrize(argnames="file_format", argvalues=FORMATS)
+    def test_load_sample(self, sample, tmpdir, file_format):
+        """ A Sample is rebuilt from its file. """
+        path = sample.to_file(subs_folder_path=tmpdir.strpath,
+                              file_format=file_format)
+        assert "s1." + file_format == os.path.basename(path)
+        s = load_sample(path)
+        assert type(s) is Sample
+        assert ("s1", "ChIP", 50) == (s.name, s.protocol, s.read_length)
+        assert "out" == s.prj.metadata.output_dir and "other" not in s.prj
+        assert os.path.join("out", "s1") == s.paths.sample_root
+        assert "a.txt" == s.merged_cols.file
+        assert path == s.yaml_file
+
+
+    @pytest.mark.skipif(pep.models.msgpack is None, reason="No msgpack")
+    def test_load_msgpack_sample(self, sample, tmpdir):
+        """ A Sample is rebuilt from its msgpack file. """
+        self.test_load_sample(sample, tmpdir, "msgpack")
+
+
+    @pytest.mark.parametrize(argnames="file_format", argvalues=["json"])
+    def test_same_data_as_yaml(self, sample, tmpdir, file_format):
+        """ Each format holds the data that the YAML file does. """
+        path = tmpdir.join("s1.yaml").strpath
+        sample.to_yaml(path)
+        with open(path, 'r') as f:
+            expected = yaml.safe_load(f)
+        path = sample.to_file(path, file_format=file_format)
+        with open(path, 'r') as f:
+            assert expected == json.load(f)
+
+
+    @pytest.mark.parametrize(argnames="file_format", argvalues=FORMATS)
+    def test_subtype_is_rebuilt(self, tmpdir, file_format):
+        """ The Sample subtype is determined from the filename. """
+        path = ChipSample({SAMPLE_NAME_COLNAME: "s1"}).to_file(
+            subs_folder_path=tmpdir.strpath, file_format=file_format)
+        assert "s1_ChipSample" == os.path.splitext(os.path.basename(path))[0]
+        assert type(load_sample(path)) is ChipSample
+        assert type(load_sample(path, sample_type=Sample)) is Sample
+
+
+    @pytest.mark.skipif(pep.models.msgpack is None, reason="No msgpack")
+    def test_subtype_is_rebuilt_from_msgpack(self, tmpdir):
+        """ The Sample subtype is determined from a msgpack filename. """
+        self.test_subtype_is_rebuilt(tmpdir, "msgpack")
+
+
+    @pytest.mark.parametrize(
+        argnames="sample_type", argvalues=[RNASample, SCRNASample])
+    def test_nested_subtype_is_rebuilt(self, tmpdir, sample_type):
+        """ The subtype is that with the longest name ending the filename. """
+        path = sample_type({SAMPLE_NAME_COLNAME: "s1"}).to_file(
+            subs_folder_path=tmpdir.strpath)
+        assert type(load_sample(path)) is sample_type
+
+
+    def test_project_selects_format(self, sample, tmpdir):
+        """ Absent a requested format, the Project's selection is used. """
+        sample.prj["sample_file_format"] = "json"
+        path = sample.to_file(subs_folder_path=tmpdir.strpath)
+        assert path.endswith(".json")
+        assert path == os.path.join(tmpdir.strpath, sample.generate_filename())
+        assert path.replace(".json", ".yaml") == \
+               sample.to_yaml(subs_folder_path=tmpdir.strpath)
+
+
+    def test_unknown_format(self, sample, tmpdir):
+        """ A format must be known to be written or read. """
+        with pytest.raises(ValueError):
+            sample.to_file(subs_folder_path=tmpdir.strpath, file_format="xml")
+        with pytest.raises(ValueError):
+            load_sample(tmpdir.join("s1.xml").strpath)
+
+
+
 class SetFilePathsTests:
     """ Tests for setting Sample file paths. """
 
@@ -361,3 +505,68 @@ class LocateDataSourceTests:
             assert self.PATH_BY_KEY[src_key] == path
         else:
             assert path is None
+
+
+    @named_param(argnames="extra_vars",
+                 argvalues=[None, {"flowcell": "FC2"}, {"lane": "1"}])
+    def test_template_fields_and_environment(
+            self, tmpdir, prj_data, extra_vars):
+        """ Extra variables take precedence; environment is expanded. """
+        template = "$PEP_TEST_DATA/{flowcell}_{lane}.bam"
+        prj_data[DATA_SOURCES_SECTION] = {"src1": template}
+        s = Sample({SAMPLE_NAME_COLNAME: "random-sample", "prj": prj_data,
+                    "flowcell": "FC1", "lane": "3"})
+        with mock.patch.dict(os.environ, {"PEP_TEST_DATA": tmpdir.strpath}):
+            path = s.locate_data_source(prj_data[DATA_SOURCES_SECTION],
+                                        source_key="src1", extra_vars=extra_vars)
+        values = {"flowcell": "FC1", "lane": "3"}
+        values.update(extra_vars or {})
+        expected = os.path.join(tmpdir.strpath,
+                                "{flowcell}_{lane}.bam".format(**values))
+        assert expected == path
+
+
+    def test_project_globs_from_listing(self, tmpdir):
+        """ Wildcard data sources share a Project's directory listings. """
+        data = tmpdir.mkdir("data")
+        for name in ["s1_L1.bam", "s1_L2.bam", "s2_L1.bam"]:
+            data.join(name).ensure()
+        conf = tmpdir.join("prj.yaml")
+        anns = tmpdir.join("anns.csv")
+        anns.write("{},{}\ns1,src1\ns2,src1\ns3,src1\n".format(
+                SAMPLE_NAME_COLNAME, DATA_SOURCE_COLNAME))
+        template = os.path.join(data.strpath, "{sample_name}_L*.bam")
+        conf.write(yaml.safe_dump(
+                {"metadata": {"sample_annotation": anns.strpath,
+                              "output_dir": tmpdir.strpath},
+                 DATA_SOURCES_SECTION: {"src1": template}}))
+        with mock.patch("pep.utils.os.listdir", wraps=os.listdir) as listdir:
+            p = pep.Project(conf.strpath)
+            observed = [s.data_source for s in p.samples]
+        assert 1 == listdir.call_count
+        expected = [" ".join(sorted(glob.glob(template.format(sample_name=n))))
+                    or template.format(sample_name=n)
+                    for n in ["s1", "s2", "s3"]]
+        assert expected == observed
+
+
+    def test_project_compiles_template_once(self, tmpdir):
+        """ A Project parses a data source template just once. """
+        conf = tmpdir.join("prj.yaml")
+        anns = tmpdir.join("anns.csv")
+        anns.write("{},{}\nrandom-sample,src1\n".format(
+                SAMPLE_NAME_COLNAME, DATA_SOURCE_COLNAME))
+        conf.write(yaml.safe_dump(
+                {"metadata": {"sample_annotation": anns.strpath,
+                              "output_dir": tmpdir.strpath},
+                 DATA_SOURCES_SECTION: {"src1": "$PEP_TEST_DATA/{sample_name}"}}))
+        with mock.patch.dict(os.environ, {"PEP_TEST_DATA": "first"}):
+            p = pep.Project(conf.strpath)
+            s = p.samples[0]
+        assert "first/random-sample" == s.data_source
+        template = p.compile_data_source(p.data_sources["src1"])
+        assert template is p.compile_data_source(p.data_sources["src1"])
+        assert {SAMPLE_NAME_COLNAME} == template.fields
+        with mock.patch.dict(os.environ, {"PEP_TEST_DATA": "second"}):
+            assert "first/random-sample" == s.locate_data_source(
+                    p.data_sources, source_key="src1")
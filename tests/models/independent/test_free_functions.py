@@ -1,11 +1,13 @@
 """ Tests for module-scoped functions, i.e. those not in a class. """
 
 import copy
+import gzip
 import logging
 import os
 import random
 import string
 import sys
+import pandas as pd
 import pytest
 from pep import models, DEV_LOGGING_FMT
 
@@ -308,6 +310,137 @@ class SampleSubtypeImportTests:
 
 
 
+class MergeSampleTests:
+    """ Tests for merging Sample data from merge table rows. """
+
+    DATA_SOURCES = {"src": "data/{sample_name}{col_modifier}.txt"}
+
+
+    @pytest.fixture(scope="function")
+    def merge_table(self):
+        """ Provide a merge table with multiple rows for one sample. """
+        return pd.DataFrame(
+            [["b", "src", "src", 1], ["b", "src", "src", 2],
+             ["c", "src", "src", 3], ["b", "src", "unknown", 4]],
+            columns=[models.SAMPLE_NAME_COLNAME, "file", "file2",
+                     "col_modifier"])
+
+
+    def test_group_merge_table(self, merge_table):
+        """ Rows are grouped by sample name, retaining table order. """
+        rows_by_sample = models.group_merge_table(merge_table)
+        assert {"b", "c"} == set(rows_by_sample.keys())
+        assert [1, 2, 4] == \
+               [r["col_modifier"] for r in rows_by_sample["b"]]
+        assert [3] == [r["col_modifier"] for r in rows_by_sample["c"]]
+
+
+    def test_group_merge_table_requires_sample_name(self, merge_table):
+        """ Merge table grouping requires a sample name column. """
+        with pytest.raises(KeyError):
+            models.group_merge_table(
+                merge_table.drop(models.SAMPLE_NAME_COLNAME, axis=1))
+
+
+    @pytest.mark.parametrize(argnames="name", argvalues=["b", "c", "d"])
+    def test_grouped_merge_matches_table_merge(self, merge_table, name):
+        """ Grouped merge table rows yield the same Sample as the table. """
+        derived = ["file", "file2"]
+        grouped = models.group_merge_table(merge_table)
+        from_table = models.Sample({models.SAMPLE_NAME_COLNAME: name})
+        from_groups = models.Sample({models.SAMPLE_NAME_COLNAME: name})
+        models.merge_sample(from_table, merge_table,
+                            self.DATA_SOURCES, derived)
+        models.merge_sample(from_groups, grouped, self.DATA_SOURCES, derived)
+        assert from_table.merged_cols == from_groups.merged_cols
+        assert self._comparable(from_table) == self._comparable(from_groups)
+        # Grouped rows are untouched, so they may be used again.
+        assert grouped == models.group_merge_table(merge_table)
+
+
+    def test_multiple_rows_are_space_joined(self, merge_table):
+        """ Values from multiple merge rows are space-delimited. """
+        s = models.Sample({models.SAMPLE_NAME_COLNAME: "b"})
+        models.merge_sample(s, models.group_merge_table(merge_table),
+                            self.DATA_SOURCES, ["file", "file2"])
+        assert "data/b1.txt data/b2.txt data/b4.txt" == s.file
+        assert "data/b1.txt data/b2.txt" == s.file2
+        # Each merged row resets the key for a derived column.
+        assert "src" == s.file_key
+        assert "unknown" == s.file2_key
+        assert "1 2 4" == s.col_modifier
+        assert s.merged
+
+
+    @staticmethod
+    def _comparable(sample):
+        """ Sample data, less the attributes that compare by identity. """
+        return {k: v for k, v in sample.items() if k != "paths"}
+
+
+
+class ReadTableDataTests:
+    """ Tests for reading sample annotations and merge tables. """
+
+    LINES = ["sample_name\tprotocol\tcount", "a\tATAC\t1", "b\tNA\t",
+             "c\tnan\t3"]
+
+
+    @pytest.fixture(params=["plain", "gzip"])
+    def path_table(self, request, tmpdir):
+        """ Write the table's lines, possibly compressed. """
+        text = "\n".join(self.LINES) + "\n"
+        if request.param == "gzip":
+            path = tmpdir.join("anns.txt.gz").strpath
+            with gzip.open(path, 'wb') as f:
+                f.write(text.encode("utf-8"))
+        else:
+            path = tmpdir.join("anns.txt").strpath
+            with open(path, 'w') as f:
+                f.write(text)
+        return path
+
+
+    def test_annotations_are_text(self, path_table):
+        """ Sample annotations are all text, with no null values. """
+        df = models.check_sheet(path_table)
+        assert ["sample_name", "protocol", "count"] == list(df.columns)
+        assert [["a", "ATAC", "1"], ["b", "NA", ""], ["c", "nan", "3"]] == \
+               df.values.tolist()
+
+
+    def test_merge_table_types_inferred(self, path_table):
+        """ By default, column types are inferred, and nulls are parsed. """
+        df = models.read_table_data(path_table)
+        assert [1.0, 3.0] == df["count"].dropna().tolist()
+        assert ["ATAC"] == df["protocol"].dropna().tolist()
+
+
+    def test_missing_required_column(self, tmpdir):
+        """ Annotations must name samples. """
+        path = tmpdir.join("anns.csv")
+        path.write("name,protocol\na,ATAC\n")
+        with pytest.raises(ValueError):
+            models.check_sheet(path.strpath)
+
+
+    @pytest.mark.parametrize(argnames="extension",
+                             argvalues=[".parquet", ".feather"])
+    def test_columnar_annotations(self, tmpdir, extension):
+        """ Columnar data are handled as delimited text would be. """
+        pytest.importorskip("pyarrow")
+        path = tmpdir.join("anns" + extension).strpath
+        data = pd.DataFrame({"sample_name": ["a", "b"],
+                             "count": [1.0, None]})
+        if extension == ".parquet":
+            data.to_parquet(path)
+        else:
+            data.to_feather(path)
+        assert [["a", "1.0"], ["b", ""]] == \
+               models.check_sheet(path).values.tolist()
+
+
+
 def build_subtype_lines(subtype_names):
     """
     Create text that defines minimal version of Sample subtypes.
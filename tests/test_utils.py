@@ -1,11 +1,21 @@
 """ Tests for utility functions """
 
 import copy
+import glob
+import gzip
+import os
+import struct
+import subprocess
+import sys
 import mock
 import pytest
 from pep.const import SAMPLE_INDEPENDENT_PROJECT_SECTIONS, SAMPLE_NAME_COLNAME
 from pep.models import AttributeDict, Project, Sample
-from pep.utils import add_project_sample_constants, grab_project_data
+from pep.utils import \
+    add_project_sample_constants, check_bam, check_fastq, \
+    declared_subclasses, fastq_mate, get_file_size, grab_project_data, \
+    infer_delimiter, is_command_callable, update_file, ExecutableCache, \
+    GlobCache, LocalExecutor, StatCache, SubmissionTemplate, _megabytes
 from tests.helpers import named_param, nonempty_powerset
 
 
@@ -165,3 +175,693 @@ class AddProjectSampleConstantsTests:
         assert old_val == basic_sample[collision]
         basic_sample = add_project_sample_constants(basic_sample, mock_prj)
         assert new_val == basic_sample[collision]
+
+
+
+class InferDelimiterTests:
+    """ Delimiter of a text table is determined from header or extension. """
+
+
+    @named_param(argnames="delimiter", argvalues=[",", "\t", ";", "|"])
+    @named_param(argnames="extension", argvalues=[".csv", ".tsv", ".txt"])
+    def test_header_determines_delimiter(self, tmpdir, delimiter, extension):
+        """ A header with multiple columns is sniffed for its delimiter. """
+        lines = [delimiter.join(row) + "\n" for row in
+                 [(SAMPLE_NAME_COLNAME, "protocol"), ("a", "ATAC")]]
+        path = tmpdir.join("anns" + extension)
+        path.write("".join(lines))
+        assert delimiter == infer_delimiter(path.strpath)
+
+
+    @named_param(argnames=["extension", "expected"],
+                 argvalues=[(".csv", ","), (".tsv", "\t"), (".txt", ",")])
+    def test_extension_determines_delimiter(self, tmpdir, extension, expected):
+        """ A single-column file's extension determines the delimiter. """
+        path = tmpdir.join("anns" + extension)
+        path.write("{}\na\nb\n".format(SAMPLE_NAME_COLNAME))
+        assert expected == infer_delimiter(path.strpath)
+
+
+    @named_param(argnames="header",
+                 argvalues=["sample_name\tprotocol", "sample_name"])
+    def test_gzipped_file(self, tmpdir, header):
+        """ The delimiter of a gzipped file is inferred as for plain text. """
+        path = tmpdir.join("anns.tsv.gz").strpath
+        with gzip.open(path, 'wb') as f:
+            f.write("\n{}\na\tATAC\n".format(header).encode("utf-8"))
+        assert "\t" == infer_delimiter(path)
+
+
+    def test_missing_file(self, tmpdir):
+        """ A nonexistent file is an IOError. """
+        with pytest.raises(IOError):
+            infer_delimiter(tmpdir.join("missing.csv").strpath)
+
+
+
+def _write_fastq(path, names, lengths):
+    """ Write a FASTQ file, gzipped according to extension. """
+    records = ["@{}\n{}\n+\n{}\n".format(name, "A" * n, "I" * n)
+               for name, n in zip(names, lengths)]
+    data = "".join(records).encode("utf-8")
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'wb') as f:
+        f.write(data)
+
+
+
+class CheckFastqTests:
+    """ Read type and length are sniffed from the first FASTQ records. """
+
+
+    @named_param(argnames="filename",
+                 argvalues=["reads.fastq", "reads.fq", "reads.fastq.gz"])
+    def test_single_end(self, tmpdir, filename):
+        """ Distinct read names without a mate file are single-end. """
+        path = tmpdir.join(filename).strpath
+        _write_fastq(path, ["r{}".format(i) for i in range(20)],
+                     [50] * 7 + [49] * 3 + [10] * 10)
+        read_lengths, paired = check_fastq(path, 10)
+        assert {50: 7, 49: 3} == dict(read_lengths)
+        assert 0 == paired
+
+
+    @named_param(argnames="names", argvalues=[
+            ["r{}/{}".format(i // 2, 1 + i % 2) for i in range(10)],
+            ["r{} {}:N:0:1".format(i // 2, 1 + i % 2) for i in range(10)]])
+    def test_interleaved(self, tmpdir, names):
+        """ Successive records named for the same read are paired. """
+        path = tmpdir.join("reads.fq").strpath
+        _write_fastq(path, names, [36] * len(names))
+        read_lengths, paired = check_fastq(path, 10)
+        assert {36: 10} == dict(read_lengths)
+        assert 10 == paired
+
+
+    @named_param(argnames=["filename", "mate"], argvalues=[
+            ("s_R1_001.fastq.gz", "s_R2_001.fastq.gz"),
+            ("s_2.fq", "s_1.fq"), ("s.r1.fastq", "s.r2.fastq")])
+    def test_mate_files(self, tmpdir, filename, mate):
+        """ A file with an extant R1/R2 mate is paired. """
+        path = tmpdir.join(filename).strpath
+        _write_fastq(path, ["r{}".format(i) for i in range(4)], [75] * 4)
+        assert fastq_mate(path) is None
+        assert 0 == check_fastq(path, 10)[1]
+        mate_path = tmpdir.join(mate).strpath
+        _write_fastq(mate_path, ["r{}".format(i) for i in range(4)], [75] * 4)
+        assert mate_path == fastq_mate(path)
+        assert 4 == check_fastq(path, 10)[1]
+
+
+    @named_param(argnames=["filename", "other"], argvalues=[
+            ("rep-1.fastq", "rep-2.fastq"), ("rep.1.fq", "rep.2.fq")])
+    def test_numbered_files_are_not_mates(self, tmpdir, filename, other):
+        """ A number without 'R' or underscore doesn't make a mate. """
+        path = tmpdir.join(filename).strpath
+        for p in [path, tmpdir.join(other).strpath]:
+            _write_fastq(p, ["r{}".format(i) for i in range(4)], [75] * 4)
+        assert fastq_mate(path) is None
+        assert 0 == check_fastq(path, 10)[1]
+
+
+    def test_mate_with_other_reads(self, tmpdir):
+        """ Files named as mates, but with different reads, are unpaired. """
+        path = tmpdir.join("rep_1.fastq").strpath
+        mate_path = tmpdir.join("rep_2.fastq").strpath
+        _write_fastq(path, ["a{}".format(i) for i in range(4)], [75] * 4)
+        _write_fastq(mate_path, ["b{}".format(i) for i in range(4)], [75] * 4)
+        assert mate_path == fastq_mate(path)
+        assert 0 == check_fastq(path, 10)[1]
+
+
+    def test_reads_only_first_records(self, tmpdir):
+        """ Records past those requested needn't even be well-formed. """
+        path = tmpdir.join("reads.fastq").strpath
+        _write_fastq(path, ["a", "b"], [5, 5])
+        with open(path, 'a') as f:
+            f.write("not FASTQ\n")
+        assert {5: 2} == dict(check_fastq(path, 2)[0])
+        with pytest.raises(IOError):
+            check_fastq(path, 3)
+
+
+
+def _write_bam(path, flags, lengths):
+    """ Write a minimal BAM file, with no reference sequences. """
+    header = b"BAM\1" + struct.pack("<i", 0) + struct.pack("<i", 0)
+    records = []
+    for flag, n in zip(flags, lengths):
+        name = b"r\0"
+        seq = b"\x11" * ((n + 1) // 2)
+        body = struct.pack("<iiBBHHHiiii", -1, -1, len(name), 0, 4680,
+                           0, flag, n, -1, -1, 0) + name + seq + b"I" * n
+        records.append(struct.pack("<i", len(body)) + body)
+    with gzip.open(path, 'wb') as f:
+        f.write(header + b"".join(records))
+
+
+
+class CheckBamTests:
+    """ BAM read type and length come from the first alignment records. """
+
+
+    def test_fixture_bam(self):
+        """ Reads in the test data BAM file are single-end, of length 50. """
+        bam = os.path.join(os.path.dirname(__file__), "data", "d-bamfile.bam")
+        with mock.patch("pep.utils.sp.Popen") as popen:
+            read_lengths, paired = check_bam(bam, 10)
+        assert not popen.called
+        assert {50: 10} == dict(read_lengths)
+        assert 0 == paired
+
+
+    @named_param(argnames="o", argvalues=[4, 10])
+    def test_paired_and_length(self, tmpdir, o):
+        """ Paired flag and sequence length are tallied for first reads. """
+        path = tmpdir.join("reads.bam").strpath
+        _write_bam(path, [1, 65, 129, 0, 0, 1],
+                   [76, 76, 75, 76, 76, 100])
+        read_lengths, paired = check_bam(path, o)
+        expected = {4: ({76: 3, 75: 1}, 3),
+                    10: ({76: 4, 75: 1, 100: 1}, 4)}[o]
+        assert expected == (dict(read_lengths), paired)
+
+
+    def test_no_alignments(self, tmpdir):
+        """ A BAM file with just a header has no reads to tally. """
+        path = tmpdir.join("header.bam").strpath
+        _write_bam(path, [], [])
+        with mock.patch("pep.utils.sp.Popen") as popen:
+            read_lengths, paired = check_bam(path, 10)
+        assert not popen.called
+        assert ({}, 0) == (dict(read_lengths), paired)
+
+
+    def test_not_bam_falls_back_to_samtools(self, tmpdir):
+        """ A file that can't be decoded is handed to samtools. """
+        path = tmpdir.join("reads.bam")
+        path.write("not a BAM file")
+        with mock.patch("pep.utils.sp.Popen", side_effect=OSError), \
+                pytest.raises(OSError):
+            check_bam(path.strpath, 10)
+
+
+    def test_missing_file(self, tmpdir):
+        """ A nonexistent BAM file is an IOError. """
+        with pytest.raises(IOError):
+            check_bam(tmpdir.join("missing.bam").strpath, 10)
+
+
+
+class StatCacheTests:
+    """ Each path is stat'd just once, until it's invalidated. """
+
+
+    @pytest.fixture
+    def paths(self, tmpdir):
+        """ Paths to a couple of files, and to a nonexistent one. """
+        paths = []
+        for name, content in [("a.txt", "a" * 1024), ("b.txt", "")]:
+            path = tmpdir.join(name)
+            path.write(content)
+            paths.append(path.strpath)
+        return paths + [tmpdir.join("missing.txt").strpath]
+
+
+    @named_param(argnames="processes", argvalues=[1, 2, None])
+    def test_prefetch_stats_each_path_once(self, paths, processes):
+        """ Prefetch stats unique paths, and later lookups are cached. """
+        cache = StatCache()
+        with mock.patch("pep.utils.os.stat", wraps=os.stat) as stat:
+            cache.prefetch(paths + paths, processes=processes)
+            assert [cache.exists(p) for p in paths] == [True, True, False]
+            assert 1024 == cache.stat(paths[0]).st_size
+            assert sorted(paths) == sorted(c[0][0] for c in stat.call_args_list)
+        assert len(paths) == len(cache)
+
+
+    def test_invalidate(self, paths, tmpdir):
+        """ An invalidated path is stat'd anew. """
+        cache = StatCache()
+        assert not cache.exists(paths[2])
+        open(paths[2], 'w').close()
+        assert not cache.exists(paths[2])
+        cache.invalidate(paths[2])
+        assert paths[2] not in cache
+        assert cache.exists(paths[2])
+        cache.invalidate()
+        assert 0 == len(cache)
+
+
+    def test_invalidate_text_path(self, paths):
+        """ A path given as text is one path, not a sequence of them. """
+        cache = StatCache().prefetch(paths)
+        cache.invalidate(u"{}".format(paths[0]))
+        assert paths[0] not in cache
+        assert len(paths) - 1 == len(cache)
+
+
+    def test_file_size_uses_cache(self, paths):
+        """ File size is computed from cached stats. """
+        cache = StatCache().prefetch(paths[:2])
+        with mock.patch("pep.utils.os.stat") as stat:
+            size = get_file_size(" ".join(paths[:2]), stat_cache=cache)
+        assert not stat.called
+        assert float(1024) / (1024 ** 3) == size
+        assert 0.0 == get_file_size(" ".join(paths), stat_cache=cache)
+
+
+    def test_file_size_fills_empty_cache(self, paths):
+        """ A shared cache is filled even if it's empty at first. """
+        cache = StatCache()
+        get_file_size(paths[0], stat_cache=cache)
+        assert paths[0] in cache
+        assert 1 == len(cache)
+
+
+
+class GlobCacheTests:
+    """ Patterns resolve as with glob, listing each directory once. """
+
+
+    @pytest.fixture
+    def folder(self, tmpdir):
+        """ Folder with some files, including a hidden one, and subfolders. """
+        for relpath in ["a/x1.bam", "a/x2.bam", "a/.x3.bam", "a/b/y.bam",
+                        "c/x4.bam", "c/x5.txt"]:
+            tmpdir.join(relpath).ensure()
+        return tmpdir.strpath
+
+
+    @named_param(argnames="pattern", argvalues=[
+            "a/x*.bam", "*/x*.bam", "*/", "a/.x*", "a/*", "[ac]/x[14].bam",
+            "*/b/y.bam", "a/x?.bam", "missing/*", "a/x1.bam"])
+    def test_matches_glob(self, folder, pattern):
+        """ Matches are those of glob, sorted. """
+        pattern = os.path.join(folder, pattern)
+        assert sorted(glob.glob(pattern)) == GlobCache().glob(pattern)
+
+
+    def test_lists_each_folder_once(self, folder):
+        """ A directory is listed only the first time it's needed. """
+        cache = GlobCache()
+        patterns = [os.path.join(folder, "a", "x{}*".format(i))
+                    for i in range(5)]
+        with mock.patch("pep.utils.os.listdir", wraps=os.listdir) as listdir:
+            matches = [cache.glob(p) for p in patterns]
+            assert 1 == listdir.call_count
+            tmp_folder = os.path.join(folder, "a")
+            cache.invalidate(tmp_folder)
+            assert tmp_folder not in cache
+            cache.glob(patterns[0])
+            assert 2 == listdir.call_count
+        expected = [[], [os.path.join(folder, "a", "x1.bam")],
+                    [os.path.join(folder, "a", "x2.bam")], [], []]
+        assert expected == matches
+
+
+    def test_invalidate_text_folder(self, folder):
+        """ A folder given as text is one folder to forget. """
+        cache = GlobCache()
+        cache.glob(os.path.join(folder, "a", "*"))
+        cache.invalidate(u"{}".format(os.path.join(folder, "a")))
+        assert os.path.join(folder, "a") not in cache
+
+
+
+def _write_executable(folder, name, mode=0o755):
+    """ Write a script into a folder, with the given permissions. """
+    path = folder.join(name)
+    path.write("#!/bin/sh\n")
+    path.chmod(mode)
+    return path.strpath
+
+
+
+class ExecutableCacheTests:
+    """ Commands' executables are found in-process, with PATH listed once. """
+
+
+    @pytest.fixture
+    def bin_folders(self, tmpdir, monkeypatch):
+        """ Put two folders of scripts on PATH. """
+        first, second = tmpdir.mkdir("bin1"), tmpdir.mkdir("bin2")
+        _write_executable(first, "tool")
+        _write_executable(first, "data", mode=0o644)
+        _write_executable(second, "data")
+        monkeypatch.setenv("PATH", os.pathsep.join(
+                [first.strpath, second.strpath]))
+        return first, second
+
+
+    def test_finds_first_executable_on_path(self, bin_folders):
+        """ Non-executable files are passed over, as by the shell. """
+        first, second = bin_folders
+        executables = ExecutableCache()
+        assert first.join("tool").strpath == executables.which("tool -h")
+        assert second.join("data").strpath == executables.which("data")
+        assert executables.which("missing") is None
+        assert is_command_callable("tool", executables=executables)
+        assert not is_command_callable("missing", executables=executables)
+
+
+    def test_path_is_checked_directly(self, bin_folders):
+        """ A command with a path to its executable isn't looked up. """
+        first, _ = bin_folders
+        executables = ExecutableCache()
+        assert executables.which(first.join("tool").strpath)
+        assert executables.which(first.join("data").strpath) is None
+
+
+    def test_lists_each_folder_once(self, bin_folders):
+        """ Many checks list each folder of PATH just once. """
+        executables = ExecutableCache()
+        with mock.patch("pep.utils.os.listdir",
+                        side_effect=os.listdir) as listdir:
+            statuses = executables.check(["tool", "data", "missing", "tool"])
+        assert {"tool": True, "data": True, "missing": False} == statuses
+        assert 2 == listdir.call_count
+
+
+    def test_installed_later(self, bin_folders):
+        """ An executable added to a folder of PATH is found, and relisted. """
+        first, second = bin_folders
+        executables = ExecutableCache()
+        assert executables.which("new") is None
+        _write_executable(first, "new")
+        # Make sure the folder's modification time differs.
+        os.utime(first.strpath, (0, 0))
+        with mock.patch("pep.utils.os.listdir",
+                        side_effect=os.listdir) as listdir:
+            assert first.join("new").strpath == executables.which("new")
+            assert first.join("new").strpath == executables.which("new")
+        assert [mock.call(first.strpath)] == listdir.call_args_list
+        first.join("new").remove()
+        os.utime(first.strpath, (1, 1))
+        assert executables.which("new") is None
+
+
+    def test_made_executable_later(self, bin_folders):
+        """ A file on PATH that's made executable is then found. """
+        first, _ = bin_folders
+        executables = ExecutableCache()
+        _write_executable(first, "script", mode=0o644)
+        assert executables.which("script") is None
+        os.chmod(first.join("script").strpath, 0o755)
+        assert first.join("script").strpath == executables.which("script")
+
+
+    def test_invalidation(self, bin_folders, tmpdir, monkeypatch):
+        """ An executable added is found after invalidation or PATH change. """
+        first, _ = bin_folders
+        executables = ExecutableCache()
+        assert executables.which("new") is None
+        _write_executable(first, "new")
+        executables.invalidate("new")
+        assert first.join("new").strpath == executables.which("new")
+        third = tmpdir.mkdir("bin3")
+        _write_executable(third, "newer")
+        assert executables.which("newer") is None
+        monkeypatch.setenv("PATH", third.strpath)
+        assert third.join("newer").strpath == executables.which("newer")
+
+
+    def test_invalidate_text_command(self, bin_folders):
+        """ A command given as text is one command to forget. """
+        first, _ = bin_folders
+        executables = ExecutableCache()
+        os.utime(first.strpath, (0, 0))
+        assert executables.which("new") is None
+        _write_executable(first, "new")
+        os.utime(first.strpath, (0, 0))
+        executables.invalidate(u"new --flag")
+        assert first.join("new").strpath == executables.which("new")
+
+
+
+class UpdateFileTests:
+    """ A file is rewritten only if its content would change. """
+
+
+    def test_writes_new_and_changed_content(self, tmpdir):
+        """ A new file is written, as is one with different content. """
+        path = tmpdir.join("s.yaml").strpath
+        assert update_file(path, "a: 1\n")
+        assert update_file(path, "a: 2\n")
+        assert "a: 2\n" == tmpdir.join("s.yaml").read()
+        assert ["s.yaml"] == os.listdir(tmpdir.strpath)
+
+
+    def test_skips_unchanged_content(self, tmpdir):
+        """ A file that already holds the content isn't touched. """
+        path = tmpdir.join("s.yaml").strpath
+        update_file(path, "a: 1\n")
+        with mock.patch("pep.utils.open", create=True) as opener:
+            opener.side_effect = open
+            assert not update_file(path, "a: 1\n")
+        assert all("rb" == c[0][1] for c in opener.call_args_list)
+
+
+
+class DeclaredSubclassesTests:
+    """ A module's subclasses of a type are found without running it. """
+
+
+    @pytest.fixture
+    def write_module(self, tmpdir):
+        """ Provide a function to write a module in a folder on sys.path. """
+        sys.path.insert(0, tmpdir.strpath)
+        def write(name, *lines):
+            path = tmpdir.join(name + ".py")
+            path.write("\n".join(lines + ("", )))
+            return path.strpath
+        yield write
+        sys.path.remove(tmpdir.strpath)
+
+
+    def test_classes_and_aliases(self, write_module):
+        """ Subclasses may be indirect, or named by an alias or import. """
+        path = write_module(
+            "pipeline",
+            "raise Exception('module is run')",
+            "import pep.models as models",
+            "from pep.models import Sample as Base, Project",
+            "class Child(models.Sample): pass",
+            "class Grandchild(Child): pass",
+            "class Unrelated(object): pass",
+            "Alias = Child")
+        assert ["Child", "Grandchild", "Child"] == \
+            declared_subclasses(path, Sample)
+
+
+    def test_follows_imports(self, write_module):
+        """ Classes from other source modules are resolved by their source. """
+        write_module("subtypes", "raise Exception('module is run')",
+                     "from pep.models import Sample",
+                     "class External(Sample): pass")
+        path = write_module("pipeline", "from subtypes import External",
+                            "import subtypes as alias")
+        assert ["External"] == declared_subclasses(path, Sample)
+        assert "subtypes" not in sys.modules
+
+
+    def test_main_block_is_ignored(self, write_module):
+        """ What's defined only when run as a script isn't a member. """
+        path = write_module("pipeline", "from pep.models import Sample",
+                            "if __name__ == '__main__':",
+                            "    class Scripted(Sample): pass")
+        assert [] == declared_subclasses(path, Sample)
+
+
+    def test_values_that_are_not_classes(self, write_module):
+        """ Functions and literal values aren't subclasses. """
+        path = write_module("pipeline", "from pep.models import Sample",
+                            "def run(): return 0", "VERSION = '0.1'",
+                            "OPTIONS = {'cores': 1}", "VERSION += '.1'",
+                            "class Local(Sample): pass")
+        assert ["Local"] == declared_subclasses(path, Sample)
+
+
+    def test_rebinding_after_branch(self, write_module):
+        """ A name bound in a branch, then for certain, is determinate. """
+        path = write_module("pipeline", "import sys",
+                            "from pep.models import Sample",
+                            "if sys.version_info < (3, ):",
+                            "    class Subtype(object): pass",
+                            "class Subtype(Sample): pass",
+                            "if __name__ == '__main__':", "    pass",
+                            "else:", "    class Imported(Sample): pass")
+        assert ["Subtype", "Imported"] == declared_subclasses(path, Sample)
+
+
+    @pytest.mark.parametrize(
+        argnames="lines", argvalues=[
+            ("from pep.models import Sample",
+             "def base(): return Sample", "class Made(base()): pass"),
+            ("class Broken(:", ),
+            ("import os", "from pep.models import Sample",
+             "if os.environ.get('PIPELINE_SUBTYPE'):",
+             "    class Chosen(Sample): pass", "else:", "    Chosen = None"),
+            ("import sys", "sys.path.insert(0, 'lib')",
+             "from helpers import Imported"),
+            ("import nosuchmodule", ),
+            ("from pep.models import Sample",
+             "Made = type('Made', (Sample, ), {})"),
+            ("from pep.models import Sample",
+             "Made, Other = Sample, object"),
+            ("from pep.models import Sample", "import functools",
+             "@functools.lru_cache()", "def make(): return Sample"),
+            ("from nosuchmodule import *", ),
+            ("from pep.models import Sample", "for base in [Sample, object]:",
+             "    class Looped(base): pass"),
+            ("from pep.models import Sample", "def make():",
+             "    global Made", "    class Made(Sample): pass", "make()"),
+            ("from pep.models import Sample", "try:",
+             "    from nosuchmodule import Fancy", "except ImportError:",
+             "    class Fancy(Sample): pass")],
+        ids=["computed_base", "syntax_error", "if_else", "missing_from_import",
+             "missing_import", "call", "unpacking", "decorated", "star_import",
+             "loop", "global", "except"])
+    def test_indeterminate(self, write_module, lines):
+        """ What can't be determined statically is null. """
+        assert declared_subclasses(write_module("pipeline", *lines),
+                                   Sample) is None
+
+
+
+def _write_job(folder, name, exit_code=0, seconds=0):
+    """ Write a submission script that tallies concurrent jobs. """
+    script = folder.join(name + ".sub")
+    script.write("\n".join([
+        "touch {d}/{n}.running",
+        "ls {d} | grep -c running >> {d}/{n}.count",
+        "sleep {s}",
+        "rm {d}/{n}.running",
+        "exit {e}"]).format(d=folder.strpath, n=name, s=seconds, e=exit_code))
+    return script.strpath
+
+
+
+def _max_concurrency(folder):
+    """ Greatest number of jobs that any job saw running at once. """
+    return max(int(f.read()) for f in folder.listdir("*.count"))
+
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="Uses sh")
+class LocalExecutorTests:
+    """ Submission scripts run at once as far as resources allow. """
+
+
+    def test_statuses_and_exit_codes(self, tmpdir):
+        """ A job's exit code determines whether it completed or failed. """
+        executor = LocalExecutor(cores=2, mem=1000)
+        executor.submit(_write_job(tmpdir, "ok"), name="ok")
+        executor.submit(_write_job(tmpdir, "bad", exit_code=3), name="bad")
+        assert "waiting" == executor.status("ok")
+        assert {"ok": "completed", "bad": "failed"} == executor.wait()
+        assert 0 == executor.exit_code("ok")
+        assert 3 == executor.exit_code("bad")
+
+
+    @pytest.mark.parametrize(
+        argnames=["resources", "limit"],
+        argvalues=[({"cores": 1}, 2), ({"cores": "2", "mem": "100"}, 1),
+                   ({"cores": 1, "mem": "600"}, 1), ({"cores": 8}, 1)])
+    def test_resources_bound_concurrency(self, tmpdir, resources, limit):
+        """ Jobs that fit within the cores and memory run together. """
+        executor = LocalExecutor(cores=2, mem="1G")
+        for i in range(4):
+            name = "job{}".format(i)
+            executor.submit(_write_job(tmpdir, name, seconds=0.3),
+                            name=name, resources=resources)
+        assert set(["completed"]) == set(executor.wait().values())
+        assert 0 < _max_concurrency(tmpdir) <= limit
+
+
+    def test_dependent_jobs(self, tmpdir):
+        """ A job waits for its upstream, and fails if upstream does. """
+        executor = LocalExecutor(cores=4)
+        executor.submit(_write_job(tmpdir, "a", seconds=0.2), name="a")
+        executor.submit(_write_job(tmpdir, "b"), name="b", after=["a"])
+        executor.submit(_write_job(tmpdir, "c", exit_code=1), name="c")
+        executor.submit(_write_job(tmpdir, "d"), name="d", after=["c"])
+        assert ["completed", "completed", "failed", "failed"] == \
+               list(executor.wait().values())
+        assert 1 == int(tmpdir.join("b.count").read())
+        assert executor.exit_code("d") is None
+        assert not tmpdir.join("d.count").exists()
+
+
+    def test_upstream_fails_to_launch(self, tmpdir):
+        """ A job fails if its upstream fails to launch after it's queued. """
+        executor = LocalExecutor(cores=4)
+        executor.submit(_write_job(tmpdir, "a"), name="a")
+        executor.wait()
+        executor.submit(_write_job(tmpdir, "b"), name="b", after=["a"])
+        bad_script = _write_job(tmpdir, "bad")
+        executor.submit(bad_script, name="a")
+        popen = subprocess.Popen
+        def launch(command, *args, **kwargs):
+            if bad_script in command:
+                raise OSError("Can't launch")
+            return popen(command, *args, **kwargs)
+        with mock.patch("pep.utils.sp.Popen", side_effect=launch):
+            assert {"a": "failed", "b": "failed"} == executor.wait()
+        assert not tmpdir.join("b.count").exists()
+
+
+    def test_cyclic_dependency(self, tmpdir):
+        """ Jobs that depend on one another, by resubmission, fail. """
+        executor = LocalExecutor(cores=4)
+        executor.submit(_write_job(tmpdir, "a"), name="a")
+        executor.wait()
+        executor.submit(_write_job(tmpdir, "b"), name="b", after=["a"])
+        executor.submit(_write_job(tmpdir, "a"), name="a", after=["b"])
+        assert {"a": "failed", "b": "failed"} == executor.wait()
+        assert not tmpdir.join("b.count").exists()
+
+
+    def test_unknown_dependency(self, tmpdir):
+        """ A job can't depend on one that's not been submitted. """
+        with pytest.raises(ValueError):
+            LocalExecutor().submit(_write_job(tmpdir, "a"), after=["z"])
+
+
+    @pytest.mark.parametrize(
+        argnames=["mem", "megabytes"],
+        argvalues=[(8000, 8000), ("8000", 8000), ("8000M", 8000),
+                   ("8g", 8192), ("1.5G", 1536), ("512K", 1)])
+    def test_megabytes(self, mem, megabytes):
+        """ Memory may be given with units. """
+        assert megabytes == _megabytes(mem)
+
+
+
+class SubmissionTemplateTests:
+    """ A submission template's fields are filled by name. """
+
+    TEMPLATE = "#SBATCH --mem='{MEM}'\n#SBATCH --cpus-per-task='{CORES}'\n" \
+               "echo ${HOME} {PARTITION}\n{CODE} | tee {LOGFILE}\n{CODE}"
+
+
+    def test_fields(self):
+        """ Each field is named once, in order of first appearance. """
+        assert ["MEM", "CORES", "PARTITION", "CODE", "LOGFILE"] == \
+               SubmissionTemplate(self.TEMPLATE).fields
+
+
+    def test_render(self):
+        """ Fields are filled insensitive to case, or else left as is. """
+        text = SubmissionTemplate(self.TEMPLATE).render(
+                {"mem": 8000, "Cores": "4", "code": "run.py", "LOGFILE": "l"})
+        assert "#SBATCH --mem='8000'\n#SBATCH --cpus-per-task='4'\n" \
+               "echo ${HOME} {PARTITION}\nrun.py | tee l\nrun.py" == text
+
+
+    def test_from_file(self, tmpdir):
+        """ A template may be read from a file. """
+        path = tmpdir.join("t.sub")
+        path.write(self.TEMPLATE)
+        assert self.TEMPLATE == SubmissionTemplate.from_file(path.strpath).text
+